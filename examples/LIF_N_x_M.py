@@ -1,14 +1,10 @@
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-
 import numpy as np
 import matplotlib.pyplot as plt
 
-from neuron import LIFNeuron
-from synapse import Synapse
-from network import Network
-from monitor import MonitorPotential, MonitorCurrent, MonitorSpike
+from src.neuron import LIFNeuron
+from src.synapse import Synapse
+from src.network import Network
+from src.monitor import MonitorPotential, MonitorCurrent, MonitorSpike
 
 net = Network()
 
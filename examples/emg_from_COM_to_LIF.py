@@ -1,8 +1,6 @@
-import sys
 import os
 
 dirname = os.path.dirname(__file__)
-sys.path.insert(0, os.path.abspath(os.path.join(dirname, '../src')))
 
 # # import numpy as np
 # import matplotlib.pyplot as plt
@@ -32,9 +30,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(dirname, '../src')))
 # Вместо словаря массивов. Так будет понятнее.
 # И в этой структуре можно уже метод - импорт делать, например. 
 
-from neuron import Neuron
-from network import Network
-from data_io_new import InputConstantData
+from src.neuron import Neuron
+from src.network import Network
+from src.data_io_new import InputConstantData
 
 net = Network()
 param = {'Ustart': 0,
@@ -1,17 +1,15 @@
-import sys
 import os
 
 dirname = os.path.dirname(__file__)
-sys.path.insert(0, os.path.abspath(os.path.join(dirname, '../src')))
 
 # import numpy as np
 import matplotlib.pyplot as plt
 
-from neuron import LIFNeuron
-from network import Network
-from monitor import MonitorPotential, MonitorCurrent, MonitorSpike
+from src.neuron import LIFNeuron
+from src.network import Network
+from src.monitor import MonitorPotential, MonitorCurrent, MonitorSpike
 
-from data_io import EMGSignalStateImporterFromFile
+from src.data_io import EMGSignalStateImporterFromFile
 
 net = Network()
 
@@ -0,0 +1,42 @@
+"""
+Время импорта модулей библиотеки в новом процессе.
+Запуск из корня репозитория: python -m examples.import_time
+"""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['src.neuron', 'src.synapse', 'src.network', 'src.monitor',
+           'src.parallel', 'src.data_io', 'src.pipeline']
+REPEATS = 5
+
+CODE = """
+import sys, time
+t = time.perf_counter()
+import {module}
+t = time.perf_counter() - t
+heavy = [m for m in ('matplotlib', 'scipy') if m in sys.modules]
+print(t, ','.join(heavy))
+"""
+
+
+def import_time(module: str):
+    """Лучшее из REPEATS время импорта модуля (с) и загруженные тяжелые пакеты."""
+    best = None
+    for _ in range(REPEATS):
+        out = subprocess.run([sys.executable, '-c', CODE.format(module=module)],
+                             capture_output=True, text=True, check=True,
+                             cwd=ROOT).stdout.split()
+        t = float(out[0])
+        heavy = out[1] if len(out) > 1 else '-'
+        best = t if best is None else min(best, t)
+    return best, heavy
+
+
+if __name__ == '__main__':
+    print(f"{'модуль':<16}{'время, мс':>10}  загружены")
+    for module in MODULES:
+        t, heavy = import_time(module)
+        print(f"{module:<16}{t * 1e3:>10.1f}  {heavy}")
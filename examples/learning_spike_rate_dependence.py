@@ -1,16 +1,12 @@
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-
 import numpy as np
 import matplotlib.pyplot as plt
 import time
 
-from neuron import LIFNeuron
-from synapse import SynapseSTDP, SynapseLTPf
-from network import Network
-from monitor import MonitorSpike, MonitorWeigts
-from data_io import poisson_intervals_array
+from src.neuron import LIFNeuron
+from src.synapse import SynapseSTDP, SynapseLTPf
+from src.network import Network
+from src.monitor import MonitorSpike, MonitorWeigts
+from src.encoders import poisson_intervals_matrix
 
 net = Network()
 
@@ -48,8 +44,8 @@ spike_itervals_in = 1. / freqs_in / dt
 freq_out = 50. / 1000
 spike_itervals_out = 1. / dt / freq_out
 
-signal_in = np.array([poisson_intervals_array(t_steps, i) for i in spike_itervals_in]).T
-signal_out = np.array([poisson_intervals_array(t_steps, spike_itervals_out )]).T
+signal_in = poisson_intervals_matrix(t_steps, spike_itervals_in)
+signal_out = poisson_intervals_matrix(t_steps, [spike_itervals_out])
 
 model_input_current = {'input': signal_in,
                        'output': signal_out}
@@ -0,0 +1,200 @@
+import numpy as np
+from .monitor import MonitorSpike, MonitorSpikePacked
+
+
+def _layer_size(monitor, layer_name) -> int:
+    for obj in monitor.objs:
+        if obj.name == layer_name:
+            return obj.N
+    raise ValueError(f"Данные для {layer_name} не собраны")
+
+
+def iter_spike_windows(spikes, layer_name=None, chunk_steps: int = 65536):
+    """
+    Генератор окон спайков (start, булев массив (steps, N)) по chunk_steps
+    шагов. spikes - MonitorSpikePacked, MonitorSpike или массив (T, N);
+    для мониторов указывается имя слоя.
+    """
+    if isinstance(spikes, MonitorSpikePacked):
+        T = spikes.length
+        for start in range(0, T, chunk_steps):
+            yield start, spikes.get_window(layer_name, start, start + chunk_steps)
+    elif isinstance(spikes, MonitorSpike):
+        data = spikes.get_data(layer_name)
+        N = _layer_size(spikes, layer_name)
+        for start in range(0, len(data), chunk_steps):
+            part = data[start:start + chunk_steps]
+            window = np.zeros((len(part), N), dtype=bool)
+            counts = [len(s) for s in part]
+            window[np.repeat(np.arange(len(part)), counts),
+                   np.fromiter((i for s in part for i in s), dtype=np.int64,
+                               count=sum(counts))] = True
+            yield start, window
+    else:
+        spikes = np.asarray(spikes)
+        for start in range(0, len(spikes), chunk_steps):
+            yield start, spikes[start:start + chunk_steps].astype(bool, copy=False)
+
+
+def spike_events(spikes, layer_name=None, chunk_steps: int = 65536):
+    """Все спайки в виде массивов (номера шагов, номера нейронов)."""
+    steps = []
+    indices = []
+    for start, window in iter_spike_windows(spikes, layer_name, chunk_steps):
+        t, i = np.nonzero(window)
+        steps.append(t + start)
+        indices.append(i)
+    if not steps:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(steps), np.concatenate(indices)
+
+
+def spike_counts(spikes, layer_name=None, chunk_steps: int = 65536) -> np.ndarray:
+    """Количество спайков каждого нейрона (N,)."""
+    total = None
+    for _, window in iter_spike_windows(spikes, layer_name, chunk_steps):
+        counts = np.count_nonzero(window, axis=0)
+        total = counts if total is None else total + counts
+    if total is None:
+        # Спайков нет: нули для каждого нейрона слоя
+        if isinstance(spikes, MonitorSpike):
+            N = _layer_size(spikes, layer_name)
+        else:
+            shape = np.shape(spikes)
+            N = shape[1] if len(shape) == 2 else 0
+        return np.zeros(N, dtype=np.int64)
+    return total
+
+
+def binned_counts(spikes, layer_name=None, bin_steps: int = 1,
+                  chunk_steps: int = 65536) -> np.ndarray:
+    """
+    Количество спайков в интервалах по bin_steps шагов, массив (n_bins, N).
+    Неполный последний интервал отбрасывается.
+    """
+    chunk_steps = max(bin_steps, chunk_steps - chunk_steps % bin_steps)
+    out = []
+    rest = None
+    for _, window in iter_spike_windows(spikes, layer_name, chunk_steps):
+        if rest is not None:
+            window = np.vstack((rest, window))
+        n_bins = len(window) // bin_steps
+        used = n_bins * bin_steps
+        rest = window[used:] if used < len(window) else None
+        blocks = window[:used].reshape(n_bins, bin_steps, window.shape[1])
+        out.append(blocks.sum(axis=1, dtype=np.int64))
+    if not out:
+        return np.zeros((0, 0), dtype=np.int64)
+    return np.vstack(out)
+
+
+def binned_rates(spikes, layer_name=None, dt: float = 1., bin_steps: int = 1,
+                 chunk_steps: int = 65536) -> np.ndarray:
+    """Частоты спайков в интервалах по bin_steps шагов, массив (n_bins, N)."""
+    return binned_counts(spikes, layer_name, bin_steps, chunk_steps) / (bin_steps * dt)
+
+
+def interspike_intervals(spikes, layer_name=None, dt: float = 1.):
+    """
+    Межспайковые интервалы всех нейронов.
+    Возвращает (isi, neuron): интервалы и номера нейронов, к которым они относятся.
+    """
+    steps, indices = spike_events(spikes, layer_name)
+    order = np.lexsort((steps, indices))
+    steps = steps[order]
+    indices = indices[order]
+    same = indices[1:] == indices[:-1]
+    return np.diff(steps)[same] * dt, indices[1:][same]
+
+
+def isi_histogram(spikes, layer_name=None, dt: float = 1., bins=50):
+    """Гистограмма межспайковых интервалов всех нейронов: (hist, edges)."""
+    isi, _ = interspike_intervals(spikes, layer_name, dt)
+    return np.histogram(isi, bins=bins)
+
+
+def fano_factor(spikes, layer_name=None, bin_steps: int = 100,
+                chunk_steps: int = 65536) -> np.ndarray:
+    """
+    Фактор Фано количества спайков в интервалах по bin_steps шагов
+    для каждого нейрона (NaN для нейронов без спайков).
+    """
+    counts = binned_counts(spikes, layer_name, bin_steps, chunk_steps)
+    mean = counts.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return counts.var(axis=0) / mean
+
+
+def correlograms(spikes, layer_name=None, max_lag: int = 50, bin_steps: int = 1,
+                 pairs=None, chunk_steps: int = 65536, chunk_bytes: int = 1 << 26):
+    """
+    Кросс-коррелограммы через БПФ:
+        C[k, i, j] = Sum_t x_i(t) * x_j(t + k), k = -max_lag..max_lag,
+    где x - количество спайков в интервалах по bin_steps шагов.
+    pairs: список пар (i, j); без него считаются все пары нейронов.
+    chunk_bytes: примерный объем промежуточных спектров произведений;
+                 строки i (или пары) обрабатываются группами, чтобы
+                 не создавать массив (nfft, N, N) целиком.
+
+    Возвращает (lags, C), C формы (2 * max_lag + 1, N, N)
+    или (2 * max_lag + 1, len(pairs)).
+    """
+    x = binned_counts(spikes, layer_name, bin_steps, chunk_steps).astype(np.float64)
+    n_bins = len(x)
+    nfft = 1 << int(np.ceil(np.log2(max(n_bins + max_lag, 1))))
+    X = np.fft.rfft(x, n=nfft, axis=0)
+    lags = np.arange(-max_lag, max_lag + 1)
+    rows = lags % nfft
+    # Байт на один столбец: спектр произведения, его копия в irfft и результат
+    column_bytes = 32 * len(X) + 8 * nfft
+    if pairs is None:
+        N = x.shape[1]
+        C = np.empty((len(lags), N, N))
+        step = max(1, chunk_bytes // (column_bytes * max(N, 1)))
+        for i in range(0, N, step):
+            block = np.conj(X[:, i:i + step, np.newaxis]) * X[:, np.newaxis, :]
+            C[:, i:i + step] = np.fft.irfft(block, n=nfft, axis=0)[rows]
+    else:
+        pairs = np.asarray(pairs)
+        C = np.empty((len(lags), len(pairs)))
+        step = max(1, chunk_bytes // column_bytes)
+        for p in range(0, len(pairs), step):
+            block = pairs[p:p + step]
+            C[:, p:p + step] = np.fft.irfft(np.conj(X[:, block[:, 0]]) * X[:, block[:, 1]],
+                                            n=nfft, axis=0)[rows]
+    return lags, np.rint(C)
+
+
+def population_synchrony(spikes, layer_name=None, bin_steps: int = 1,
+                         chunk_steps: int = 65536) -> float:
+    """
+    Мера синхронности популяции (Golomb):
+        chi^2 = Var_t(mean_i x_i) / mean_i Var_t(x_i),
+    x - количество спайков в интервалах по bin_steps шагов.
+    Считается в один проход по окнам. Возвращает chi (от 0 до 1).
+    """
+    chunk_steps = max(bin_steps, chunk_steps - chunk_steps % bin_steps)
+    n = 0
+    s_pop = s2_pop = 0.
+    s_ind = s2_ind = None
+    for _, window in iter_spike_windows(spikes, layer_name, chunk_steps):
+        n_bins = len(window) // bin_steps
+        blocks = window[:n_bins * bin_steps].reshape(n_bins, bin_steps, window.shape[1])
+        x = blocks.sum(axis=1, dtype=np.float64)
+        pop = x.mean(axis=1)
+        n += n_bins
+        s_pop += pop.sum()
+        s2_pop += (pop**2).sum()
+        if s_ind is None:
+            s_ind = x.sum(axis=0)
+            s2_ind = (x**2).sum(axis=0)
+        else:
+            s_ind += x.sum(axis=0)
+            s2_ind += (x**2).sum(axis=0)
+    if not n:
+        return np.nan
+    var_pop = s2_pop / n - (s_pop / n)**2
+    var_ind = np.mean(s2_ind / n - (s_ind / n)**2)
+    if var_ind <= 0:
+        return np.nan
+    return float(np.sqrt(max(var_pop, 0.) / var_ind))
@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+
+def file_identity(path) -> dict:
+    """Идентификатор файла-источника: абсолютный путь, размер и время изменения."""
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns}
+
+
+def _json_default(value):
+    if isinstance(value, np.ndarray):
+        digest = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return {'array': digest, 'shape': value.shape, 'dtype': str(value.dtype)}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Параметр типа {type(value)} нельзя использовать в ключе кэша")
+
+
+def cache_key(params: dict) -> str:
+    """Хэш параметров генерации (включая seed и идентификатор файла)."""
+    text = json.dumps(params, sort_keys=True, default=_json_default)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class InputCache:
+    """
+    Кэш входных данных на диске с адресацией по содержимому.
+    Результат генерации хранится в файле <хэш параметров>.npy и отдается
+    отображением в память. При превышении max_bytes удаляются файлы,
+    к которым дольше всего не обращались (LRU по времени изменения).
+    """
+    def __init__(self, directory: str, max_bytes: int = None):
+        """
+        directory: папка кэша
+        max_bytes: ограничение размера кэша в байтах (None - без ограничения)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.npy')
+
+    def get(self, key: str):
+        """Массив по ключу (memmap только для чтения) или None."""
+        path = self._path(key)
+        try:
+            data = np.load(path, mmap_mode='r')
+        except FileNotFoundError:
+            return None
+        # Отметка использования для LRU
+        os.utime(path)
+        return data
+
+    def put(self, key: str, array: np.ndarray):
+        """Сохранение массива и вытеснение старых записей."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.asarray(array))
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+        return np.load(path, mmap_mode='r')
+
+    def get_or_create(self, params: dict, factory):
+        """
+        Результат factory() для параметров params из кэша,
+        при отсутствии - генерация и сохранение.
+        """
+        key = cache_key(params)
+        data = self.get(key)
+        if data is None:
+            data = self.put(key, factory())
+        return data
+
+    def size(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.directory, f))
+                   for f in os.listdir(self.directory) if f.endswith('.npy'))
+
+    def evict(self, keep: str = None):
+        """Удаление давно неиспользуемых записей до размера max_bytes."""
+        if self.max_bytes is None:
+            return
+        entries = []
+        for f in os.listdir(self.directory):
+            if f.endswith('.npy'):
+                path = os.path.join(self.directory, f)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        for f in os.listdir(self.directory):
+            if f.endswith('.npy'):
+                os.remove(os.path.join(self.directory, f))
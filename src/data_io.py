@@ -1,6 +1,11 @@
+import os
+import json
+import itertools
 import numpy as np
 # import serial
-from scipy.signal import butter, filtfilt
+# scipy.signal импортируется при первой фильтрации
+from .pipeline import emg_envelope_pipeline
+from .cache import file_identity
 
 
 class DataImporter:
@@ -32,10 +37,17 @@ class EMGSignalStateImporterFromFile(DataImporter):
         self.start = params['start']
         self.stop = params['stop']
         self.step = params['step']
+        
+        self.use_cache = params.get('use_cache', False)
+        # InputCache для результатов предобработки (None - без кэша)
+        self.input_cache = params.get('input_cache')
 
         
     def import_data(self):
-        data_raw = np.loadtxt(self.source)[self.start:self.stop:self.step]    
+        if self.use_cache:
+            data_raw = load_text_cached(self.source, self.start, self.stop, self.step)
+        else:
+            data_raw = np.loadtxt(self.source)[self.start:self.stop:self.step]    
         time = self.time_scaler * data_raw[:, 0]
         signal = self.signal_scaler * data_raw[:, 1]
         
@@ -46,10 +58,38 @@ class EMGSignalStateImporterFromFile(DataImporter):
         
         
     def preprocess(self):
+        if self.input_cache is not None:
+            params = {'kind': 'emg_bandpass_abs',
+                      'source': file_identity(self.source),
+                      'start': self.start, 'stop': self.stop, 'step': self.step,
+                      'signal_scaler': self.signal_scaler, 'time_scaler': self.time_scaler,
+                      'lowcut': self.lowcut, 'highcut': self.highcut, 'dt': self.dt}
+            # Кэш отдает memmap только для чтения, сигнал дальше обрабатывается на месте
+            self.signal = np.array(self.input_cache.get_or_create(params, self._preprocess_signal))
+        else:
+            self.signal = self._preprocess_signal()
+            
+    def _preprocess_signal(self):
         signal = self.signal
         signal_filtred = bandpass_filter(signal, self.lowcut, self.highcut, 1./self.dt)
         signal_abs = abs(signal_filtred)
-        self.signal = signal_abs
+        return signal_abs
+        
+    def preprocess_streaming(self, pipeline=None, block_size=4096):
+        """
+        Причинная обработка сигнала блоками через Pipeline.
+        По умолчанию - полосовой фильтр и выпрямление, как в preprocess,
+        но без двойного прохода filtfilt. Если цепочка прореживает сигнал,
+        время, состояние и шаг dt прореживаются вместе с ним.
+        """
+        if pipeline is None:
+            pipeline = emg_envelope_pipeline(self.lowcut, self.highcut, 1./self.dt)
+        self.signal = pipeline.run(self.signal, block_size)
+        factor = pipeline.decimation
+        if factor > 1:
+            self.time = self.time[::factor]
+            self.state = self.state[::factor]
+            self.dt *= factor
 
 
 class EMGSignalStateImporterFromCOM(DataImporter):
@@ -60,6 +100,7 @@ def butter_bandpass(lowcut, highcut, fs, order=4):
     """
     Создаёт коэффициенты фильтра полосового пропускания.
     """
+    from scipy.signal import butter
     nyq = 0.5 * fs
     low = lowcut / nyq
     high = highcut / nyq
@@ -70,10 +111,82 @@ def bandpass_filter(data, lowcut, highcut, fs, order=4):
     """
     Применяет полосовой фильтр к входным данным.
     """
+    from scipy.signal import filtfilt
     b, a = butter_bandpass(lowcut, highcut, fs, order)
     y = filtfilt(b, a, data, axis=0)
     return y
 
+def text_cache_paths(source):
+    """
+    Пути к бинарному кэшу текстового файла: (данные .npy, метаданные .json).
+    """
+    return source + '.cache.npy', source + '.cache.json'
+
+def convert_text_to_npy(source, chunk_rows=100000):
+    """
+    Конвертирует текстовый файл с числовыми столбцами в бинарный .npy кэш
+    рядом с исходным файлом. Файл разбирается кусками по chunk_rows строк,
+    поэтому весь текст не держится в памяти.
+    Возвращает путь к .npy файлу.
+    """
+    cache_path, meta_path = text_cache_paths(source)
+    key = file_identity(source)
+    raw_path = cache_path + '.raw'
+    
+    rows = 0
+    cols = None
+    with open(source) as f, open(raw_path, 'wb') as raw:
+        while True:
+            lines = list(itertools.islice(f, chunk_rows))
+            if not lines:
+                break
+            chunk = np.loadtxt(lines, ndmin=2)
+            if chunk.size == 0:
+                continue
+            if cols is None:
+                cols = chunk.shape[1]
+            elif chunk.shape[1] != cols:
+                raise ValueError(f"Разное количество столбцов в файле {source}: {cols} и {chunk.shape[1]}")
+            chunk.astype(np.float64).tofile(raw)
+            rows += len(chunk)
+    if cols is None:
+        os.remove(raw_path)
+        raise ValueError(f"В файле {source} нет данных")
+    
+    # Переносим сырые данные в .npy с заголовком, не загружая их целиком
+    tmp_path = cache_path + '.tmp'
+    raw_data = np.memmap(raw_path, dtype=np.float64, mode='r', shape=(rows, cols))
+    out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float64, shape=(rows, cols))
+    for i in range(0, rows, chunk_rows):
+        out[i:i + chunk_rows] = raw_data[i:i + chunk_rows]
+    out.flush()
+    del out, raw_data
+    os.remove(raw_path)
+    os.replace(tmp_path, cache_path)
+    
+    with open(meta_path, 'w') as f:
+        json.dump(dict(key, shape=[rows, cols]), f)
+    return cache_path
+
+def load_text_cached(source, start=None, stop=None, step=None, chunk_rows=100000):
+    """
+    Аналог np.loadtxt(source)[start:stop:step] через бинарный кэш.
+    Кэш действителен, пока совпадают размер и время изменения исходного файла,
+    иначе он пересоздаётся. Возвращается отображение в память (memmap)
+    только запрошенного среза, без чтения всего файла.
+    """
+    cache_path, meta_path = text_cache_paths(source)
+    valid = False
+    if os.path.exists(cache_path) and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        key = file_identity(source)
+        valid = meta.get('size') == key['size'] and meta.get('mtime_ns') == key['mtime_ns']
+    if not valid:
+        convert_text_to_npy(source, chunk_rows)
+    data = np.load(cache_path, mmap_mode='r')
+    return data[start:stop:step]
+
 def poisson_intervals_array(N, lambda_param, seed=None):
     if seed is not None:
         np.random.seed(seed)
@@ -1,6 +1,8 @@
 import queue
-from neuron import Neuron
-from network import Network
+from .neuron import Neuron
+from .network import Network
+from .data_io import load_text_cached
+from .encoders import poisson_intervals_matrix
 import numpy as np
 
 
@@ -19,7 +21,10 @@ class InputConstantData:
         self.time_size = None
     
     def import_data_from_file(self, sourse, param):
-        data_raw = np.loadtxt(self.source)[param['start']:param['stop']:param['step']]    
+        if param.get('use_cache', False):
+            data_raw = load_text_cached(sourse, param['start'], param['stop'], param['step'])
+        else:
+            data_raw = np.loadtxt(sourse)[param['start']:param['stop']:param['step']]    
         
         for neuron_name, current_column in param['current_column']:
             self.current[neuron_name] = param['signal_scaler'] * data_raw[:, current_column]
@@ -39,12 +44,25 @@ class InputConstantData:
         n_size = self.neuron_size[neuron_name]
         self.current[neuron_name] = np.full((t_size, n_size), current)
     
-    def generate_current_poisson_intervals(self, neuron_name, tay):
+    def generate_current_poisson_intervals(self, neuron_name, tay, seed=None, cache=None):
+        """
+        cache: InputCache для повторного использования сгенерированных токов,
+               используется только при заданном seed; токи из кэша -
+               memmap только для чтения (Network.step копирует входы)
+        """
         lb = tay / self.dt
         t_size = self.time_size
         n_size = self.neuron_size[neuron_name]
-        self.current[neuron_name] = np.array([self.poisson_intervals_array(t_size, lb)
-                                              for n in range(n_size)]).T
+
+        def factory():
+            return poisson_intervals_matrix(t_size, np.full(n_size, lb), seed)
+
+        if cache is not None and seed is not None:
+            params = {'kind': 'poisson_intervals', 'lambda': lb,
+                      'time_size': t_size, 'neuron_size': n_size, 'seed': seed}
+            self.current[neuron_name] = cache.get_or_create(params, factory)
+        else:
+            self.current[neuron_name] = factory()
     
     def poisson_intervals_array(self, N, lambda_param, seed=None):
         if seed is not None:
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+def poisson_intervals_matrix(T: int, lambdas, seed=None) -> np.ndarray:
+    """
+    Векторный аналог poisson_intervals_array для нескольких нейронов.
+    Интервалы между спайками равны Poisson(lambda) + 1 шагов, первый спайк
+    не раньше шага 1. Возвращает массив (T, N) из 0. и 1.
+
+    lambdas: параметр распределения для каждого нейрона (N,)
+    """
+    rng = np.random.default_rng(seed)
+    lambdas = np.atleast_1d(np.asarray(lambdas, dtype=np.float64))
+    N = len(lambdas)
+    out = np.zeros((T, N))
+    cur = np.zeros(N, dtype=np.int64)
+    # Количество интервалов на раунд с запасом для самого частого нейрона
+    K = int(np.ceil(T / (lambdas.min() + 1) * 1.1)) + 16
+    K = max(1, min(K, T))
+    while np.any(cur < T):
+        positions = cur + np.cumsum(rng.poisson(lambdas, size=(K, N)) + 1, axis=0)
+        rows, cols = np.nonzero(positions < T)
+        out[positions[rows, cols], cols] = 1.
+        cur = positions[-1]
+    return out
+
+
+def dense_to_events(dense: np.ndarray):
+    """
+    Перевод плотного массива спайков (T, N) в список событий.
+    Возвращает (times, indices), упорядоченные по времени.
+    """
+    return np.nonzero(dense)
+
+
+def events_to_dense(times, indices, T: int, N: int) -> np.ndarray:
+    """Перевод списка событий (times, indices) в плотный массив (T, N)."""
+    dense = np.zeros((T, N), dtype=bool)
+    dense[times, indices] = True
+    return dense
+
+
+class PoissonEncoder:
+    """
+    Частотное кодирование: на каждом шаге нейрон спайкует
+    с вероятностью rate * dt. Все случайные числа берутся одним вызовом
+    генератора, поэтому блоки потока обрабатываются без циклов.
+    """
+    def __init__(self, dt: float, max_rate: float = None, seed=None):
+        """
+        dt: шаг времени
+        max_rate: ограничение частоты (None - без ограничения, но rate * dt <= 1)
+        """
+        self.dt = dt
+        self.max_rate = max_rate
+        self.rng = np.random.default_rng(seed)
+
+    def encode(self, rates: np.ndarray) -> np.ndarray:
+        """rates: частоты (T, N). Возвращает спайки (T, N) типа bool."""
+        rates = np.asarray(rates, dtype=np.float64)
+        if self.max_rate is not None:
+            rates = np.minimum(rates, self.max_rate)
+        return self.rng.random(rates.shape) < rates * self.dt
+
+
+class DeltaEncoder:
+    """
+    Кодирование изменений (send-on-delta): сигнал квантуется с шагом
+    threshold, и при переходе на уровень выше нейрон ON дает спайк,
+    на уровень ниже - нейрон OFF. Выход (T, 2N): сначала N нейронов ON,
+    затем N нейронов OFF. Переход через несколько уровней за один шаг
+    дает один спайк. Последний уровень хранится между блоками.
+    """
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.level = None
+
+    def reset(self):
+        self.level = None
+
+    def encode(self, signal: np.ndarray) -> np.ndarray:
+        signal = np.asarray(signal, dtype=np.float64)
+        if signal.ndim == 1:
+            signal = signal[:, np.newaxis]
+        levels = np.floor(signal / self.threshold)
+        if self.level is None:
+            self.level = levels[0]
+        diff = np.diff(levels, axis=0, prepend=self.level[np.newaxis])
+        self.level = levels[-1]
+        return np.hstack((diff > 0, diff < 0))
+
+
+class LatencyEncoder:
+    """
+    Латентное кодирование: в каждом окне из window шагов нейрон дает
+    не более одного спайка, тем раньше, чем больше значение.
+    Значения ниже x_min не кодируются, x_max и выше дают спайк
+    в первом шаге окна.
+    """
+    def __init__(self, window: int, x_min: float = 0., x_max: float = 1.):
+        self.window = window
+        self.x_min = x_min
+        self.x_max = x_max
+
+    def encode(self, values: np.ndarray) -> np.ndarray:
+        """
+        values: значения (M, N), по строке на окно.
+        Возвращает спайки (M * window, N) типа bool.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        M, N = values.shape
+        x = np.clip((values - self.x_min) / (self.x_max - self.x_min), 0., 1.)
+        delay = np.rint((1. - x) * (self.window - 1)).astype(np.int64)
+        out = np.zeros((M, self.window, N), dtype=bool)
+        m, n = np.nonzero(values > self.x_min)
+        out[m, delay[m, n], n] = True
+        return out.reshape(M * self.window, N)
+
+
+class PopulationEncoder:
+    """
+    Популяционное кодирование гауссовыми рецептивными полями:
+    каждый канал сигнала кодируется K нейронами с центрами centers.
+    Выход (T, C * K) - активности в [0, gain], их можно подавать как ток
+    или как частоты в PoissonEncoder.
+    """
+    def __init__(self, centers, width: float, gain: float = 1.):
+        self.centers = np.asarray(centers, dtype=np.float64)
+        self.width = width
+        self.gain = gain
+
+    def encode(self, signal: np.ndarray) -> np.ndarray:
+        signal = np.asarray(signal, dtype=np.float64)
+        if signal.ndim == 1:
+            signal = signal[:, np.newaxis]
+        z = (signal[:, :, np.newaxis] - self.centers) / self.width
+        return (self.gain * np.exp(-0.5 * z**2)).reshape(len(signal), -1)
@@ -0,0 +1,204 @@
+import numpy as np
+from .neuron import LIFNeuron
+from .synapse import Synapse
+from .network import Network
+
+
+class EventDrivenRunner:
+    """
+    Событийный прогон сети из LIF нейронов.
+
+    Между событиями (шагами с ненулевым внешним входом и спайками) динамика
+    LIF нейрона линейна: U *= a, I *= b, a = 1 - dt/Utay, b = 1 - dt/Itay.
+    Поэтому состояние через n "тихих" шагов считается в замкнутой форме:
+
+        U_n = a^n * U_0 + Sum_m D_m * g(a, b_m, n),
+        g(a, b, n) = (a^n - b^n) / (a - b)    (n * a^(n-1) при a = b),
+        I_n = b^n * I_0,
+
+    где D_m - вклад синапсов от пресинаптических нейронов с одинаковым b_m.
+    Шаг с пересечением порога предсказывается заранее, и сам этот шаг,
+    как и все шаги с внешним входом, считается обычным Network.step.
+    В моменты событий результат совпадает с тактовым расчетом с точностью
+    до ошибок округления.
+
+    Поддерживаются сети только из LIFNeuron и синапсов без обучения.
+    Мониторы не поддерживаются: пропущенные шаги не собираются,
+    спайки возвращаются методом run.
+    """
+
+    def __init__(self, net: Network, chunk_size: int = 1024):
+        """
+        net: сеть для расчета
+        chunk_size: количество шагов, по которым за раз ищется пересечение порога
+        """
+        for neuron in net.neurons.values():
+            if not isinstance(neuron, LIFNeuron):
+                raise ValueError(f"Слой {neuron.name} не является LIFNeuron")
+        for synapse in net.synapses.values():
+            if type(synapse).update_weight is not Synapse.update_weight:
+                raise ValueError(f"Синапс {synapse.name} с обучением не поддерживается")
+            if synapse.delay is not None:
+                raise ValueError(f"Синапс {synapse.name} с задержкой не поддерживается")
+        if net.intervals or net.synapse_intervals:
+            raise ValueError("Разные интервалы шагов слоев не поддерживаются событийным расчетом")
+        if net.monitors:
+            raise ValueError("Мониторы не поддерживаются событийным расчетом")
+        self.net = net
+        self.chunk_size = chunk_size
+
+        self.clocked_steps = 0
+        self.skipped_steps = 0
+
+    def run(self, dt, inputs):
+        """
+        Прогон сети по временным шагам.
+
+        Параметры:
+        dt - шаг времени
+        inputs - словарь {имя_слоя: np.array формы (num_steps, num_neurons)}
+
+        Возвращает:
+        spikes - словарь {имя_слоя: np.array формы (num_spikes, 2)}
+                 со строками [номер шага, номер нейрона]
+        """
+        num_steps = None
+        for inp in inputs.values():
+            if num_steps is None:
+                num_steps = inp.shape[0]
+            elif inp.shape[0] != num_steps:
+                raise ValueError("Все входы должны иметь одинаковое число временных шагов")
+
+        for neuron in self.net.neurons.values():
+            if np.any(dt >= neuron.utay) or np.any(dt > neuron.itay):
+                raise ValueError(f"Шаг dt должен быть меньше Utay и Itay слоя {neuron.name}")
+
+        # Шаги с внешним входом обязательно считаются тактово
+        active = np.zeros(num_steps, dtype=bool)
+        for inp in inputs.values():
+            active |= np.any(inp != 0, axis=1)
+        active_steps = np.flatnonzero(active)
+
+        events = {name: [] for name in self.net.neurons}
+        t = 0
+        while t < num_steps:
+            if not active[t]:
+                # Тихий участок до следующего шага с внешним входом
+                pos = np.searchsorted(active_steps, t)
+                end = active_steps[pos] if pos < len(active_steps) else num_steps
+                n = self._steps_without_spike(dt, end - t)
+                if n > 0:
+                    self._advance(dt, n)
+                    self.skipped_steps += n
+                    t += n
+                if t >= end:
+                    continue
+
+            inputs_t = {neuron: inputs[neuron][t] for neuron in inputs}
+            self.net.step(dt, inputs_t)
+            self.clocked_steps += 1
+            for name, neuron in self.net.neurons.items():
+                ind = np.flatnonzero(neuron.get_spike())
+                if len(ind):
+                    events[name].append(np.column_stack((np.full(len(ind), t), ind)))
+            t += 1
+
+        return {name: (np.vstack(ev) if ev else np.zeros((0, 2), dtype=int))
+                for name, ev in events.items()}
+
+    def _modes(self):
+        """
+        Входы слоев в тихом режиме: {имя_слоя: [(b, D), ...]},
+        вход на k-м тихом шаге равен Sum D * b^k.
+        """
+        modes = {name: {} for name in self.net.neurons}
+        for synapse in self.net.synapses.values():
+            I0 = synapse.pre.get_current()
+            if not np.any(I0):
+                continue
+            b = 1 - self._dt / synapse.pre.itay
+            post_modes = modes[synapse.post.name]
+            for b_val in np.unique(b):
+                mask = b == b_val
+                D = synapse.propagate(np.where(mask, I0, 0.))
+                if b_val in post_modes:
+                    post_modes[b_val] = post_modes[b_val] + D
+                else:
+                    post_modes[b_val] = D
+        return {name: list(m.items()) for name, m in modes.items()}
+
+    @staticmethod
+    def _g(a, b, n):
+        """Сумма Sum_{k<n} a^(n-1-k) * b^k в замкнутой форме."""
+        same = np.isclose(a, b, rtol=1e-12, atol=0.)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g = (a**n - b**n) / (a - b)
+        return np.where(same, n * a**(n - 1), g)
+
+    @staticmethod
+    def _g_peak(a, b):
+        """Верхняя граница max_{n>=1} g(a, b, n)."""
+        bound = 1. / (1. - a)
+        if b >= 1.:
+            return bound
+        same = np.isclose(a, b, rtol=1e-12, atol=0.)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.log(np.log(b) / np.log(a)) / np.log(a / b)
+            x = np.where(same, -1. / np.log(a), x)
+            x = np.maximum(x, 1.)
+            peak = np.where(same, x * a**(x - 1), (a**x - b**x) / (a - b))
+        peak = np.where(np.isfinite(peak), peak, bound)
+        return np.minimum(peak, bound)
+
+    def _steps_without_spike(self, dt, L):
+        """
+        Количество тихих шагов (не больше L), на которых гарантированно
+        нет спайков. Если спайк предсказан на шаге n, возвращается n - 1.
+        """
+        self._dt = dt
+        self._mode_cache = self._modes()
+        first = L + 1
+        for name, neuron in self.net.neurons.items():
+            a = 1 - dt / neuron.utay
+            U0 = neuron.get_potential()
+            modes = self._mode_cache[name]
+
+            # Грубая оценка сверху по всему интервалу
+            bound = np.maximum(a * U0, 0.)
+            for b, D in modes:
+                bound = bound + np.maximum(D, 0.) * self._g_peak(a, b)
+            susp = np.flatnonzero(bound >= neuron.uth)
+            if len(susp) == 0:
+                continue
+
+            # Точный расчет для подозрительных нейронов
+            a_s = a[susp]
+            U0_s = U0[susp]
+            uth_s = neuron.uth[susp]
+            limit = min(first - 1, L)
+            for n0 in range(1, limit + 1, self.chunk_size):
+                n = np.arange(n0, min(n0 + self.chunk_size, limit + 1))[:, np.newaxis]
+                U = a_s**n * U0_s
+                for b, D in modes:
+                    U += D[susp] * self._g(a_s, b, n)
+                crossed = np.flatnonzero(np.any(U >= uth_s, axis=1))
+                if len(crossed):
+                    first = min(first, n0 + crossed[0])
+                    break
+        return min(first - 1, L)
+
+    def _advance(self, dt, n):
+        """Переход на n тихих шагов вперед в замкнутой форме."""
+        modes = self._mode_cache
+        # Запись состояния видна читателям Network.share_state как шаг сети
+        self.net.begin_state_write()
+        for name, neuron in self.net.neurons.items():
+            a = 1 - dt / neuron.utay
+            b = 1 - dt / neuron.itay
+            U = a**n * neuron.U
+            for b_in, D in modes[name]:
+                U += D * self._g(a, b_in, n)
+            neuron.U[:] = U
+            neuron.I *= b**n
+            neuron.S[...] = False
+        self.net.end_state_write()
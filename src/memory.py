@@ -0,0 +1,63 @@
+import sys
+import numpy as np
+
+
+def _byte_extent(array: np.ndarray) -> tuple:
+    """Границы (начало, конец) участка памяти, который занимает массив."""
+    start = end = array.__array_interface__['data'][0]
+    if array.size == 0:
+        return start, start
+    for n, stride in zip(array.shape, array.strides):
+        if stride < 0:
+            start += (n - 1) * stride
+        else:
+            end += (n - 1) * stride
+    return start, end + array.itemsize
+
+
+def array_nbytes(values) -> int:
+    """
+    Суммарный размер numpy массивов среди values (рекурсивно по dict,
+    list и tuple). Вид на чужой массив считается по занятому им участку,
+    перекрывающиеся участки одного буфера считаются один раз.
+    """
+    extents = {}
+    stack = [values]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, np.ndarray):
+            base = value
+            while isinstance(base.base, np.ndarray):
+                base = base.base
+            extents.setdefault(id(base), []).append(_byte_extent(value))
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    total = 0
+    for parts in extents.values():
+        end = None
+        for start, stop in sorted(parts):
+            if end is not None and start < end:
+                start = end
+            if stop > start:
+                total += stop - start
+                end = stop if end is None else max(end, stop)
+    return total
+
+
+def point_nbytes(point) -> int:
+    """Размер одной точки данных монитора вместе с накладными расходами Python."""
+    if isinstance(point, np.ndarray):
+        return sys.getsizeof(point) + (0 if point.flags.owndata else point.nbytes)
+    if isinstance(point, list):
+        return sys.getsizeof(point) + sum(sys.getsizeof(v) for v in point)
+    return sys.getsizeof(point)
+
+
+def format_bytes(n: int) -> str:
+    for unit in ('Б', 'КБ', 'МБ', 'ГБ'):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} ТБ"
@@ -1,7 +1,79 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from neuron import Neuron
-from synapse import Synapse
+from .neuron import Neuron
+from .synapse import Synapse
+from .memory import point_nbytes
+
+# matplotlib импортируется при первом рисовании, чтобы ядро симуляции
+# загружалось без графического стека (например, в рабочих процессах)
+
+
+# Количество линий, начиная с которого легенда не рисуется
+MAX_LEGEND_LINES = 10
+
+
+def _pixel_width() -> int:
+    """Ширина текущих осей в пикселях."""
+    import matplotlib.pyplot as plt
+    return max(1, int(plt.gca().get_window_extent().width))
+
+
+def _minmax_decimate(times: np.ndarray, data: np.ndarray, n_bins: int):
+    """
+    Прореживание рядов data (T, K) до n_bins интервалов по времени
+    с сохранением минимума и максимума в каждом интервале, чтобы не терять
+    пики. Возвращает (times, data) длиной 2 * n_bins.
+    """
+    T = len(times)
+    if T <= 2 * n_bins:
+        return times, data
+    size = int(np.ceil(T / n_bins))
+    n_bins = int(np.ceil(T / size))
+    pad = n_bins * size - T
+    if pad:
+        data = np.concatenate((data, np.repeat(data[-1:], pad, axis=0)))
+    blocks = data.reshape(n_bins, size, -1)
+    out = np.empty((2 * n_bins, data.shape[1]), dtype=data.dtype)
+    out[0::2] = blocks.min(axis=1)
+    out[1::2] = blocks.max(axis=1)
+    t_out = np.repeat(times[::size], 2)
+    return t_out, out
+
+
+def _decimate_image(data: np.ndarray, width: int, reduce=np.mean) -> np.ndarray:
+    """Сжатие данных (T, N) по времени до width столбцов функцией reduce."""
+    T = len(data)
+    if T <= width:
+        return data
+    size = int(np.ceil(T / width))
+    width = int(np.ceil(T / size))
+    pad = width * size - T
+    if pad:
+        data = np.concatenate((data, np.repeat(data[-1:], pad, axis=0)))
+    return reduce(data.reshape(width, size, -1), axis=1)
+
+
+def _plot_traces(times: np.ndarray, data: np.ndarray, labels: list[str]):
+    """
+    Рисование рядов data (T, K) одной коллекцией линий после прореживания
+    до ширины осей. Легенда рисуется только для небольшого числа линий.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+    times, data = _minmax_decimate(times, data, _pixel_width())
+    n_lines = data.shape[1]
+    colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    colors = [colors[i % len(colors)] for i in range(n_lines)]
+    segments = np.empty((n_lines, len(times), 2))
+    segments[:, :, 0] = times
+    segments[:, :, 1] = data.T
+
+    ax = plt.gca()
+    ax.add_collection(LineCollection(segments, colors=colors))
+    ax.autoscale()
+    if n_lines <= MAX_LEGEND_LINES:
+        handles = [Line2D([], [], color=c, label=l) for c, l in zip(colors, labels)]
+        ax.legend(handles=handles)
 
 
 class Monitor():
@@ -44,23 +116,61 @@ class Monitor():
     def clear(self):
         self.data = {obj.name: [] for obj in self.objs}
 
+    def flush(self):
+        """Вывод накопленных данных в конце прогона (для мониторов с выводом)."""
+        pass
+        
+    def _point_size(self, obj) -> float:
+        """
+        Оценка размера одной точки данных объекта: среднее по последним
+        собранным точкам или размер текущего значения.
+        """
+        points = self.data[obj.name]
+        if points:
+            sample = points[-100:]
+            return sum(point_nbytes(p) for p in sample) / len(sample)
+        return point_nbytes(self._request_data_from_obj(obj).copy())
+    
+    def memory_usage(self) -> int:
+        """Оценка объема памяти собранных данных в байтах."""
+        total = 0
+        for obj in self.objs:
+            points = self.data[obj.name]
+            if points:
+                # 8 байт - указатель в списке
+                total += int(len(points) * (self._point_size(obj) + 8))
+        return total
+    
+    def projected_memory(self, num_steps: int) -> int:
+        """Оценка объема памяти данных после еще num_steps вызовов collect."""
+        new_points = ((self.counter + num_steps) // self.save_step
+                      - self.counter // self.save_step)
+        total = 0
+        for obj in self.objs:
+            points = len(self.data[obj.name]) + new_points
+            if self.max_points is not None:
+                points = min(points, self.max_points)
+            total += int(points * (self._point_size(obj) + 8))
+        return total
+
 
 class MonitorNeuron(Monitor):    
     def _plot_line(self, layer_name, dt, xlabel, ylabel, title):
+        import matplotlib.pyplot as plt
         data = np.array(self.get_data(layer_name))
         times = (self.counter - len(data) + np.arange(len(data))) * dt
 
-        for i in range(len(data[0])):
-            plt.plot(times, data[:, i], label=str(i))
+        _plot_traces(times, data, [str(i) for i in range(data.shape[1])])
         plt.xlabel(xlabel)
         plt.ylabel(ylabel)
         plt.title(title)
-        plt.legend()
             
     def _plot_imshow(self, layer_name, dt, xlabel, ylabel, title):
+        import matplotlib.pyplot as plt
         data = np.array(self.get_data(layer_name))
         times = (self.counter - len(data) + np.arange(len(data))) * dt
-        plt.imshow(data.T, extent=[times[0], times[-1], 0, data.shape[1]], 
+        image = _decimate_image(data, _pixel_width())
+        plt.imshow(image.T, extent=[times[0], times[-1], 0, data.shape[1]], 
                    aspect='auto', origin='lower', interpolation='none')
         plt.colorbar()
         plt.xlabel(xlabel)
@@ -98,24 +208,35 @@ class MonitorSpike(MonitorNeuron):
         outputs = neuron.get_spike()
         return [i for i, val in enumerate(outputs) if val]
 
-    def plot_scatter(self, layer_name, dt):
-        #TODO rewrite
+    def get_events(self, layer_name):
+        """Спайки слоя в виде массивов (номера точек, номера нейронов)."""
         data = self.get_data(layer_name)
+        counts = np.fromiter((len(spikes) for spikes in data), dtype=np.int64, count=len(data))
+        steps = np.repeat(np.arange(len(data)), counts)
+        indices = np.fromiter((i for spikes in data for i in spikes),
+                              dtype=np.int64, count=int(counts.sum()))
+        return steps, indices
+
+    def plot_scatter(self, layer_name, dt):
+        """
+        Растр спайков слоя. Небольшое число спайков рисуется одним scatter,
+        большое - изображением с числом спайков в пикселе.
+        """
+        import matplotlib.pyplot as plt
+        steps, indices = self.get_events(layer_name)
+        times = steps * dt
         
-        N = 0
-        for spikes in data:
-            for spike in spikes:
-                if spike > N:
-                    N = 1 * spike
-
-        data_np = [np.ones((0,2)) for i in range(N+1)]
-        for t, spikes in enumerate(data):
-            for spike in spikes:
-                data_np[spike] = np.vstack((data_np[spike], np.array([[t*dt, spike]])))
-                
         plt.figure()
-        for data_one in data_np:
-            plt.scatter(data_one[:,0], data_one[:,1])
+        width = _pixel_width()
+        if len(indices) <= 10 * width:
+            plt.scatter(times, indices, c=indices, s=4, cmap='tab10')
+        else:
+            n_steps = len(self.get_data(layer_name))
+            N = int(indices.max()) + 1
+            image, _, _ = np.histogram2d(indices, steps, bins=(N, min(width, n_steps)),
+                                         range=((0, N), (0, n_steps)))
+            plt.imshow(image, extent=[0, n_steps * dt, 0, N], aspect='auto',
+                       origin='lower', interpolation='none', cmap='Greys')
             
         plt.xlabel('Время (мс)')
         plt.ylabel('Нейроны')
@@ -123,11 +244,222 @@ class MonitorSpike(MonitorNeuron):
         plt.show()
         
 
+def save_packed_spikes(path, packed: dict, sizes: dict):
+    """
+    Сохранение упакованных спайков в бинарный файл .npz.
+    packed: {имя_слоя: np.uint8 массив (steps, ceil(N/8))}
+    sizes: {имя_слоя: N}
+    """
+    arrays = {}
+    for name, arr in packed.items():
+        arrays[f"packed/{name}"] = arr
+        arrays[f"size/{name}"] = np.array(sizes[name])
+    np.savez(path, **arrays)
+
+
+def load_packed_spikes(path):
+    """
+    Загрузка упакованных спайков из файла save_packed_spikes.
+    Возвращает (packed, sizes) в том же формате.
+    """
+    packed = {}
+    sizes = {}
+    with np.load(path) as f:
+        for key in f.files:
+            kind, name = key.split('/', 1)
+            if kind == 'packed':
+                packed[name] = f[key]
+            else:
+                sizes[name] = int(f[key])
+    return packed, sizes
+
+
+def unpack_spikes(packed: np.ndarray, N: int, start: int = 0, stop: int = None) -> np.ndarray:
+    """Распаковка окна шагов [start, stop) в булев массив (steps, N)."""
+    return np.unpackbits(packed[start:stop], axis=1, count=N).view(bool)
+
+
+class MonitorSpikePacked(MonitorSpike):
+    """
+    Монитор спайков с битовой упаковкой: состояние S каждого шага
+    хранится через np.packbits в заранее выделенном буфере
+    (шаги, ceil(N/8)) типа uint8 - в 8 раз меньше bool и намного
+    меньше списков номеров. Без max_points буфер растет удвоением,
+    с max_points работает как кольцевой.
+    """
+    def __init__(self, name: str, objs, save_step: int = 1, max_points: int = None,
+                 capacity: int = 1024):
+        """
+        capacity: начальное количество шагов в буфере
+        """
+        super().__init__(name, objs, save_step, max_points)
+        self.initial_capacity = max_points if max_points is not None else capacity
+        self.clear()
+
+    def _request_data_from_obj(self, neuron: Neuron) -> np.ndarray:
+        return neuron.get_spike()
+
+    def clear(self):
+        self.sizes = {obj.name: obj.N for obj in self.objs}
+        self.capacity = self.initial_capacity
+        self.buffers = {obj.name: np.zeros((self.capacity, (obj.N + 7) // 8), dtype=np.uint8)
+                        for obj in self.objs}
+        self.length = 0
+        self.head = 0
+
+    def collect(self):
+        self.counter += 1
+        if self.counter % self.save_step != 0:
+            return
+        if self.max_points is None and self.head == self.capacity:
+            for name, buf in self.buffers.items():
+                self.buffers[name] = np.concatenate((buf, np.zeros_like(buf)))
+            self.capacity *= 2
+        for obj in self.objs:
+            self.buffers[obj.name][self.head] = np.packbits(self._request_data_from_obj(obj))
+        self.head += 1
+        if self.max_points is not None:
+            self.head %= self.max_points
+            self.length = min(self.length + 1, self.max_points)
+        else:
+            self.length += 1
+
+    def get_packed(self, obj_name) -> np.ndarray:
+        """Упакованные спайки (steps, ceil(N/8)) в порядке времени."""
+        if obj_name not in self.buffers:
+            raise ValueError(f"Данные для {obj_name} не собраны")
+        buf = self.buffers[obj_name]
+        if self.max_points is None or self.length < self.max_points:
+            return buf[:self.length]
+        return np.concatenate((buf[self.head:], buf[:self.head]))
+
+    def get_window(self, obj_name, start: int = 0, stop: int = None) -> np.ndarray:
+        """Булев массив спайков (steps, N) для точек [start, stop)."""
+        return unpack_spikes(self.get_packed(obj_name), self.sizes[obj_name], start, stop)
+
+    def get_events(self, layer_name):
+        return np.nonzero(self.get_window(layer_name))
+
+    def get_data(self, obj_name) -> list:
+        """Номера спайкующих нейронов по точкам, как в MonitorSpike."""
+        if self.length == 0:
+            return []
+        steps, indices = self.get_events(obj_name)
+        return np.split(indices, np.searchsorted(steps, np.arange(1, self.length)))
+
+    def memory_usage(self) -> int:
+        return sum(buf.nbytes for buf in self.buffers.values())
+
+    def projected_memory(self, num_steps: int) -> int:
+        new_points = ((self.counter + num_steps) // self.save_step
+                      - self.counter // self.save_step)
+        points = self.length + new_points
+        capacity = self.capacity
+        if self.max_points is None:
+            # Буфер растет удвоением
+            while capacity < points:
+                capacity *= 2
+        return sum(capacity * buf.shape[1] for buf in self.buffers.values())
+
+    def save(self, path):
+        """Сохранение собранных спайков в бинарный файл."""
+        save_packed_spikes(path, {name: self.get_packed(name) for name in self.buffers},
+                           self.sizes)
+
+
+class MonitorRate(Monitor):
+    """
+    Текущая частота спайков слоев для управления в реальном времени.
+    Память и время шага O(N) и не зависят от длительности прогона.
+
+    mode='window' - число спайков за последние window шагов, хранится
+                    кольцевой буфер спайков (window, N) и счетчики (N);
+    mode='exp'    - экспоненциальный фильтр с постоянной времени tay:
+                    rate *= (1 - dt / tay); rate += S / tay.
+    """
+    def __init__(self, name: str, objs, dt: float, window: int = 100,
+                 mode: str = 'window', tay: float = None):
+        """
+        dt: шаг времени сети
+        window: длина окна в шагах (mode='window')
+        tay: постоянная времени фильтра (mode='exp'), по умолчанию window * dt
+        """
+        super().__init__(name, objs)
+        if mode not in ('window', 'exp'):
+            raise ValueError(f"Неизвестный режим оценки частоты {mode}")
+        if window < 1:
+            raise ValueError(f"Длина окна должна быть >= 1, задано {window}")
+        self.dt = dt
+        self.window = window
+        self.mode = mode
+        self.tay = window * dt if tay is None else tay
+        self.clear()
+
+    def _request_data_from_obj(self, neuron: Neuron) -> np.ndarray:
+        return neuron.get_spike()
+
+    def clear(self):
+        self.head = 0
+        self.length = 0
+        self.rates = {obj.name: np.zeros(obj.N) for obj in self.objs}
+        if self.mode == 'window':
+            self.history = {obj.name: np.zeros((self.window, obj.N), dtype=bool)
+                            for obj in self.objs}
+            self.counts = {obj.name: np.zeros(obj.N, dtype=np.int64) for obj in self.objs}
+
+    def collect(self):
+        self.counter += 1
+        if self.mode == 'exp':
+            decay = 1 - self.dt / self.tay
+            for obj in self.objs:
+                rate = self.rates[obj.name]
+                rate *= decay
+                rate += self._request_data_from_obj(obj) / self.tay
+            return
+
+        self.length = min(self.length + 1, self.window)
+        scale = 1. / (self.length * self.dt)
+        for obj in self.objs:
+            spikes = self._request_data_from_obj(obj)
+            slot = self.history[obj.name][self.head]
+            counts = self.counts[obj.name]
+            counts -= slot
+            counts += spikes
+            slot[...] = spikes
+            np.multiply(counts, scale, out=self.rates[obj.name])
+        self.head = (self.head + 1) % self.window
+
+    def get_rate(self, obj_name) -> np.ndarray:
+        """
+        Частоты спайков слоя (N,) без копирования: массив обновляется
+        на месте при каждом collect и доступен только для чтения.
+        """
+        if obj_name not in self.rates:
+            raise ValueError(f"Данные для {obj_name} не собраны")
+        rate = self.rates[obj_name].view()
+        rate.flags.writeable = False
+        return rate
+
+    def get_data(self, obj_name) -> np.ndarray:
+        return self.get_rate(obj_name)
+
+    def memory_usage(self) -> int:
+        total = sum(rate.nbytes for rate in self.rates.values())
+        if self.mode == 'window':
+            total += sum(h.nbytes for h in self.history.values())
+            total += sum(c.nbytes for c in self.counts.values())
+        return total
+
+    def projected_memory(self, num_steps: int) -> int:
+        return self.memory_usage()
+
+
 class MonitorWeigts(Monitor):
     def _request_data_from_obj(self, synapse: Synapse) -> np.ndarray:
         return synapse.get_weight()
     
     def plot_imshow(self, connection_name, dt):
+        import matplotlib.pyplot as plt
         data = np.array(self.get_data(connection_name))
         arr = np.array(data)
         if arr.ndim == 3:
@@ -145,14 +477,31 @@ class MonitorWeigts(Monitor):
         plt.show()
         
     def plot_line(self, connection_name, dt):
+        import matplotlib.pyplot as plt
         data = np.array(self.get_data(connection_name))
         times = (self.counter - len(data) + np.arange(len(data))) * dt
-        for post in range(len(data[0])):
-            for pre in range(len(data[0, 0])):
-                plt.plot(times, data[:, post, pre], label=f"{pre} to {post}")
+        n_post, n_pre = data.shape[1:]
+        labels = [f"{pre} to {post}" for post in range(n_post) for pre in range(n_pre)]
+        _plot_traces(times, data.reshape(len(data), -1), labels)
         
-        plt.xlabel('Времяб (мс)')
+        plt.xlabel('Время (мс)')
         plt.ylabel('Веса')
-        plt.legend()
+        plt.title(f"Веса соединения {connection_name}\nПоследние {len(data)} шагов (dt={dt})")
+        plt.show()
+
+    def plot_evolution(self, connection_name, dt):
+        """
+        Изменение всех весов во времени одним изображением: строка - связь
+        (post * n_pre + pre), столбец - интервал времени шириной в пиксель.
+        """
+        import matplotlib.pyplot as plt
+        data = np.array(self.get_data(connection_name))
+        times = (self.counter - len(data) + np.arange(len(data))) * dt
+        image = _decimate_image(data.reshape(len(data), -1), _pixel_width())
+        plt.imshow(image.T, extent=[times[0], times[-1], 0, image.shape[1]],
+                   aspect='auto', origin='lower', interpolation='none', cmap='viridis')
+        plt.colorbar()
+        plt.xlabel('Время (мс)')
+        plt.ylabel('Связь (post * n_pre + pre)')
         plt.title(f"Веса соединения {connection_name}\nПоследние {len(data)} шагов (dt={dt})")
         plt.show()
\ No newline at end of file
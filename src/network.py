@@ -1,13 +1,27 @@
+from multiprocessing import shared_memory
 import numpy as np
-from neuron import Neuron
-from synapse import Synapse
-from monitor import Monitor
+from .neuron import Neuron, LIFNeuron, LIFPopulation
+from .synapse import Synapse
+from .monitor import Monitor
+from .shared import (create_shared_array, acquire_segment, release_segment,
+                     state_segment_layout, state_segment_views)
 
 class Network:
     def __init__(self):
         self.neurons = {}    # словарь: имя слоя -> neuron
         self.synapses = {}   # словарь: имя соединения -> synapse
         self.monitors = {}
+        self.shared_segments = []  # сегменты общей памяти с весами
+        self.populations = []       # объединенные слои (fuse_neurons)
+        self.population_of = {}     # имя слоя -> популяция
+        self.intervals = {}         # имя слоя -> шаг в тактах (по умолчанию 1)
+        self.synapse_intervals = {} # имя соединения -> шаг обучения в тактах
+        self.accumulated = {}       # имя слоя -> вход, накопленный между шагами
+        self.tick = 0               # номер такта
+        self.interval_dt = None     # dt, для которого проверены интервалы слоев
+        self.state_shm = None       # сегмент состояния (share_state)
+        self.state_layout = None    # описание сегмента для StateReader
+        self.state_version = None   # счетчик версии в начале сегмента
 
 
     """Операции с нейронами"""
@@ -15,25 +29,114 @@ class Network:
         if neuron.name in self.neurons:
             raise ValueError(f"Нейрон с именем {neuron.name} уже существует")
         self.neurons[neuron.name] = neuron
+        self.unfuse_neurons()
         
     def add_neurons(self, neurons: list[Neuron]):
         for neuron in neurons:
             self.add_neuron(neuron)
             
     def remove_neurons(self, neuron_names: list[str] = None):
+        self.unfuse_neurons()
         if neuron_names is None:
             self.neurons.clear()
+            self.intervals.clear()
+            self.accumulated.clear()
         else:
             for name in neuron_names:
                 del self.neurons[name]
+                self.intervals.pop(name, None)
+                self.accumulated.pop(name, None)
     
     def reset_neurons(self, neuron_names: list[str] = None):
+        self.begin_state_write()
         if neuron_names is None:
             for neuron in self.neurons.values():
                 neuron.reset()
+            self.tick = 0
+            for buf in self.accumulated.values():
+                buf[...] = 0.
+            for population in self.populations:
+                population.Iin[...] = 0.
         else:
             for name in neuron_names:
-                neuron[name].reset()
+                self.neurons[name].reset()
+        # Сигналы сброшенных слоев, находящиеся в пути (задержки синапсов)
+        for synapse in self.synapses.values():
+            if neuron_names is None or synapse.pre.name in neuron_names:
+                synapse.clear_delay()
+        self.end_state_write()
+    
+    def set_interval(self, neuron_name: str, interval: int):
+        """
+        Шаг слоя раз в interval тактов с шагом времени interval * dt.
+        Между шагами вход слоя (внешний и от синапсов) суммируется и
+        подается целиком на шаге, выход I удерживается (нулевой порядок),
+        а спайки S на тактах без шага сбрасываются, чтобы не учитываться
+        повторно. Медленные слои (большие Utay, Itay) можно считать реже
+        без огрубления быстрых.
+        Шаг слоя interval * dt должен быть меньше его Utay и Itay,
+        иначе множители 1 - interval * dt / tay отрицательны; это
+        проверяется в step, где известен dt.
+        Объединение слоев (fuse_neurons) при этом снимается.
+        """
+        if neuron_name not in self.neurons:
+            raise ValueError(f"Слоя {neuron_name} нет в сети")
+        if int(interval) != interval or interval < 1:
+            raise ValueError(f"Интервал должен быть целым >= 1, задано {interval}")
+        for synapse_name, k in self.synapse_intervals.items():
+            synapse = self.synapses[synapse_name]
+            if neuron_name in (synapse.pre.name, synapse.post.name):
+                self._check_synapse_interval(synapse_name, k, neuron_name, interval)
+        self.unfuse_neurons()
+        self.interval_dt = None
+        interval = int(interval)
+        if interval == 1:
+            self.intervals.pop(neuron_name, None)
+            self.accumulated.pop(neuron_name, None)
+        else:
+            self.intervals[neuron_name] = interval
+            self.accumulated[neuron_name] = np.zeros(self.neurons[neuron_name].N)
+    
+    def set_intervals(self, intervals: dict):
+        for neuron_name, interval in intervals.items():
+            self.set_interval(neuron_name, interval)
+        
+    def fuse_neurons(self):
+        """
+        Объединение всех слоев LIFNeuron в одну популяцию с общими
+        массивами состояния, чтобы шаг сети делал один векторный шаг
+        вместо шага каждого слоя.
+        Слои с разными интервалами (set_interval) попадают в разные популяции.
+        """
+        if self.state_shm is not None:
+            raise ValueError("Объединение слоев недоступно при состоянии в общей памяти (share_state)")
+        self.unfuse_neurons()
+        groups = {}
+        for neuron in self.neurons.values():
+            if type(neuron) is LIFNeuron:
+                groups.setdefault(self.intervals.get(neuron.name, 1), []).append(neuron)
+        for interval, layers in groups.items():
+            if len(layers) < 2:
+                continue
+            population = LIFPopulation(layers, interval)
+            self.populations.append(population)
+            for layer in layers:
+                self.population_of[layer.name] = population
+                # Накопленный вход переносится в буфер популяции
+                if layer.name in self.accumulated:
+                    population.Iin[population.slices[layer.name]] = self.accumulated.pop(layer.name)
+    
+    def unfuse_neurons(self):
+        """
+        Отказ от объединения слоев. Слои сохраняют виды на массивы
+        популяции, они остаются корректными.
+        """
+        for population in self.populations:
+            for name, sl in population.slices.items():
+                if name in self.intervals:
+                    self.accumulated[name] = population.Iin[sl].copy()
+        self.populations = []
+        self.population_of = {}
         
     """Операции с синасами"""
     def add_synapse(self, synapse: Synapse):
@@ -51,9 +154,36 @@ class Network:
     def remove_synapses(self, synapse_names: list[str] = None):
         if synapse_names is None:
             self.synapses.clear()
+            self.synapse_intervals.clear()
         else:
             for name in synapse_names:
                 del self.synapses[name]
+                self.synapse_intervals.pop(name, None)
+    
+    def set_synapse_interval(self, synapse_name: str, interval: int):
+        """
+        Обучение соединения раз в interval тактов с шагом interval * dt.
+        Правило обучения видит спайки только тактов обновления, поэтому
+        интервалы слоев pre и post должны быть кратны интервалу обучения:
+        тогда каждый такт шага слоя (и его спайков) попадает на обновление.
+        """
+        if synapse_name not in self.synapses:
+            raise ValueError(f"Соединения {synapse_name} нет в сети")
+        if int(interval) != interval or interval < 1:
+            raise ValueError(f"Интервал должен быть целым >= 1, задано {interval}")
+        synapse = self.synapses[synapse_name]
+        for layer in (synapse.pre, synapse.post):
+            self._check_synapse_interval(synapse_name, interval, layer.name,
+                                         self.intervals.get(layer.name, 1))
+        if interval == 1:
+            self.synapse_intervals.pop(synapse_name, None)
+        else:
+            self.synapse_intervals[synapse_name] = int(interval)
+    
+    def _check_synapse_interval(self, synapse_name, interval, neuron_name, neuron_interval):
+        if neuron_interval % interval != 0:
+            raise ValueError(f"Интервал слоя {neuron_name} ({neuron_interval}) должен быть кратен "
+                             f"интервалу обучения {synapse_name} ({interval})")
     
     """Операции с мониторами"""
     def add_monitor(self, monitor: Monitor):
@@ -84,14 +214,34 @@ class Network:
     """Расчетная часть"""
     def step(self, dt, I_external):
         """
-        Шаг времени dt.
+        Шаг времени dt (один такт).
         I_external - словарь {имя_слоя: входные внешние токи (numpy массив)}
+        Слои с интервалом k (set_interval) делают шаг k * dt на последнем
+        такте каждого интервала, до этого их вход накапливается.
         """
+        if self.intervals and dt != self.interval_dt:
+            self._check_intervals(dt)
+        self.begin_state_write()
+        tick = self.tick
         # Инициализируем входы нейронов каждого слоя внешними токами
         I_in = {}
         for neuron_name, neuron in self.neurons.items():
-            # Создаем копии внешних токов, чтобы их модифицировать дальше
-            I_in[neuron_name] = np.array(I_external.get(neuron_name, np.zeros(neuron.N)))
+            population = self.population_of.get(neuron_name)
+            if population is not None:
+                # Вход объединенного слоя - участок общего буфера популяции
+                buf = population.Iin[population.slices[neuron_name]]
+            elif neuron_name in self.accumulated:
+                buf = self.accumulated[neuron_name]
+            else:
+                # Создаем копии внешних токов, чтобы их модифицировать дальше
+                I_in[neuron_name] = np.array(I_external.get(neuron_name, np.zeros(neuron.N)))
+                continue
+            # Буфер накапливает вход с начала интервала слоя
+            if tick % self.intervals.get(neuron_name, 1) == 0:
+                buf[...] = I_external.get(neuron_name, 0.)
+            else:
+                buf += I_external.get(neuron_name, 0.)
+            I_in[neuron_name] = buf
         
         # Добавляем входы от соединений
         for synapse in self.synapses.values():
@@ -100,40 +250,290 @@ class Network:
             # Прогоняем их через веса соединения
             I_in_post = synapse.propagate(I_out_pre)
             # Складываем с текущими входными токами целевого слоя
-            print(I_in[synapse.post.name])
-            print(I_in_post)
             I_in[synapse.post.name] += I_in_post
     
         # Делаем шаг для каждого слоя с суммарным входом
+        for population in self.populations:
+            k = population.interval
+            if tick % k == k - 1:
+                population.step(k * dt, population.Iin)
+            else:
+                population.S[...] = False
         for neuron_name, neuron in self.neurons.items():
-            neuron.step(dt, I_in[neuron_name])
+            if neuron_name not in self.population_of:
+                k = self.intervals.get(neuron_name, 1)
+                if tick % k == k - 1:
+                    neuron.step(k * dt, I_in[neuron_name])
+                else:
+                    neuron.S[...] = False
     
         # Производим обучение для всех соединений
-        for synapse in self.synapses.values():
-            synapse.update_weight(dt)
+        for synapse_name, synapse in self.synapses.items():
+            k = self.synapse_intervals.get(synapse_name, 1)
+            if tick % k == k - 1:
+                synapse.update_weight(k * dt)
+        self.tick += 1
+        self.end_state_write()
                 
         # Сбор данных мониторами
         for monitor in self.monitors.values():
             monitor.collect()
 
-    def run(self, dt, inputs):
+    def _check_intervals(self, dt):
+        for name, k in self.intervals.items():
+            neuron = self.neurons[name]
+            for key in ('utay', 'itay'):
+                tay = getattr(neuron, key, None)
+                if tay is not None and np.any(k * dt >= tay):
+                    raise ValueError(f"Шаг слоя {name} {k} * dt = {k * dt} должен быть меньше {key.capitalize()}")
+        self.interval_dt = dt
+
+    def run(self, dt, inputs, memory_budget=None, on_budget='raise'):
         """
         Прогон всей сети по временным шагам.
     
         Параметры:
         dt - шаг времени
         inputs - словарь {имя_слоя: np.array формы (num_steps, num_neurons)}
+        memory_budget - ограничение памяти сети в байтах (None - без ограничения)
+        on_budget - действие при превышении прогноза памяти:
+                    'raise' - отказ с MemoryError,
+                    'decimate' - увеличение save_step мониторов на время прогона
+                    (после прогона прежние save_step восстанавливаются)
     
         Возвращает:
         outputs - словарь {имя_слоя: np.array выхода формы (num_steps, num_neurons)}
         """
+        if on_budget not in ('raise', 'decimate'):
+            raise ValueError(f"Неизвестное действие при превышении памяти {on_budget}")
         num_steps = None
         for inp in inputs.values():
             if num_steps is None:
                 num_steps = inp.shape[0]
             elif inp.shape[0] != num_steps:
                 raise ValueError("Все входы должны иметь одинаковое число временных шагов")
+        
+        save_steps = {}
+        if memory_budget is not None:
+            save_steps = self._check_memory_budget(num_steps, memory_budget, on_budget)
+    
+        try:
+            for t in range(num_steps):
+                inputs_t = {neuron: inputs[neuron][t] for neuron in inputs}
+                self.step(dt, inputs_t)
+        finally:
+            for name, save_step in save_steps.items():
+                self.monitors[name].save_step = save_step
+        
+        # Применяем отложенные изменения весов
+        for synapse in self.synapses.values():
+            synapse.flush_weight()
+        # Отправляем неполные блоки мониторов с выводом (OutputSink)
+        for monitor in self.monitors.values():
+            monitor.flush()
+
+    """Учет памяти"""
+    def memory_report(self, num_steps: int = 0) -> dict:
+        """
+        Разбивка памяти сети в байтах по слоям, синапсам и мониторам.
+        Для мониторов дополнительно дается прогноз после num_steps шагов.
+        Слои популяций (fuse_neurons) учитывают свои участки общих
+        массивов, 'populations' - остальную память популяций.
+        """
+        report = {
+            'neurons': {name: n.memory_usage() for name, n in self.neurons.items()},
+            'populations': [p.memory_usage() for p in self.populations],
+            'synapses': {name: s.memory_usage() for name, s in self.synapses.items()},
+            'monitors': {name: m.memory_usage() for name, m in self.monitors.items()},
+            'monitors_projected': {name: m.projected_memory(num_steps)
+                                   for name, m in self.monitors.items()},
+        }
+        static = (sum(report['neurons'].values()) + sum(report['populations'])
+                  + sum(report['synapses'].values()))
+        report['total'] = static + sum(report['monitors'].values())
+        report['projected_total'] = static + sum(report['monitors_projected'].values())
+        return report
     
-        for t in range(num_steps):
-            inputs_t = {neuron: inputs[neuron][t] for neuron in inputs}
-            self.step(dt, inputs_t)
+    def _check_memory_budget(self, num_steps, memory_budget, on_budget):
+        """
+        Проверка прогноза памяти. Возвращает прежние save_step мониторов,
+        увеличенных для 'decimate' ({имя монитора: save_step}).
+        """
+        report = self.memory_report(num_steps)
+        if report['projected_total'] <= memory_budget:
+            return {}
+        if on_budget == 'decimate':
+            current = sum(report['monitors'].values())
+            growth = sum(report['monitors_projected'].values()) - current
+            available = memory_budget - (report['projected_total'] - growth)
+            if available > 0:
+                factor = int(np.ceil(growth / available))
+                save_steps = {name: m.save_step for name, m in self.monitors.items()}
+                for monitor in self.monitors.values():
+                    monitor.save_step *= factor
+                report = self.memory_report(num_steps)
+                if report['projected_total'] <= memory_budget:
+                    return save_steps
+                for name, save_step in save_steps.items():
+                    self.monitors[name].save_step = save_step
+        raise MemoryError(f"Прогноз памяти {report['projected_total']} байт "
+                          f"превышает ограничение {memory_budget} байт")
+
+    """Копии сети"""
+    def fork(self, shared: bool = False):
+        """
+        Копия сети для прогонов из одного состояния.
+        Веса синапсов общие и доступны только для чтения, копируются
+        только состояния слоев (U/I/S/V) и следы синапсов. Синапс,
+        веса которого меняет обучение, копирует их при первой записи.
+        Мониторы в копию не переносятся.
+
+        shared: перенести веса в общую память, чтобы копию можно было
+                передать в другой процесс без копирования весов
+        Недоступно при состоянии в общей памяти (share_state): общие
+        с копией веса стали бы доступны только для чтения, и обучение
+        перенесло бы их из сегмента состояния.
+        """
+        if self.state_shm is not None:
+            raise ValueError("Копия сети недоступна при состоянии в общей памяти (share_state)")
+        if shared:
+            self.share_weights()
+        net = Network()
+        for name, neuron in self.neurons.items():
+            net.neurons[name] = neuron.fork()
+        for name, synapse in self.synapses.items():
+            net.synapses[name] = synapse.fork(net.neurons[synapse.pre.name],
+                                              net.neurons[synapse.post.name])
+        # Копия тоже владеет сегментами весов, они живут до ее release_shared
+        net.shared_segments = list(self.shared_segments)
+        for shm in net.shared_segments:
+            acquire_segment(shm)
+        net.intervals = dict(self.intervals)
+        net.synapse_intervals = dict(self.synapse_intervals)
+        net.tick = self.tick
+        for name in self.intervals:
+            population = self.population_of.get(name)
+            if population is None:
+                net.accumulated[name] = self.accumulated[name].copy()
+            else:
+                net.accumulated[name] = population.Iin[population.slices[name]].copy()
+        return net
+    
+    def share_weights(self):
+        """Перенос весов синапсов в сегменты общей памяти."""
+        for synapse in self.synapses.values():
+            if synapse.weight_shm is None:
+                weight, shm = create_shared_array(synapse.weight)
+                weight.flags.writeable = False
+                synapse.weight = weight
+                synapse.weight_shm = shm
+                acquire_segment(shm)
+                self.shared_segments.append(shm)
+    
+    def release_shared(self):
+        """
+        Освобождение сегментов общей памяти. Веса синапсов сети
+        переносятся обратно в обычную память. Сегмент удаляется, когда
+        его освободят все копии сети (fork), которые им пользуются.
+        """
+        for synapse in self.synapses.values():
+            if synapse.weight_shm in self.shared_segments:
+                synapse.weight = np.array(synapse.weight)
+                synapse.weight_shm = None
+        for shm in self.shared_segments:
+            release_segment(shm)
+        self.shared_segments = []
+
+    """Состояние в общей памяти"""
+    def share_state(self) -> dict:
+        """
+        Перенос состояния слоев (U/I/S/V) и весов синапсов в один сегмент
+        общей памяти, чтобы другие процессы (визуализация, запись логов)
+        читали живое состояние без копирования через StateReader.
+        Массивы слоев и синапсов становятся видами на сегмент и дальше
+        меняются на месте. В начале сегмента лежит счетчик версии:
+        step и reset_neurons делают его нечетным на время записи.
+        Объединение слоев (fuse_neurons) и копии сети (fork) недоступны
+        до release_state. Возвращает описание сегмента (state_layout),
+        его можно передать в другой процесс (pickle, json).
+        Слои и синапсы, добавленные позже, в сегмент не попадают;
+        новые веса reset_weight тоже остаются в обычной памяти.
+        """
+        if self.state_shm is not None:
+            return self.state_layout
+        self.unfuse_neurons()
+        arrays = {}
+        for name, neuron in self.neurons.items():
+            for key in neuron.state_keys:
+                array = np.asarray(getattr(neuron, key))
+                if key == 'S':
+                    # Спайки пишутся на месте только в логический массив
+                    array = array.astype(bool)
+                arrays[('neurons', name, key)] = array
+        for name, synapse in self.synapses.items():
+            arrays[('synapses', name)] = np.asarray(synapse.weight)
+        size, placement = state_segment_layout(arrays)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        views = state_segment_views(shm.buf, placement)
+        for key, array in arrays.items():
+            views[key][...] = array
+            if key[0] == 'neurons':
+                setattr(self.neurons[key[1]], key[2], views[key])
+            else:
+                synapse = self.synapses[key[1]]
+                synapse.weight = views[key]
+                # Общие с копиями сети веса больше не используются этой сетью
+                synapse.weight_shm = None
+
+        self.state_shm = shm
+        self.state_version = np.ndarray(1, dtype=np.uint64, buffer=shm.buf)
+        self.state_version[0] = 0
+        layout = {'name': shm.name, 'neurons': {}, 'synapses': {}}
+        for key, place in placement.items():
+            if key[0] == 'neurons':
+                layout['neurons'].setdefault(key[1], {})[key[2]] = place
+            else:
+                layout['synapses'][key[1]] = place
+        self.state_layout = layout
+        return layout
+
+    def release_state(self):
+        """
+        Перенос состояния обратно в обычную память и освобождение
+        сегмента share_state. Подключенные StateReader должны быть закрыты
+        до завершения своих процессов, их виды остаются корректными.
+        """
+        if self.state_shm is None:
+            return
+        layout = self.state_layout
+        for name, arrays in layout['neurons'].items():
+            neuron = self.neurons.get(name)
+            if neuron is not None:
+                for key in arrays:
+                    setattr(neuron, key, np.array(getattr(neuron, key)))
+        for name in layout['synapses']:
+            synapse = self.synapses.get(name)
+            if synapse is not None:
+                synapse.weight = np.array(synapse.weight)
+        self.state_version = None
+        self.state_layout = None
+        try:
+            self.state_shm.close()
+        except BufferError:
+            # Виды на сегмент еще используются (копии сети), он освободится вместе с ними
+            pass
+        self.state_shm.unlink()
+        self.state_shm = None
+
+    def begin_state_write(self):
+        """
+        Начало записи состояния вне step (например, EventDrivenRunner):
+        версия становится нечетной, читатели StateReader ждут end_state_write.
+        """
+        if self.state_version is not None:
+            self.state_version[0] += 1
+
+    def end_state_write(self):
+        """Конец записи состояния, версия снова четная."""
+        if self.state_version is not None:
+            self.state_version[0] += 1
@@ -1,8 +1,13 @@
+import copy
 import numpy as np
+from .memory import array_nbytes
 
 #TODO когда нейроны одинаковые нужно отработать без создания массивов всех параметров
 
 class Neuron:
+    # Изменяемое состояние слоя, копируется в fork
+    state_keys = ('U', 'I', 'S')
+    
     def __init__(self, name: str, N: int, params: dict):
         """
         Инициализация базового нейрона.
@@ -42,9 +47,10 @@ class Neuron:
                 raise ValueError(f"Длина параметра {key} = {len(self.params[key])} не соответствует количеству нейронов ({N})")    
 
     def reset(self):
-        self.U = self.ustart.copy()
-        self.I = self.istart.copy()
-        self.S = self.sstart.copy()
+        # Сброс на месте: массивы состояния могут быть видами в популяции
+        self.U[...] = self.ustart
+        self.I[...] = self.istart
+        self.S[...] = self.sstart
 
     def step(self, dt: float, Iin: np.ndarray):
         pass
@@ -58,6 +64,32 @@ class Neuron:
     def get_spike(self) -> np.ndarray:
         return self.S
 
+    def _update_spike(self):
+        # Спайки пишутся на месте, если S логический: массив может быть
+        # видом в популяции или в общей памяти (Network.share_state)
+        if self.S.dtype == bool:
+            np.greater_equal(self.U, self.uth, out=self.S)
+        else:
+            self.S = self.U >= self.uth
+
+    def get_current_decay(self):
+        """
+        Общий для слоя множитель затухания тока I на последнем шаге
+        (I *= decay у нейронов без спайка) или None, если он неизвестен.
+        """
+        return None
+
+    def fork(self):
+        """Копия слоя с общими параметрами и собственным состоянием."""
+        clone = copy.copy(self)
+        for key in self.state_keys:
+            setattr(clone, key, getattr(self, key).copy())
+        return clone
+
+    def memory_usage(self) -> int:
+        """Объем памяти массивов состояния и параметров слоя в байтах."""
+        return array_nbytes(list(self.__dict__.values()))
+
 
 class LIFNeuron(Neuron):
     def __init__(self, name: str, N: int, params: dict):
@@ -89,13 +121,23 @@ class LIFNeuron(Neuron):
         
         self.itay = self.params['Itay']
         self.imax = self.params['Imax']
+        
+        # Шаг времени последнего шага, для get_current_decay
+        self.dt = None
+        self.itay_uniform = bool(np.all(self.itay == self.itay[0]))
+
+    def get_current_decay(self):
+        if self.dt is None or not self.itay_uniform:
+            return None
+        return 1 - self.dt / self.itay[0]
 
     def step(self, dt: float, Iin: np.ndarray):
+        self.dt = dt
         # self.U *= np.exp(- dt / self.utay) 
         self.U *= (1 - dt / self.utay)
         self.U += Iin
         
-        self.S = self.U >= self.uth
+        self._update_spike()
         ind_spike = np.where(self.S)
         ind_no_spike = np.where(np.invert(self.S))
 
@@ -106,8 +148,75 @@ class LIFNeuron(Neuron):
         self.I[ind_no_spike] *= (1 - dt / self.itay[ind_no_spike])
 
 
-            
+class LIFPopulation:
+    """
+    Общее хранилище нескольких слоев LIFNeuron.
+    Состояние и параметры слоев лежат подряд в общих массивах
+    (структура массивов), а атрибуты слоев становятся видами на свои
+    участки. Один векторный шаг популяции заменяет шаги всех слоев,
+    get_potential/get_current/get_spike слоев продолжают работать.
+    """
+    def __init__(self, layers: list[LIFNeuron], interval: int = 1):
+        """
+        layers: объединяемые слои
+        interval: шаг популяции в тактах сети (см. Network.set_interval)
+        """
+        self.layers = layers
+        self.interval = interval
+        self.N = sum(layer.N for layer in layers)
+        self.slices = {}
+        offset = 0
+        for layer in layers:
+            self.slices[layer.name] = slice(offset, offset + layer.N)
+            offset += layer.N
+
+        self.U = np.concatenate([layer.U for layer in layers]).astype(np.float64)
+        self.I = np.concatenate([layer.I for layer in layers]).astype(np.float64)
+        self.S = np.concatenate([layer.S for layer in layers]).astype(bool)
+        self.utay = np.concatenate([layer.utay for layer in layers])
+        self.uth = np.concatenate([layer.uth for layer in layers])
+        self.urest = np.concatenate([layer.urest for layer in layers])
+        self.itay = np.concatenate([layer.itay for layer in layers])
+        self.imax = np.concatenate([layer.imax for layer in layers])
+        self.Iin = np.zeros(self.N)
+
+        for layer in layers:
+            sl = self.slices[layer.name]
+            for key in ('U', 'I', 'S'):
+                setattr(layer, key, getattr(self, key)[sl])
+            for key, param in (('utay', 'Utay'), ('uth', 'Uth'), ('urest', 'Urest'),
+                               ('itay', 'Itay'), ('imax', 'Imax')):
+                # Параметры слоя остаются тем же массивом, что и атрибут
+                setattr(layer, key, getattr(self, key)[sl])
+                layer.params[param] = getattr(layer, key)
+
+    def step(self, dt: float, Iin: np.ndarray):
+        """Шаг всех слоев, те же вычисления, что в LIFNeuron.step, но на месте."""
+        for layer in self.layers:
+            layer.dt = dt
+        U = self.U
+        I = self.I
+        S = self.S
+        U *= (1 - dt / self.utay)
+        U += Iin
+        np.greater_equal(U, self.uth, out=S)
+        I *= (1 - dt / self.itay)
+        np.copyto(I, self.imax, where=S)
+        np.copyto(U, self.urest, where=S)
+
+    def memory_usage(self) -> int:
+        """
+        Объем памяти популяции сверх памяти ее слоев в байтах (буфер
+        входа); участки, на которые смотрят слои, учтены в слоях.
+        """
+        layers = [list(layer.__dict__.values()) for layer in self.layers]
+        return (array_nbytes([list(self.__dict__.values()), layers])
+                - sum(layer.memory_usage() for layer in self.layers))
+
+
 class AdaptiveLIFNeuron(Neuron):
+    state_keys = ('U', 'V', 'I', 'S')
+    
     def __init__(self, name: str, N: int, params: dict):
         """
         Инициализация LIF Adaptive нейрона.
@@ -143,20 +252,19 @@ class AdaptiveLIFNeuron(Neuron):
         self.itay = self.params['Itay']
         self.imax = self.params['Imax']
         
+        self.V = self.vstart.copy()
         self.reset()
 
     def reset(self):
-        self.U = self.ustart.copy()
-        self.V = self.vstart.copy()
-        self.I = self.istart.copy()
-        self.S = self.sstart.copy()
+        super().reset()
+        self.V[...] = self.vstart
 
     def step(self, dt: float, Iin: np.ndarray):
         # self.U *= np.exp(- dt / self.utay)
         self.U *= (1 - dt / self.utay)
         self.U += Iin
         
-        self.S = self.U >= self.uth
+        self._update_spike()
         ind_spike = np.where(self.S)
         ind_no_spike = np.where(np.invert(self.S))
 
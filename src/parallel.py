@@ -0,0 +1,318 @@
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from .network import Network
+
+
+class _RemoteLayer:
+    """
+    Заместитель слоя, который считается в другом процессе.
+    Отдает выходные токи, спайки и множитель затухания тока из общей памяти.
+    """
+    def __init__(self, name, N, sl, index, currents, spikes, decays):
+        self.name = name
+        self.N = N
+        self.sl = sl
+        self.index = index
+        self.currents = currents
+        self.spikes = spikes
+        self.decays = decays
+        self.t = 0
+
+    def get_current(self) -> np.ndarray:
+        # Ток до шага t записан на предыдущем шаге
+        return self.currents[(self.t + 1) % 2, self.sl]
+
+    def get_spike(self) -> np.ndarray:
+        return self.spikes[self.t % 2, self.sl]
+
+    def get_current_decay(self):
+        # Множитель записан вместе с током, NaN - неизвестен
+        decay = self.decays[(self.t + 1) % 2, self.index]
+        return None if np.isnan(decay) else float(decay)
+
+
+def _encode_decay(decay) -> float:
+    return np.nan if decay is None else decay
+
+
+def _attach_buffers(shm, total, n_layers):
+    currents = np.ndarray((2, total), dtype=np.float64, buffer=shm.buf)
+    decays = np.ndarray((2, n_layers), dtype=np.float64, buffer=shm.buf,
+                        offset=currents.nbytes)
+    spikes = np.ndarray((2, total), dtype=bool, buffer=shm.buf,
+                        offset=currents.nbytes + decays.nbytes)
+    return currents, spikes, decays
+
+
+def _worker_main(conn, shm_name, layout, index, barrier):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    total = max((sl.stop for sl in layout.values()), default=0)
+    currents, spikes, decays = _attach_buffers(shm, total, len(index))
+    try:
+        while True:
+            msg = conn.recv()
+            if msg[0] == 'close':
+                break
+            _, dt, num_steps, inputs, neurons, synapses, monitors = msg
+            try:
+                _worker_run(dt, num_steps, inputs, neurons, synapses, monitors,
+                            layout, index, currents, spikes, decays, barrier)
+                conn.send(('done', neurons, synapses, monitors))
+            except Exception:
+                barrier.abort()
+                conn.send(('error', traceback.format_exc()))
+    finally:
+        del currents, spikes, decays
+        shm.close()
+
+
+def _worker_run(dt, num_steps, inputs, neurons, synapses, monitors,
+                layout, index, currents, spikes, decays, barrier):
+    # Подменяем слои из других процессов на чтение из общей памяти
+    proxies = {}
+    originals = []
+    for synapse in synapses:
+        originals.append(synapse.pre)
+        name = synapse.pre.name
+        if name not in neurons:
+            if name not in proxies:
+                proxies[name] = _RemoteLayer(name, synapse.pre.N, layout[name], index[name],
+                                             currents, spikes, decays)
+            synapse.pre = proxies[name]
+
+    try:
+        for t in range(num_steps):
+            for proxy in proxies.values():
+                proxy.t = t
+
+            I_in = {}
+            for neuron_name, neuron in neurons.items():
+                if neuron_name in inputs:
+                    I_in[neuron_name] = np.array(inputs[neuron_name][t])
+                else:
+                    I_in[neuron_name] = np.zeros(neuron.N)
+
+            for synapse in synapses:
+                I_out_pre = np.array(synapse.pre.get_current())
+                I_in[synapse.post.name] += synapse.propagate(I_out_pre)
+
+            slot = t % 2
+            for neuron_name, neuron in neurons.items():
+                neuron.step(dt, I_in[neuron_name])
+                sl = layout[neuron_name]
+                currents[slot, sl] = neuron.get_current()
+                spikes[slot, sl] = neuron.get_spike()
+                decays[slot, index[neuron_name]] = _encode_decay(neuron.get_current_decay())
+
+            # Все слои записали состояние шага t
+            barrier.wait()
+
+            for synapse in synapses:
+                synapse.update_weight(dt)
+
+            for monitor in monitors:
+                monitor.collect()
+
+        for synapse in synapses:
+            synapse.flush_weight()
+    finally:
+        for synapse, pre in zip(synapses, originals):
+            synapse.pre = pre
+
+
+def _adopt_value(current, value):
+    """
+    Новое значение атрибута: массив той же формы записывается на место
+    текущего, словари переносятся по ключам.
+    """
+    if (isinstance(current, np.ndarray) and isinstance(value, np.ndarray) and
+            current.shape == value.shape and current.dtype == value.dtype and
+            current.flags.writeable):
+        current[...] = value
+        return current
+    if isinstance(current, dict) and isinstance(value, dict):
+        for key, item in value.items():
+            current[key] = _adopt_value(current.get(key), item)
+        return current
+    return value
+
+
+def _adopt_state(obj, state: dict):
+    """
+    Перенос состояния объекта из процесса расчета. Массивы той же формы
+    (в том числе в словарях) записываются на месте, чтобы виды на них
+    (популяции fuse_neurons, MonitorRate.get_rate) оставались корректными.
+    """
+    for key, value in state.items():
+        setattr(obj, key, _adopt_value(obj.__dict__.get(key), value))
+
+
+class PartitionedNetwork:
+    """
+    Многопроцессный прогон сети.
+
+    Группы слоев вместе с входящими в них синапсами и мониторами считаются
+    в отдельных процессах. Выходные токи и спайки слоев на каждом шаге
+    передаются через общую память (multiprocessing.shared_memory) с двойной
+    буферизацией: на шаге t пишется буфер t % 2, а предыдущие токи читаются
+    из другого, поэтому на шаг нужен один барьер.
+
+    Сеть net остается основным интерфейсом: после run состояние нейронов,
+    веса синапсов и данные мониторов копируются обратно в ее объекты.
+    """
+
+    def __init__(self, net: Network, partitions: list[list[str]], context=None):
+        """
+        net: сеть
+        partitions: список групп имен слоев, по группе на процесс
+        context: контекст multiprocessing (по умолчанию mp.get_context())
+        """
+        self._check_schedule(net)
+        self.net = net
+        self.partitions = [list(p) for p in partitions]
+        self.ctx = context if context is not None else mp.get_context()
+
+        self.layer_part = {}
+        for i, part in enumerate(self.partitions):
+            for name in part:
+                if name not in net.neurons:
+                    raise ValueError(f"Слой {name} не существует в сети")
+                if name in self.layer_part:
+                    raise ValueError(f"Слой {name} указан в нескольких группах")
+                self.layer_part[name] = i
+        missing = set(net.neurons) - set(self.layer_part)
+        if missing:
+            raise ValueError(f"Слои {sorted(missing)} не распределены по группам")
+
+        self.synapse_part = {name: self.layer_part[synapse.post.name]
+                             for name, synapse in net.synapses.items()}
+
+        self.monitor_part = {}
+        for name, monitor in net.monitors.items():
+            parts = set()
+            for obj in monitor.objs:
+                if obj.name in net.neurons:
+                    parts.add(self.layer_part[obj.name])
+                else:
+                    parts.add(self.synapse_part[obj.name])
+            if len(parts) != 1:
+                raise ValueError(f"Объекты монитора {name} должны быть в одной группе")
+            self.monitor_part[name] = parts.pop()
+
+        # Размещение слоев в общих буферах
+        self.layout = {}
+        self.index = {}
+        offset = 0
+        for name, neuron in net.neurons.items():
+            self.layout[name] = slice(offset, offset + neuron.N)
+            self.index[name] = len(self.index)
+            offset += neuron.N
+        self.total = offset
+
+        self.shm = None
+        self.workers = []
+        self.conns = []
+
+    @staticmethod
+    def _check_schedule(net: Network):
+        # Процессы делают шаг всех слоев и обучение на каждом такте
+        if net.intervals or net.synapse_intervals:
+            raise ValueError("Разные интервалы шагов слоев не поддерживаются многопроцессным расчетом")
+        # Процессы считают копии массивов, читатели сегмента их не видят
+        if net.state_shm is not None:
+            raise ValueError("Состояние в общей памяти (share_state) не поддерживается многопроцессным расчетом")
+
+    def start(self):
+        """Создание общей памяти и запуск процессов."""
+        if self.shm is not None:
+            return
+        nbytes = max(2 * self.total * (np.dtype(np.float64).itemsize + 1) +
+                     2 * len(self.index) * np.dtype(np.float64).itemsize, 1)
+        self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.currents, self.spikes, self.decays = _attach_buffers(self.shm, self.total,
+                                                                  len(self.index))
+        self.barrier = self.ctx.Barrier(len(self.partitions))
+        for _ in self.partitions:
+            parent_conn, child_conn = self.ctx.Pipe()
+            worker = self.ctx.Process(target=_worker_main,
+                                      args=(child_conn, self.shm.name, self.layout,
+                                            self.index, self.barrier),
+                                      daemon=True)
+            worker.start()
+            self.workers.append(worker)
+            self.conns.append(parent_conn)
+
+    def close(self):
+        """Остановка процессов и освобождение общей памяти."""
+        for conn in self.conns:
+            conn.send(('close',))
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        self.conns = []
+        if self.shm is not None:
+            del self.currents, self.spikes, self.decays
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def run(self, dt, inputs):
+        """
+        Прогон сети по временным шагам, аналог Network.run.
+
+        Параметры:
+        dt - шаг времени
+        inputs - словарь {имя_слоя: np.array формы (num_steps, num_neurons)}
+        """
+        num_steps = None
+        for inp in inputs.values():
+            if num_steps is None:
+                num_steps = inp.shape[0]
+            elif inp.shape[0] != num_steps:
+                raise ValueError("Все входы должны иметь одинаковое число временных шагов")
+        if num_steps is None:
+            return
+        self._check_schedule(self.net)
+
+        self.start()
+        net = self.net
+        for name, neuron in net.neurons.items():
+            self.currents[1, self.layout[name]] = neuron.get_current()
+            self.decays[1, self.index[name]] = _encode_decay(neuron.get_current_decay())
+
+        for i, part in enumerate(self.partitions):
+            part_inputs = {name: inputs[name] for name in part if name in inputs}
+            neurons = {name: net.neurons[name] for name in part}
+            synapses = [s for name, s in net.synapses.items() if self.synapse_part[name] == i]
+            monitors = [m for name, m in net.monitors.items() if self.monitor_part[name] == i]
+            self.conns[i].send(('run', dt, num_steps, part_inputs, neurons, synapses, monitors))
+
+        replies = [conn.recv() for conn in self.conns]
+        errors = [reply[1] for reply in replies if reply[0] == 'error']
+        if errors:
+            self.barrier.reset()
+            raise RuntimeError("Ошибка в процессе расчета:\n" + "\n".join(errors))
+
+        for i, (_, neurons, synapses, monitors) in enumerate(replies):
+            for name, neuron in neurons.items():
+                _adopt_state(net.neurons[name], neuron.__dict__)
+            for synapse in synapses:
+                state = dict(synapse.__dict__)
+                state.pop('pre')
+                state.pop('post')
+                _adopt_state(net.synapses[synapse.name], state)
+            for monitor in monitors:
+                state = dict(monitor.__dict__)
+                state.pop('objs')
+                # Транспорт вывода (OutputSink) остается своим у каждого процесса
+                state.pop('transport', None)
+                _adopt_state(net.monitors[monitor.name], state)
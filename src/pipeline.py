@@ -0,0 +1,154 @@
+import numpy as np
+# scipy.signal импортируется при создании и первом применении фильтров
+
+
+class Stage:
+    """
+    Стадия потоковой обработки сигнала.
+    Обрабатывает блоки по оси 0 и хранит состояние между блоками,
+    поэтому результат не зависит от разбиения сигнала на блоки.
+    """
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """Обработка блока (метод-заглушка), блок передается без изменений."""
+        return block
+
+    def reset(self):
+        """Сброс состояния между сигналами (метод-заглушка)."""
+        pass
+
+
+class SOSFilterStage(Stage):
+    """Причинный IIR фильтр в форме каскада биквадратных секций."""
+    def __init__(self, sos: np.ndarray):
+        self.sos = sos
+        self.zi = None
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        from scipy.signal import sosfilt
+        if self.zi is None:
+            self.zi = np.zeros((self.sos.shape[0], 2) + block.shape[1:])
+        out, self.zi = sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return out
+
+    def reset(self):
+        self.zi = None
+
+
+class BandpassStage(SOSFilterStage):
+    def __init__(self, lowcut, highcut, fs, order=4):
+        """
+        Полосовой фильтр Баттерворта.
+        lowcut, highcut: границы полосы, fs: частота дискретизации
+        """
+        from scipy.signal import butter
+        nyq = 0.5 * fs
+        super().__init__(butter(order, [lowcut / nyq, highcut / nyq],
+                                btype='band', output='sos'))
+
+
+class LowpassStage(SOSFilterStage):
+    def __init__(self, cutoff, fs, order=2):
+        """
+        Фильтр нижних частот Баттерворта для выделения огибающей.
+        cutoff: частота среза, fs: частота дискретизации
+        """
+        from scipy.signal import butter
+        super().__init__(butter(order, cutoff / (0.5 * fs),
+                                btype='low', output='sos'))
+
+
+class RectifyStage(Stage):
+    """Выпрямление сигнала (модуль)."""
+    def process(self, block: np.ndarray) -> np.ndarray:
+        return np.abs(block)
+
+
+class DecimateStage(Stage):
+    def __init__(self, factor: int):
+        """
+        Прореживание: остается каждый factor-й отсчет.
+        Фаза прореживания сохраняется между блоками.
+        Сигнал перед прореживанием должен быть сглажен (LowpassStage).
+        """
+        self.factor = factor
+        self.phase = 0
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        out = block[self.phase::self.factor]
+        self.phase = (self.phase - len(block)) % self.factor
+        return out
+
+    def reset(self):
+        self.phase = 0
+
+
+class ScaleStage(Stage):
+    def __init__(self, gain: float, offset: float = 0.):
+        """Перевод сигнала во входной ток: gain * x + offset."""
+        self.gain = gain
+        self.offset = offset
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        return self.gain * block + self.offset
+
+
+class Pipeline:
+    """
+    Последовательность стадий потоковой обработки.
+    Одна и та же цепочка применяется к блокам живого сигнала (process)
+    и к файлу, читаемому кусками (run), с одинаковым результатом
+    и ограниченной памятью.
+    """
+    def __init__(self, stages: list[Stage]):
+        self.stages = stages
+
+    @property
+    def decimation(self) -> int:
+        """Общий коэффициент прореживания."""
+        factor = 1
+        for stage in self.stages:
+            if isinstance(stage, DecimateStage):
+                factor *= stage.factor
+        return factor
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        for stage in self.stages:
+            block = stage.process(block)
+        return block
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def process_chunks(self, chunks):
+        """Генератор обработанных блоков для итерируемого набора блоков."""
+        for chunk in chunks:
+            yield self.process(np.asarray(chunk, dtype=np.float64))
+
+    def run(self, data: np.ndarray, block_size: int = 4096) -> np.ndarray:
+        """
+        Обработка всего массива (в том числе memmap) блоками по block_size
+        отсчетов. Состояние стадий перед обработкой сбрасывается.
+        """
+        self.reset()
+        chunks = (data[i:i + block_size] for i in range(0, len(data), block_size))
+        out = list(self.process_chunks(chunks))
+        if not out:
+            return np.zeros((0,) + data.shape[1:])
+        return np.concatenate(out, axis=0)
+
+
+def emg_envelope_pipeline(lowcut, highcut, fs, envelope_cutoff=None,
+                          decimation=1, gain=1., offset=0.) -> Pipeline:
+    """
+    Стандартная цепочка для ЭМГ: полосовой фильтр, выпрямление,
+    огибающая (если задан envelope_cutoff), прореживание и масштабирование.
+    """
+    stages = [BandpassStage(lowcut, highcut, fs), RectifyStage()]
+    if envelope_cutoff is not None:
+        stages.append(LowpassStage(envelope_cutoff, fs))
+    if decimation > 1:
+        stages.append(DecimateStage(decimation))
+    if gain != 1. or offset != 0.:
+        stages.append(ScaleStage(gain, offset))
+    return Pipeline(stages)
@@ -0,0 +1,176 @@
+import asyncio
+from collections import deque
+import numpy as np
+from .network import Network
+
+
+class RealtimeStats:
+    """
+    Метрики прогона в реальном времени.
+    Задержка шага - время от его планового начала до окончания расчета.
+    Шаг пропустил срок, если задержка больше периода.
+    """
+    def __init__(self, history: int = 1000):
+        self.steps = 0
+        self.missed = 0
+        self.batches = 0
+        self.max_latency = 0.
+        self.latencies = deque(maxlen=history)
+
+    def record(self, latency: float, period: float):
+        self.steps += 1
+        self.latencies.append(latency)
+        if latency > self.max_latency:
+            self.max_latency = latency
+        if latency > period:
+            self.missed += 1
+
+    def summary(self) -> dict:
+        lat = np.array(self.latencies)
+        return {'steps': self.steps,
+                'missed': self.missed,
+                'batches': self.batches,
+                'max_latency': self.max_latency,
+                'mean_latency': float(lat.mean()) if len(lat) else 0.,
+                'p99_latency': float(np.percentile(lat, 99)) if len(lat) else 0.}
+
+
+class QueueSource:
+    """
+    Асинхронный источник входного тока слоя.
+    Шаг не ждет данных: берется последнее значение из очереди,
+    а при пустой очереди - нули. Более старые значения, пришедшие
+    между шагами, отбрасываются и учитываются в dropped.
+    """
+    def __init__(self, N: int, maxsize: int = 0):
+        self.N = N
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put(self, value):
+        self.queue.put_nowait(value)
+
+    async def __call__(self) -> np.ndarray:
+        value = None
+        while not self.queue.empty():
+            if value is not None:
+                self.dropped += 1
+            value = self.queue.get_nowait()
+        if value is None:
+            return np.zeros(self.N)
+        return value
+
+
+class QueueSink:
+    """
+    Асинхронный приемник выходов сети.
+    При переполнении очереди самые старые выходы отбрасываются.
+    """
+    def __init__(self, maxsize: int = 0):
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    async def __call__(self, step: int, outputs: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait((step, outputs))
+
+
+class RealtimeRunner:
+    """
+    Прогон сети в темпе реального времени в цикле событий asyncio.
+
+    Шаги планируются через каждые period секунд от начала прогона.
+    Перед шагом опрашиваются асинхронные источники входа, после шага
+    выходы слоев output_layers передаются асинхронным приемникам.
+    Если расчет отстал, просроченные шаги выполняются пачкой до max_batch
+    шагов без ожидания, после чего управление отдается циклу событий.
+    """
+
+    def __init__(self, net: Network, dt: float, period: float = None,
+                 sources: dict = None, sinks: list = None,
+                 output_layers: list[str] = None, output: str = 'spike',
+                 max_batch: int = 10, history: int = 1000):
+        """
+        net: сеть
+        dt: шаг модельного времени
+        period: период шага в секундах (по умолчанию dt миллисекунд)
+        sources: словарь {имя_слоя: async () -> входной ток}
+        sinks: список async (step, outputs) -> None
+        output_layers: слои, выходы которых передаются приемникам (по умолчанию все)
+        output: 'spike' - спайки слоев, 'current' - выходные токи
+        max_batch: максимальное количество шагов, догоняемых за раз
+        history: количество последних задержек для статистики
+        """
+        if output not in ('spike', 'current'):
+            raise ValueError(f"Неизвестный тип выхода {output}")
+        self.net = net
+        self.dt = dt
+        self.period = period if period is not None else dt * 1e-3
+        self.sources = sources if sources is not None else {}
+        self.sinks = sinks if sinks is not None else []
+        self.output_layers = (output_layers if output_layers is not None
+                              else list(net.neurons.keys()))
+        self.output = output
+        self.max_batch = max_batch
+        self.stats = RealtimeStats(history)
+
+        self.step_count = 0
+        self._stopped = False
+
+    def stop(self):
+        """Остановка прогона после текущей пачки шагов."""
+        self._stopped = True
+
+    async def _step(self):
+        inputs = {}
+        for name, source in self.sources.items():
+            inputs[name] = await source()
+        self.net.step(self.dt, inputs)
+
+        if self.sinks:
+            outputs = {}
+            for name in self.output_layers:
+                neuron = self.net.neurons[name]
+                if self.output == 'spike':
+                    outputs[name] = np.flatnonzero(neuron.get_spike())
+                else:
+                    outputs[name] = neuron.get_current().copy()
+            for sink in self.sinks:
+                await sink(self.step_count, outputs)
+
+    async def run(self, num_steps: int = None):
+        """
+        Прогон num_steps шагов (None - до вызова stop).
+        Возвращает статистику RealtimeStats.
+        """
+        loop = asyncio.get_running_loop()
+        period = self.period
+        self._stopped = False
+        t0 = loop.time()
+        done = 0
+
+        while not self._stopped and (num_steps is None or done < num_steps):
+            start = t0 + done * period
+            now = loop.time()
+            if now < start:
+                await asyncio.sleep(start - now)
+                now = loop.time()
+
+            # Сколько шагов уже пора сделать
+            due = int((now - t0) / period) - done + 1
+            due = max(1, min(due, self.max_batch))
+            if num_steps is not None:
+                due = min(due, num_steps - done)
+
+            for _ in range(due):
+                await self._step()
+                self.stats.record(loop.time() - (t0 + done * period), period)
+                self.step_count += 1
+                done += 1
+            self.stats.batches += 1
+            # Отдаем управление источникам и приемникам
+            await asyncio.sleep(0)
+
+        return self.stats
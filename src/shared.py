@@ -0,0 +1,153 @@
+import time
+from multiprocessing import shared_memory
+import numpy as np
+
+
+def create_shared_array(array: np.ndarray):
+    """
+    Копия массива в новом сегменте общей памяти.
+    Возвращает (массив, SharedMemory); сегмент нужно освободить
+    вызовом unlink, когда он больше не нужен.
+    """
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[...] = array
+    return shared, shm
+
+
+# Владельцы сегментов, созданных в этом процессе: {имя сегмента: количество}.
+# Сегмент удаляется, когда его освобождает последний владелец.
+_segment_owners = {}
+
+
+def acquire_segment(shm):
+    """Регистрация еще одного владельца сегмента (например, копии сети)."""
+    _segment_owners[shm.name] = _segment_owners.get(shm.name, 0) + 1
+
+
+def release_segment(shm) -> bool:
+    """
+    Освобождение сегмента владельцем. Последний владелец закрывает
+    и удаляет сегмент; сегменты, созданные в другом процессе, только
+    закрываются. Возвращает True, если сегмент удален.
+    """
+    count = _segment_owners.get(shm.name)
+    if count is not None and count > 1:
+        _segment_owners[shm.name] = count - 1
+        return False
+    try:
+        shm.close()
+    except BufferError:
+        # Виды на сегмент еще используются, память освободится вместе с ними
+        pass
+    if count is None:
+        return False
+    del _segment_owners[shm.name]
+    shm.unlink()
+    return True
+
+
+def shared_array_descriptor(array: np.ndarray, shm) -> tuple:
+    """Описание массива в общей памяти для передачи в другой процесс."""
+    return shm.name, array.shape, array.dtype.str
+
+
+def attach_shared_array(descriptor: tuple):
+    """
+    Подключение к массиву в общей памяти по описанию
+    shared_array_descriptor. Возвращает (массив, SharedMemory).
+    """
+    name, shape, dtype = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm
+
+
+# Начало массивов в сегменте состояния выравнивается по 64 байтам
+_STATE_ALIGN = 64
+
+
+def state_segment_layout(arrays: dict) -> tuple:
+    """
+    Размещение массивов {ключ: массив} в одном сегменте состояния.
+    В начале сегмента лежит счетчик версии (uint64), далее массивы.
+    Возвращает (размер сегмента, {ключ: (смещение, форма, dtype)}).
+    """
+    offset = _STATE_ALIGN
+    placement = {}
+    for key, array in arrays.items():
+        placement[key] = (offset, tuple(array.shape), array.dtype.str)
+        offset += -(-max(array.nbytes, 1) // _STATE_ALIGN) * _STATE_ALIGN
+    return offset, placement
+
+
+def state_segment_views(buf, placement: dict) -> dict:
+    """Виды на массивы сегмента состояния по размещению state_segment_layout."""
+    return {key: np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+            for key, (offset, shape, dtype) in placement.items()}
+
+
+class StateReader:
+    """
+    Чтение состояния сети из другого процесса по описанию
+    Network.share_state без копирования данных.
+
+    Писатель (Network.step) увеличивает счетчик версии до шага (нечетная
+    версия - идет запись) и после него (четная). snapshot копирует массивы
+    и повторяет попытку, если за время копирования версия изменилась,
+    поэтому снимок всегда соответствует границе между шагами, а шаг сети
+    никогда не ждет читателя.
+    """
+    def __init__(self, layout: dict):
+        self.shm = shared_memory.SharedMemory(name=layout['name'])
+        self.version_counter = np.ndarray(1, dtype=np.uint64, buffer=self.shm.buf)
+        placement = {}
+        for name, arrays in layout['neurons'].items():
+            for key, place in arrays.items():
+                placement[('neurons', name, key)] = place
+        for name, place in layout['synapses'].items():
+            placement[('synapses', name)] = place
+        self.arrays = state_segment_views(self.shm.buf, placement)
+        for array in self.arrays.values():
+            array.flags.writeable = False
+
+    @property
+    def version(self) -> int:
+        """Текущая версия состояния, четная между шагами."""
+        return int(self.version_counter[0])
+
+    def neuron(self, name: str, key: str) -> np.ndarray:
+        """Вид (без копирования) на массив состояния key ('U', 'I', 'S', ...) слоя."""
+        return self.arrays[('neurons', name, key)]
+
+    def weight(self, name: str) -> np.ndarray:
+        """Вид (без копирования) на веса синапса."""
+        return self.arrays[('synapses', name)]
+
+    def snapshot(self, timeout: float = None) -> dict:
+        """
+        Согласованная копия всего состояния:
+        {'version': версия, 'neurons': {слой: {ключ: массив}}, 'synapses': {синапс: веса}}.
+        timeout: время ожидания согласованного снимка в секундах
+                 (None - без ограничения), по его истечении TimeoutError.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            version = self.version
+            if version % 2 == 0:
+                copies = {key: array.copy() for key, array in self.arrays.items()}
+                if self.version == version:
+                    break
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError("Не удалось получить согласованный снимок состояния")
+            time.sleep(0)
+        result = {'version': version, 'neurons': {}, 'synapses': {}}
+        for key, array in copies.items():
+            if key[0] == 'neurons':
+                result['neurons'].setdefault(key[1], {})[key[2]] = array
+            else:
+                result['synapses'][key[1]] = array
+        return result
+
+    def close(self):
+        del self.version_counter, self.arrays
+        self.shm.close()
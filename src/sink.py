@@ -0,0 +1,356 @@
+"""
+Вывод спайков и токов слоев из процесса во время прогона.
+
+Кадр (все числа little-endian):
+    заголовок  '<4sQHH': MAGIC, номер первого шага, число шагов, число слоев
+    далее для каждого шага и каждого слоя:
+        count (uint32) и данные:
+        'spikes'  - номера спайкующих нейронов, uint32 x count
+        'current' - выходные токи слоя, float32 x count (count = N)
+В потоковых транспортах (pipe, сокет) и в кольце общей памяти перед
+каждым кадром записывается его длина (uint32).
+"""
+
+import os
+import select
+import socket
+import struct
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from multiprocessing import shared_memory
+from .monitor import Monitor
+
+MAGIC = b'SNNF'
+_HEADER = struct.Struct('<4sQHH')
+_COUNT = struct.Struct('<I')
+_LENGTH = struct.Struct('<I')
+
+
+def encode_step(records) -> bytes:
+    """Данные одного шага: records - пары (kind, данные слоя) в порядке слоев."""
+    parts = []
+    for kind, data in records:
+        if kind == 'spikes':
+            payload = np.flatnonzero(data).astype('<u4')
+        else:
+            payload = np.asarray(data, dtype='<f4')
+        parts.append(_COUNT.pack(len(payload)))
+        parts.append(payload.tobytes())
+    return b''.join(parts)
+
+
+def encode_frame(first_step: int, steps: list) -> bytes:
+    """
+    Кодирование кадра. steps - список шагов, каждый шаг - список пар
+    (kind, данные слоя) в порядке слоев, kind - 'spikes' или 'current'.
+    """
+    n_layers = len(steps[0]) if steps else 0
+    header = _HEADER.pack(MAGIC, first_step, len(steps), n_layers)
+    return header + b''.join(encode_step(records) for records in steps)
+
+
+def decode_frame(frame: bytes, layers: list, kinds: list):
+    """
+    Декодирование кадра. layers - имена слоев, kinds - виды данных слоев
+    в том же порядке, что у OutputSink.
+    Возвращает (номер первого шага, [{имя слоя: массив} для каждого шага]).
+    """
+    magic, first_step, n_steps, n_layers = _HEADER.unpack_from(frame, 0)
+    if magic != MAGIC:
+        raise ValueError("Неверный формат кадра")
+    if n_layers != len(layers):
+        raise ValueError(f"В кадре {n_layers} слоев, ожидалось {len(layers)}")
+    offset = _HEADER.size
+    steps = []
+    for _ in range(n_steps):
+        records = {}
+        for name, kind in zip(layers, kinds):
+            (count,) = _COUNT.unpack_from(frame, offset)
+            offset += _COUNT.size
+            dtype = '<u4' if kind == 'spikes' else '<f4'
+            records[name] = np.frombuffer(frame, dtype=dtype, count=count, offset=offset)
+            offset += 4 * count
+        steps.append(records)
+    return first_step, steps
+
+
+class StreamTransport(ABC):
+    """
+    Неблокирующая запись кадров в поток байт (pipe, сокет).
+    policy='drop' - кадр, который нельзя записать сразу, отбрасывается;
+    policy='block' - запись ждет готовности приемника.
+    Частично записанный кадр всегда дописывается до конца, чтобы
+    не нарушить поток, новые кадры до этого отбрасываются ('drop').
+    """
+    def __init__(self, policy: str = 'drop'):
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Неизвестная политика записи {policy}")
+        self.policy = policy
+        self.pending = b''
+        self.sent = 0
+        self.dropped = 0
+
+    @abstractmethod
+    def _write(self, data: bytes) -> int:
+        """Неблокирующая запись, возвращает число записанных байт."""
+
+    @abstractmethod
+    def _fileno(self) -> int:
+        """Дескриптор для ожидания готовности приемника (policy='block')."""
+
+    def _write_some(self, data: bytes) -> int:
+        try:
+            return self._write(data)
+        except (BlockingIOError, InterruptedError):
+            return 0
+
+    def _drain(self, block: bool) -> bool:
+        """Дописывание начатого кадра. True, если он записан целиком."""
+        while self.pending:
+            n = self._write_some(self.pending)
+            self.pending = self.pending[n:]
+            if self.pending and n == 0:
+                if not block:
+                    return False
+                select.select([], [self._fileno()], [])
+        return True
+
+    def send(self, frame: bytes) -> bool:
+        """Отправка кадра. Возвращает False, если кадр отброшен."""
+        block = self.policy == 'block'
+        if not self._drain(block):
+            self.dropped += 1
+            return False
+        data = _LENGTH.pack(len(frame)) + frame
+        n = self._write_some(data)
+        if n == 0 and not block:
+            self.dropped += 1
+            return False
+        self.pending = data[n:]
+        self._drain(block)
+        self.sent += 1
+        return True
+
+    def flush(self):
+        self._drain(True)
+
+
+class PipeTransport(StreamTransport):
+    """Запись в файловый дескриптор (например, os.pipe()[1])."""
+    def __init__(self, fd: int, policy: str = 'drop'):
+        super().__init__(policy)
+        self.fd = fd
+        os.set_blocking(fd, False)
+
+    def _write(self, data: bytes) -> int:
+        return os.write(self.fd, data)
+
+    def _fileno(self) -> int:
+        return self.fd
+
+    def close(self):
+        self.flush()
+        os.close(self.fd)
+
+
+class UnixSocketTransport(StreamTransport):
+    """Запись в Unix сокет, к которому подключается сам передатчик."""
+    def __init__(self, path: str, policy: str = 'drop'):
+        super().__init__(policy)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(path)
+        self.sock.setblocking(False)
+
+    def _write(self, data: bytes) -> int:
+        return self.sock.send(data)
+
+    def _fileno(self) -> int:
+        return self.sock.fileno()
+
+    def close(self):
+        self.flush()
+        self.sock.close()
+
+
+class SharedMemoryRing:
+    """
+    Кольцевой буфер кадров в общей памяти для одного писателя и одного
+    читателя. В начале сегмента три счетчика uint64: записано
+    и прочитано байт всего и размер данных, далее capacity байт данных.
+    Писатель меняет только первый счетчик после записи кадра, читатель -
+    только второй.
+    """
+    _POS = 24
+
+    def __init__(self, capacity: int = 1 << 20, name: str = None, create: bool = True):
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=self._POS + capacity)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.pos = np.ndarray(3, dtype=np.uint64, buffer=self.shm.buf)
+        if create:
+            self.pos[:] = (0, 0, capacity)
+        self.capacity = int(self.pos[2])
+        self.data = np.ndarray(self.capacity, dtype=np.uint8, buffer=self.shm.buf, offset=self._POS)
+
+    @classmethod
+    def attach(cls, name: str):
+        """Подключение к существующему кольцу (в процессе читателя)."""
+        return cls(name=name, create=False)
+
+    def _copy_in(self, start: int, data: np.ndarray):
+        i = start % self.capacity
+        n = min(len(data), self.capacity - i)
+        self.data[i:i + n] = data[:n]
+        self.data[:len(data) - n] = data[n:]
+
+    def _copy_out(self, start: int, size: int) -> bytes:
+        i = start % self.capacity
+        n = min(size, self.capacity - i)
+        return self.data[i:i + n].tobytes() + self.data[:size - n].tobytes()
+
+    def free(self) -> int:
+        return self.capacity - int(self.pos[0] - self.pos[1])
+
+    def write(self, frame: bytes, block: bool = False) -> bool:
+        size = _LENGTH.size + len(frame)
+        if size > self.capacity:
+            raise ValueError(f"Кадр {size} байт больше кольца ({self.capacity} байт)")
+        wait = 1e-5
+        while self.free() < size:
+            if not block:
+                return False
+            # Ожидание читателя с растущей паузой, без загрузки ядра
+            time.sleep(wait)
+            wait = min(2 * wait, 1e-3)
+        start = int(self.pos[0])
+        self._copy_in(start, np.frombuffer(_LENGTH.pack(len(frame)) + frame, dtype=np.uint8))
+        # Кадр становится виден читателю только после записи данных
+        self.pos[0] = start + size
+        return True
+
+    def read(self):
+        """Следующий кадр или None, если новых кадров нет."""
+        start = int(self.pos[1])
+        if int(self.pos[0]) == start:
+            return None
+        (length,) = _LENGTH.unpack(self._copy_out(start, _LENGTH.size))
+        frame = self._copy_out(start + _LENGTH.size, length)
+        self.pos[1] = start + _LENGTH.size + length
+        return frame
+
+    def close(self):
+        del self.pos, self.data
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+class SharedMemoryTransport:
+    """Запись кадров в SharedMemoryRing с политикой 'drop' или 'block'."""
+    def __init__(self, ring: SharedMemoryRing, policy: str = 'drop'):
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Неизвестная политика записи {policy}")
+        self.ring = ring
+        self.policy = policy
+        self.sent = 0
+        self.dropped = 0
+
+    def send(self, frame: bytes) -> bool:
+        if self.ring.write(frame, block=self.policy == 'block'):
+            self.sent += 1
+            return True
+        self.dropped += 1
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def read_frames(stream):
+    """
+    Генератор кадров из потока (файл из os.fdopen(fd, 'rb'),
+    socket.makefile('rb')) до его закрытия.
+    """
+    while True:
+        head = stream.read(_LENGTH.size)
+        if len(head) < _LENGTH.size:
+            return
+        (length,) = _LENGTH.unpack(head)
+        frame = stream.read(length)
+        if len(frame) < length:
+            return
+        yield frame
+
+
+class OutputSink(Monitor):
+    """
+    Вывод выходов слоев во время прогона. Добавляется в сеть как монитор
+    (Network.add_monitor) и на каждом шаге кодирует спайки или токи
+    выбранных слоев; каждые block_steps шагов кадр отправляется
+    в транспорт без ожидания приемника (см. policy транспорта).
+    """
+    def __init__(self, name: str, objs, transport, kinds='spikes', block_steps: int = 1):
+        """
+        objs: слой или список слоев
+        transport: PipeTransport, UnixSocketTransport или SharedMemoryTransport
+        kinds: 'spikes' или 'current' для всех слоев, либо список по слоям
+        block_steps: количество шагов в кадре
+        """
+        super().__init__(name, objs)
+        if isinstance(kinds, str):
+            kinds = [kinds] * len(self.objs)
+        if len(kinds) != len(self.objs):
+            raise ValueError("Количество видов данных должно совпадать с количеством слоев")
+        for kind in kinds:
+            if kind not in ('spikes', 'current'):
+                raise ValueError(f"Неизвестный вид данных {kind}")
+        self.kinds = list(kinds)
+        self.layers = [obj.name for obj in self.objs]
+        self.transport = transport
+        self.block_steps = block_steps
+        self.steps = []
+        self.first_step = 0
+
+    def _request_data_from_obj(self, obj) -> np.ndarray:
+        if self.kinds[self.layers.index(obj.name)] == 'spikes':
+            return obj.get_spike()
+        return obj.get_current()
+
+    def collect(self):
+        if not self.steps:
+            self.first_step = self.counter
+        self.counter += 1
+        # Шаг кодируется сразу: массивы слоев меняются на следующем шаге
+        self.steps.append(encode_step(
+            [(kind, self._request_data_from_obj(obj))
+             for obj, kind in zip(self.objs, self.kinds)]))
+        if len(self.steps) >= self.block_steps:
+            self.flush()
+
+    def flush(self):
+        """Отправка накопленных шагов неполным кадром."""
+        if not self.steps:
+            return
+        header = _HEADER.pack(MAGIC, self.first_step, len(self.steps), len(self.objs))
+        self.transport.send(header + b''.join(self.steps))
+        self.steps = []
+
+    def close(self):
+        self.flush()
+        self.transport.close()
+
+    def clear(self):
+        self.steps = []
+
+    def memory_usage(self) -> int:
+        return sum(len(step) for step in self.steps)
+
+    def projected_memory(self, num_steps: int) -> int:
+        return self.memory_usage()
@@ -1,4 +1,24 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+from .memory import array_nbytes
+from .shared import shared_array_descriptor, attach_shared_array
+
+
+# Общие для всех синапсов пулы потоков {количество потоков: пул}
+_thread_pools = {}
+# Потоки пула не переходят в процесс, созданный через fork (например,
+# в процессы PartitionedNetwork): унаследованный пул ждал бы их вечно
+os.register_at_fork(after_in_child=_thread_pools.clear)
+
+
+def _thread_pool(threads: int) -> ThreadPoolExecutor:
+    """Постоянный пул потоков, создается при первом запросе."""
+    pool = _thread_pools.get(threads)
+    if pool is None:
+        pool = _thread_pools[threads] = ThreadPoolExecutor(max_workers=threads)
+    return pool
+
 
 class Synapse:
     """
@@ -11,8 +31,10 @@ class Synapse:
         self.name = name
         self.pre = preNeuron
         self.post = postNeuron
-        self.weight_shape = (self.post.N, self.pre.N)
         self.params = params
+        self.weight_shape = self._get_weight_shape()
+        # Сегмент общей памяти с весами (см. Network.share_weights)
+        self.weight_shm = None
 
         if weight is None:
             self.weight = self.generate_random_weight()
@@ -21,24 +43,285 @@ class Synapse:
                 raise ValueError(f"Размер weight ({weight.shape}) не соответствует количествам нейронов в слоях ({self.weight_shape})")
             self.weight = weight
 
+        self._init_delay(None if params is None else params.get('Delay'),
+                         1000 if params is None else params.get('RecomputeEvery', 1000))
+        self._init_incremental(params)
+
+    def _init_delay(self, delay, recompute_every: int = 1000):
+        """
+        Задержки передачи в шагах (params['Delay']):
+        - целое число - общая задержка синапса. Выходы pre хранятся
+          в кольцевом буфере (D, pre.N), передача берет вход D шагов назад;
+        - массив (post.N, pre.N) - задержка каждой связи (только для полной
+          матрицы весов). Выходы pre последних Dmax + 1 шагов хранятся
+          в кольцевом буфере (Dmax + 1, pre.N), выход синапса
+              y_i(t) = Sum_j W_ij * I_j(t - d_ij).
+          Если у pre общий множитель затухания тока b (см. _init_incremental)
+          и он не менялся последние Dmax + 1 шагов, то
+              y(t) = b * y(t - 1) + Sum W_ij * D_j(t - d_ij),
+          D_j = I_j(t) - b * I_j(t - 1) отличен от нуля только в изменившихся
+          столбцах (спайки, внешние изменения). Их вклады разносятся
+          в кольцевом буфере post (Dmax + 1, post.N) в ячейки
+          (шаг + d) mod (Dmax + 1), стоимость шага O(post * число изменившихся
+          столбцов). Иначе, у синапсов с обучением и раз в recompute_every
+          шагов выход считается заново по буферу выходов pre за O(post * pre).
+        """
+        self.delay = None
+        self.delay_step = 0
+        if delay is None:
+            return
+        delay = np.asarray(delay)
+        if not np.issubdtype(delay.dtype, np.integer) or np.any(delay < 0):
+            raise ValueError("Задержки должны быть целыми неотрицательными числами шагов")
+        if delay.ndim == 0:
+            if delay > 0:
+                self.delay = int(delay)
+                self.delay_buffer = np.zeros((self.delay, self.pre.N))
+            return
+        if delay.shape != (self.post.N, self.pre.N):
+            raise ValueError(f"Форма задержек {delay.shape} не соответствует количествам нейронов в слоях ({self.post.N}, {self.pre.N})")
+        if type(self)._propagate is not Synapse._propagate:
+            raise ValueError("Задержки отдельных связей поддерживаются только для полной матрицы весов")
+        self.delay = delay
+        length = int(delay.max()) + 1
+        # Задержки по столбцам (pre.N, post.N): связи столбца j лежат подряд
+        self.delay_columns = np.ascontiguousarray(delay.T)
+        self.delay_rows = np.tile(np.arange(self.post.N), self.pre.N)
+        self.delay_buffer = np.zeros((length, self.post.N))
+        # Выходы pre записываются дважды (строки h и h + length), чтобы
+        # выборка по задержкам шла без взятия остатка
+        self.delay_history = np.zeros((2 * length, self.pre.N))
+        self.delay_index = (length - delay) * self.pre.N + np.arange(self.pre.N)
+        self.delay_output = np.zeros(self.post.N)
+        # Веса с обучением меняются, пока сигнал в пути: только пересчет
+        self.delay_incremental = type(self).update_weight is Synapse.update_weight
+        self.delay_recompute_every = recompute_every
+        self.delay_decay = None
+        self.delay_steady = length
+        self.delay_count = 0
+        self.delay_scheduled = 0
+
+    def _init_incremental(self, params):
+        """
+        Инкрементальная передача (params['Incremental'] = True) для
+        синапсов без обучения с полной матрицей весов. У нейронов pre без
+        спайка ток затухает с общим множителем b, поэтому
+            W @ I(t+1) = b * (W @ I(t)) + W[:, c] @ (I(t+1) - b * I(t))[c],
+        где c - столбцы, в которых I(t+1) != b * I(t) (спайки, внешние
+        изменения). Стоимость шага O(post * len(c)) вместо O(post * pre).
+        Раз в params['RecomputeEvery'] шагов (по умолчанию 1000), а также
+        при большом числе изменившихся столбцов результат считается
+        заново, чтобы не накапливалась ошибка округления.
+        """
+        self.incremental = bool(params is not None and params.get('Incremental', False))
+        if not self.incremental:
+            return
+        if (type(self).update_weight is not Synapse.update_weight or
+                type(self)._propagate is not Synapse._propagate):
+            raise ValueError("Инкрементальная передача поддерживается только для синапсов без обучения с полной матрицей весов")
+        itay = getattr(self.pre, 'itay', None)
+        if itay is None or np.any(np.asarray(itay) != itay[0]):
+            raise ValueError(f"Для инкрементальной передачи у слоя {self.pre.name} должен быть общий Itay")
+        self.recompute_every = params.get('RecomputeEvery', 1000)
+        self.max_changed = max(1, self.pre.N // 4)
+        self.incremental_count = 0
+        self.incremental_input = None
+        self.incremental_output = None
+
+    def _propagate_incremental(self, pre_current: np.ndarray) -> np.ndarray:
+        x = np.asarray(pre_current, dtype=np.float64)
+        b = self.pre.get_current_decay()
+        if (self.incremental_input is not None and b is not None and
+                self.incremental_count < self.recompute_every):
+            expected = self.incremental_input * b
+            changed = np.flatnonzero(x != expected)
+            if len(changed) <= self.max_changed:
+                out = self.incremental_output
+                out *= b
+                if len(changed):
+                    out += np.dot(self.weight[:, changed], x[changed] - expected[changed])
+                self.incremental_input[...] = x
+                self.incremental_count += 1
+                return out.copy()
+        out = np.dot(self.weight, x)
+        self.incremental_input = x.copy()
+        self.incremental_output = out.copy()
+        self.incremental_count = 0
+        return out
+
+    def clear_delay(self):
+        """Очистка сигналов, находящихся в пути."""
+        if self.delay is not None:
+            self.delay_buffer[...] = 0.
+            self.delay_step = 0
+            if np.ndim(self.delay) != 0:
+                self.delay_history[...] = 0.
+                self.delay_output[...] = 0.
+                self.delay_decay = None
+                self.delay_steady = len(self.delay_buffer)
+                self.delay_count = 0
+
+    def _get_weight_shape(self) -> tuple:
+        """Форма хранимых весов, для полной матрицы (post.N, pre.N)."""
+        return (self.post.N, self.pre.N)
+
     def generate_random_weight(self) -> np.ndarray:
         """Генерация случайной матрицы весов с нормальным распределением."""
         return np.random.normal(0, 1, self.weight_shape)
 
     def propagate(self, pre_current: np.ndarray) -> np.ndarray:
+        """
+        Пропускает сигнал через синапс с учетом задержек.
+        Вызывается один раз за шаг сети: буфер задержек сдвигается.
+        """
+        if self.delay is None:
+            return self._propagate(pre_current)
+        step = self.delay_step
+        self.delay_step += 1
+        if np.ndim(self.delay) == 0:
+            delayed = self.delay_buffer[step % self.delay]
+            out = self._propagate(delayed)
+            delayed[...] = pre_current
+            return out
+
+        return self._propagate_delays(step, np.asarray(pre_current, dtype=np.float64))
+
+    def _propagate_delays(self, step: int, x: np.ndarray) -> np.ndarray:
+        """Передача с задержками отдельных связей (см. _init_delay)."""
+        buffer = self.delay_buffer
+        history = self.delay_history
+        length, n_post = buffer.shape
+        h = step % length
+        b = self.pre.get_current_decay()
+        if b is None or b != self.delay_decay:
+            if not history.any():
+                # Сигналов в пути нет: рекурсия начинается заново
+                buffer[...] = 0.
+                self.delay_output[...] = 0.
+                self.delay_steady = length
+            else:
+                self.delay_steady = 0
+        else:
+            self.delay_steady += 1
+        self.delay_decay = b
+        # Без известного затухания I(t) = 0 * I(t - 1) + I(t)
+        b = 0. if b is None else b
+
+        if self.delay_incremental:
+            delta = x - b * history[(h - 1) % length]
+            changed = np.flatnonzero(delta)
+            if len(changed):
+                self.delay_scheduled += len(changed)
+                slots = (step + self.delay_columns[changed]) % length
+                contrib = (self.weight[:, changed] * delta[changed]).T
+                flat = slots * n_post + self.delay_rows[:len(changed) * n_post].reshape(slots.shape)
+                np.add.at(buffer.reshape(-1), flat.ravel(), contrib.ravel())
+        history[h] = x
+        history[h + length] = x
+
+        slot = buffer[h]
+        out = self.delay_output
+        if (self.delay_incremental and self.delay_steady >= length - 1 and
+                self.delay_count < self.delay_recompute_every):
+            out *= b
+            out += slot
+            self.delay_count += 1
+        else:
+            delayed = np.take(history, self.delay_index + h * self.pre.N)
+            out[...] = np.einsum('ij,ij->i', self.weight, delayed)
+            self.delay_count = 0
+        slot[...] = 0.
+        return out.copy()
+
+    def _propagate(self, pre_current: np.ndarray) -> np.ndarray:
         """
         Пропускает сигнал через синапс — умножает выходной вектор 
         предшествующего слоя на матрицу весов.
         """
+        if self.incremental:
+            return self._propagate_incremental(pre_current)
         return np.dot(self.weight, pre_current)
 
     def get_weight(self) -> np.ndarray:
         return self.weight
 
+    def to_dense(self) -> np.ndarray:
+        """Полная матрица весов (post.N, pre.N)."""
+        return self.weight
+
+    # Формы векторов в правилах обучения. Для полной матрицы вектор post
+    # задает строки, вектор pre - столбцы; разреженные по структуре синапсы
+    # переопределяют эти методы под форму своих весов.
+    def _post_broadcast(self, post_vector: np.ndarray) -> np.ndarray:
+        return post_vector[:, np.newaxis]
+
+    def _pre_broadcast(self, pre_vector: np.ndarray) -> np.ndarray:
+        return pre_vector
+
+    def _outer(self, post_vector: np.ndarray, pre_vector: np.ndarray) -> np.ndarray:
+        """Внешнее произведение post x pre в форме весов."""
+        return self._post_broadcast(post_vector) * self._pre_broadcast(pre_vector)
+
+    def _outer_sum(self, post_batch: np.ndarray, pre_batch: np.ndarray) -> np.ndarray:
+        """Сумма внешних произведений строк пакетов (k, post.N) и (k, pre.N)."""
+        return np.dot(post_batch.T, pre_batch)
+
+    def _writable_weight(self) -> np.ndarray:
+        """
+        Веса для записи. Веса, общие с копиями сети (Network.fork),
+        доступны только для чтения и копируются при первой записи.
+        """
+        if not self.weight.flags.writeable:
+            self.weight = self.weight.copy()
+            self.weight_shm = None
+        return self.weight
+
+    def fork(self, preNeuron, postNeuron):
+        """
+        Копия синапса между слоями preNeuron и postNeuron с общими весами.
+        Веса становятся доступны только для чтения и у исходного синапса,
+        и у копии; копируется только изменяемое состояние (следы, буферы).
+        """
+        self.weight.flags.writeable = False
+        # Без copy.copy, чтобы не переподключать общую память через __setstate__
+        clone = object.__new__(type(self))
+        clone.__dict__.update(self.__dict__)
+        clone.pre = preNeuron
+        clone.post = postNeuron
+        for key, value in self.__dict__.items():
+            if isinstance(value, np.ndarray) and key != 'weight':
+                setattr(clone, key, value.copy())
+        return clone
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.weight_shm is not None:
+            # В другой процесс передается только имя сегмента общей памяти
+            state['weight'] = shared_array_descriptor(self.weight, self.weight_shm)
+            state['weight_shm'] = True
+        return state
+
+    def __setstate__(self, state):
+        if state.get('weight_shm') is True:
+            weight, shm = attach_shared_array(state['weight'])
+            weight.flags.writeable = False
+            state['weight'] = weight
+            state['weight_shm'] = shm
+        self.__dict__.update(state)
+
+    def memory_usage(self) -> int:
+        """Объем памяти весов, следов и буферов синапса в байтах."""
+        return array_nbytes([value for key, value in self.__dict__.items()
+                             if key not in ('pre', 'post')])
+
     def update_weight(self, dt: float):
         """Обновление весов синапса (метод-заглушка)."""
         pass
 
+    def flush_weight(self):
+        """Применение отложенных изменений весов (метод-заглушка)."""
+        pass
+
     def reset_weight(self, new_weight: np.ndarray = None):
         """
         Сброс весов — либо генерация новой матрицы весов,
@@ -50,11 +333,42 @@ class Synapse:
             if new_weight.shape != self.weight_shape:
                 raise ValueError(f"Форма new_weight ({new_weight.shape}) должна совпадать с формой weight ({self.weight_shape})")
             self.weight = new_weight
+        if self.incremental:
+            # Сохраненный результат передачи относится к старым весам
+            self.incremental_input = None
+        if self.delay is not None and np.ndim(self.delay) != 0:
+            self.delay_steady = 0
     
     def check_params(self, keys: list[str]):
         for key in keys:
             if key not in self.params:
                 raise ValueError(f"В словаре params нет {key}")
+
+    def _init_threads(self):
+        """
+        Параллельное обновление весов блоками строк:
+            'Threads' (int): количество потоков, по умолчанию 1 (без потоков)
+            'BlockRows' (int): строк в блоке, по умолчанию 256
+        NumPy отпускает GIL в поэлементных операциях, поэтому блоки
+        обрабатываются потоками параллельно. Только для полной матрицы весов.
+        При Kbatch > 1 блоками строк применяется пакет в flush_weight.
+        """
+        self.threads = self.params.get('Threads', 1)
+        self.block_rows = self.params.get('BlockRows', 256)
+        if self.threads > 1 and self.weight_shape != (self.post.N, self.pre.N):
+            raise ValueError("Параллельное обновление весов поддерживается только для полной матрицы весов")
+
+    def _for_row_blocks(self, func):
+        """Вызов func(r0, r1) для блоков строк весов, в пуле потоков при Threads > 1."""
+        n_rows = self.weight_shape[0]
+        blocks = [(r0, min(r0 + self.block_rows, n_rows))
+                  for r0 in range(0, n_rows, self.block_rows)]
+        if self.threads > 1 and len(blocks) > 1:
+            # list() дожидается всех блоков и передает исключения
+            list(_thread_pool(self.threads).map(lambda b: func(*b), blocks))
+        else:
+            for r0, r1 in blocks:
+                func(r0, r1)
             
 
 class SynapseSTDP(Synapse):
@@ -68,8 +382,20 @@ class SynapseSTDP(Synapse):
         self.tay_pre = self.params['Tpre']
         self.tay_post = self.params['Tpost']
         
-        self.trace_pre = np.zeros(self.weight_shape[1])
-        self.trace_post = np.zeros(self.weight_shape[0])
+        self.trace_pre = np.zeros(self.pre.N)
+        self.trace_post = np.zeros(self.post.N)
+        
+        # Отложенное обновление весов раз в Kbatch шагов
+        self.k_batch = self.params.get('Kbatch', 1)
+        self.batch_count = 0
+        if self.k_batch > 1:
+            n_post, n_pre = self.post.N, self.pre.N
+            self.batch_spike_post = np.zeros((self.k_batch, n_post))
+            self.batch_trace_pre = np.zeros((self.k_batch, n_pre))
+            self.batch_trace_post = np.zeros((self.k_batch, n_post))
+            self.batch_spike_pre = np.zeros((self.k_batch, n_pre))
+        
+        self._init_threads()
     
     def update_weight(self, dt: float):
         """
@@ -81,10 +407,11 @@ class SynapseSTDP(Synapse):
         dw/dt = Aplus * trace_pre * dd(t-t_post) * (1-w) -
                 - Aminus * trace_post * dd(t-t_pre) * w
         
+        При Kbatch > 1 спайки и следы копятся Kbatch шагов как сомножители
+        внешних произведений, а веса меняются одним пакетом в flush_weight.
         """
         trace_pre = self.trace_pre
         trace_post = self.trace_post
-        weight = self.weight
         spike_pre = self.pre.get_spike()
         spike_post = self.post.get_spike()
         
@@ -94,8 +421,88 @@ class SynapseSTDP(Synapse):
         trace_pre += spike_pre
         trace_post += spike_post
         
-        weight += self.a_plus * dt * spike_post[:, np.newaxis] * trace_pre * (1 - weight)
-        weight -= self.a_minus * spike_pre * trace_post[:, np.newaxis] * dt * weight
+        if self.k_batch > 1:
+            j = self.batch_count
+            np.multiply(spike_post, dt, out=self.batch_spike_post[j])
+            self.batch_trace_pre[j] = trace_pre
+            np.multiply(trace_post, dt, out=self.batch_trace_post[j])
+            self.batch_spike_pre[j] = spike_pre
+            self.batch_count += 1
+            if self.batch_count == self.k_batch:
+                self.flush_weight()
+            return
+        
+        weight = self._writable_weight()
+        if self.threads > 1:
+            self._update_blocks(weight, dt, self.a_plus * dt * spike_post, trace_pre,
+                                trace_post, self.a_minus * spike_pre)
+            return
+        weight += self._outer(self.a_plus * dt * spike_post, trace_pre) * (1 - weight)
+        weight -= self._outer(trace_post, self.a_minus * spike_pre) * dt * weight
+    
+    def _update_blocks(self, weight, dt, ltp_post, trace_pre, trace_post, ltd_pre):
+        """
+        Обновление весов блоками строк в пуле потоков. Операции те же
+        и в том же порядке, что в последовательном update_weight,
+        поэтому результат совпадает побитово.
+        """
+        def update(r0, r1):
+            w = weight[r0:r1]
+            buf = np.empty(w.shape)
+            one_minus_w = np.subtract(1, w)
+            np.multiply(ltp_post[r0:r1, np.newaxis], trace_pre, out=buf)
+            np.multiply(buf, one_minus_w, out=buf)
+            np.add(w, buf, out=w)
+            np.multiply(trace_post[r0:r1, np.newaxis], ltd_pre, out=buf)
+            np.multiply(buf, dt, out=buf)
+            np.multiply(buf, w, out=buf)
+            np.subtract(w, buf, out=w)
+        self._for_row_blocks(update)
+        
+    def flush_weight(self):
+        """
+        Применение накопленных за пакет изменений весов.
+        
+        Внутри пакета вес в правой части уравнения считается равным весу
+        в начале пакета W0. Пошаговое обновление - композиция аффинных
+        отображений w -> (1 - b_t)(w + a_t (1 - w)), и для 0 <= W0 <= 1
+        ошибка пакетного обновления второго порядка:
+            |dW| <= exp(C) - 1 - C <= C^2 при C <= 1,
+            C = Sum_t dt * (Aplus * spike_post * trace_pre + Aminus * trace_post * spike_pre),
+        т.е. C <= Kbatch * dt * (Aplus * max(trace_pre) + Aminus * max(trace_post)).
+        """
+        j = self.batch_count
+        if j == 0:
+            return
+        weight = self._writable_weight()
+        if self.threads > 1:
+            self._flush_blocks(weight, j)
+            self.batch_count = 0
+            return
+        ltp = self._outer_sum(self.batch_spike_post[:j], self.batch_trace_pre[:j])
+        ltd = self._outer_sum(self.batch_trace_post[:j], self.batch_spike_pre[:j])
+        weight += self.a_plus * ltp * (1 - weight)
+        weight -= self.a_minus * ltd * weight
+        self.batch_count = 0
+
+    def _flush_blocks(self, weight, j):
+        """Применение пакета блоками строк в пуле потоков (см. flush_weight)."""
+        spike_post = self.batch_spike_post[:j]
+        trace_pre = self.batch_trace_pre[:j]
+        trace_post = self.batch_trace_post[:j]
+        spike_pre = self.batch_spike_pre[:j]
+
+        def update(r0, r1):
+            w = weight[r0:r1]
+            ltp = np.dot(spike_post[:, r0:r1].T, trace_pre)
+            ltd = np.dot(trace_post[:, r0:r1].T, spike_pre)
+            np.multiply(ltp, self.a_plus, out=ltp)
+            np.multiply(ltp, np.subtract(1, w), out=ltp)
+            np.add(w, ltp, out=w)
+            np.multiply(ltd, self.a_minus, out=ltd)
+            np.multiply(ltd, w, out=ltd)
+            np.subtract(w, ltd, out=w)
+        self._for_row_blocks(update)
 
 
 class SynapseLTPf(Synapse):
@@ -108,7 +515,17 @@ class SynapseLTPf(Synapse):
         self.tay_pre = self.params['Tpre']
         self.a_forg = self.params['Aforgetting']
         
-        self.trace_pre = np.zeros(self.weight_shape[1])
+        self.trace_pre = np.zeros(self.pre.N)
+        
+        # Отложенное обновление весов раз в Kbatch шагов
+        self.k_batch = self.params.get('Kbatch', 1)
+        self.batch_count = 0
+        if self.k_batch > 1:
+            n_post, n_pre = self.post.N, self.pre.N
+            self.batch_spike_post = np.zeros((self.k_batch, n_post))
+            self.batch_trace_pre = np.zeros((self.k_batch, n_pre))
+        
+        self._init_threads()
         
     def update_weight(self, dt: float):
         """
@@ -118,16 +535,454 @@ class SynapseLTPf(Synapse):
         dtrace_pre / dt = -trace_pre / tay_pre + Sum(dd(t-t_pre))
         
         dw/dt = (Aplus * trace_pre * (1-w) - Aforg * w) * dd(t-t_post)
+        
+        При Kbatch > 1 изменения применяются пакетом в flush_weight.
         """
         trace_pre = self.trace_pre
-        weight = self.weight
         
         trace_pre *= (1 - dt / self.tay_pre)
         trace_pre += self.pre.get_spike()
         spike_post = self.post.get_spike()
         
-        weight += (self.a_plus * trace_pre * spike_post[:, np.newaxis] * (1 - weight) - 
-                   self.a_forg * spike_post[:, np.newaxis] * weight) * dt
+        if self.k_batch > 1:
+            j = self.batch_count
+            np.multiply(spike_post, dt, out=self.batch_spike_post[j])
+            self.batch_trace_pre[j] = trace_pre
+            self.batch_count += 1
+            if self.batch_count == self.k_batch:
+                self.flush_weight()
+            return
+        
+        weight = self._writable_weight()
+        if self.threads > 1:
+            self._update_blocks(weight, dt, self.a_plus * trace_pre, spike_post,
+                                self.a_forg * spike_post)
+            return
+        spike_post = self._post_broadcast(spike_post)
+        weight += (self.a_plus * self._pre_broadcast(trace_pre) * spike_post * (1 - weight) - 
+                   self.a_forg * spike_post * weight) * dt
+    
+    def _update_blocks(self, weight, dt, ltp_pre, spike_post, forg_post):
+        """
+        Обновление весов блоками строк в пуле потоков, побитово
+        совпадает с последовательным update_weight.
+        """
+        def update(r0, r1):
+            w = weight[r0:r1]
+            buf = np.empty(w.shape)
+            forg = np.empty(w.shape)
+            np.multiply(ltp_pre, spike_post[r0:r1, np.newaxis], out=buf)
+            np.multiply(buf, np.subtract(1, w), out=buf)
+            np.multiply(forg_post[r0:r1, np.newaxis], w, out=forg)
+            np.subtract(buf, forg, out=buf)
+            np.multiply(buf, dt, out=buf)
+            np.add(w, buf, out=w)
+        self._for_row_blocks(update)
+        
+    def flush_weight(self):
+        """
+        Применение накопленных за пакет изменений весов.
+        
+        Как и в SynapseSTDP, вес внутри пакета считается равным весу в начале
+        пакета, ошибка второго порядка: |dW| <= C^2 при C <= 1,
+        C = Sum_t dt * spike_post * (Aplus * trace_pre + Aforg).
+        """
+        j = self.batch_count
+        if j == 0:
+            return
+        weight = self._writable_weight()
+        if self.threads > 1:
+            self._flush_blocks(weight, j)
+            self.batch_count = 0
+            return
+        ltp = self._outer_sum(self.batch_spike_post[:j], self.batch_trace_pre[:j])
+        forg = self._post_broadcast(self.batch_spike_post[:j].sum(axis=0))
+        weight += self.a_plus * ltp * (1 - weight) - self.a_forg * forg * weight
+        self.batch_count = 0
+
+    def _flush_blocks(self, weight, j):
+        """Применение пакета блоками строк в пуле потоков (см. flush_weight)."""
+        spike_post = self.batch_spike_post[:j]
+        trace_pre = self.batch_trace_pre[:j]
+
+        def update(r0, r1):
+            w = weight[r0:r1]
+            ltp = np.dot(spike_post[:, r0:r1].T, trace_pre)
+            forg = spike_post[:, r0:r1].sum(axis=0)[:, np.newaxis]
+            np.multiply(ltp, self.a_plus, out=ltp)
+            np.multiply(ltp, np.subtract(1, w), out=ltp)
+            np.multiply(forg, self.a_forg, out=forg)
+            np.subtract(ltp, np.multiply(forg, w), out=ltp)
+            np.add(w, ltp, out=w)
+        self._for_row_blocks(update)
+
+
+class OneToOneSynapse(Synapse):
+    """
+    Синапс один к одному: нейрон i слоя pre связан только с нейроном i
+    слоя post. Хранится только диагональ весов (N,), передача O(N).
+    """
+    def __init__(self, name: str, preNeuron, postNeuron,
+                 weight: np.ndarray = None, params = None):
+        if preNeuron.N != postNeuron.N:
+            raise ValueError(f"Количества нейронов слоев ({preNeuron.N} и {postNeuron.N}) должны совпадать")
+        super().__init__(name, preNeuron, postNeuron, weight, params)
+
+    def _get_weight_shape(self) -> tuple:
+        return (self.post.N,)
+
+    def _propagate(self, pre_current: np.ndarray) -> np.ndarray:
+        return self.weight * pre_current
+
+    def to_dense(self) -> np.ndarray:
+        return np.diag(self.weight)
+
+    def _post_broadcast(self, post_vector: np.ndarray) -> np.ndarray:
+        return post_vector
+
+    def _outer_sum(self, post_batch: np.ndarray, pre_batch: np.ndarray) -> np.ndarray:
+        return np.einsum('ki,ki->i', post_batch, pre_batch)
+
+
+class OneToOneSynapseSTDP(OneToOneSynapse, SynapseSTDP):
+    """Синапс один к одному с обучением STDP (параметры как у SynapseSTDP)."""
+
+
+class OneToOneSynapseLTPf(OneToOneSynapse, SynapseLTPf):
+    """Синапс один к одному с обучением LTPf (параметры как у SynapseLTPf)."""
+
+
+class BlockDiagonalSynapse(Synapse):
+    """
+    Блочно-диагональный синапс: слои делятся на nb равных групп подряд
+    идущих нейронов, группа b слоя pre связана только с группой b слоя post.
+    Хранятся только блоки весов (nb, post.N / nb, pre.N / nb),
+    передача O(N^2 / nb).
+    """
+    def __init__(self, name: str, preNeuron, postNeuron,
+                 weight: np.ndarray = None, params = None):
+        """
+        weight: блоки весов формы (nb, post.N / nb, pre.N / nb)
+        params (dict):
+            'Blocks' (int): количество блоков, если weight не задан
+        """
+        if weight is not None:
+            if weight.ndim != 3:
+                raise ValueError(f"Веса блочно-диагонального синапса должны иметь форму (nb, n_post, n_pre), задано {weight.shape}")
+            self.num_blocks = weight.shape[0]
+        elif params is not None and 'Blocks' in params:
+            self.num_blocks = params['Blocks']
+        else:
+            raise ValueError("Для BlockDiagonalSynapse нужно задать weight или Blocks")
+        nb = self.num_blocks
+        if preNeuron.N % nb or postNeuron.N % nb:
+            raise ValueError(f"Количества нейронов слоев ({preNeuron.N} и {postNeuron.N}) не делятся на {nb} блоков")
+        super().__init__(name, preNeuron, postNeuron, weight, params)
+
+    def _get_weight_shape(self) -> tuple:
+        nb = self.num_blocks
+        return (nb, self.post.N // nb, self.pre.N // nb)
+
+    def _propagate(self, pre_current: np.ndarray) -> np.ndarray:
+        x = np.reshape(pre_current, (self.num_blocks, -1, 1))
+        return np.matmul(self.weight, x).reshape(self.post.N)
+
+    def to_dense(self) -> np.ndarray:
+        nb, n_post, n_pre = self.weight_shape
+        dense = np.zeros((self.post.N, self.pre.N), dtype=self.weight.dtype)
+        for b in range(nb):
+            dense[b * n_post:(b + 1) * n_post, b * n_pre:(b + 1) * n_pre] = self.weight[b]
+        return dense
+
+    def _post_broadcast(self, post_vector: np.ndarray) -> np.ndarray:
+        return post_vector.reshape(self.num_blocks, -1, 1)
+
+    def _pre_broadcast(self, pre_vector: np.ndarray) -> np.ndarray:
+        return pre_vector.reshape(self.num_blocks, 1, -1)
+
+    def _outer_sum(self, post_batch: np.ndarray, pre_batch: np.ndarray) -> np.ndarray:
+        k = len(post_batch)
+        nb = self.num_blocks
+        return np.einsum('kbi,kbj->bij', post_batch.reshape(k, nb, -1),
+                         pre_batch.reshape(k, nb, -1))
+
+
+class BlockDiagonalSynapseSTDP(BlockDiagonalSynapse, SynapseSTDP):
+    """Блочно-диагональный синапс с обучением STDP."""
+
+
+class BlockDiagonalSynapseLTPf(BlockDiagonalSynapse, SynapseLTPf):
+    """Блочно-диагональный синапс с обучением LTPf."""
+
+
+def quantize_weight(weight: np.ndarray, bits: int = 8):
+    """
+    Симметричное квантование весов по строкам:
+        weight[i, j] ~= q[i, j] * scale[i],  scale[i] = max_j |weight[i, j]| / qmax,
+    qmax = 127 для 8 бит, 32767 для 16 бит.
+    Возвращает (q, scale), q типа int8/int16, scale типа float32.
+    """
+    if bits == 8:
+        dtype = np.int8
+    elif bits == 16:
+        dtype = np.int16
+    else:
+        raise ValueError(f"Поддерживается квантование в 8 или 16 бит, задано {bits}")
+    qmax = np.iinfo(dtype).max
+    weight = np.asarray(weight, dtype=np.float64)
+    scale = np.max(np.abs(weight), axis=1) / qmax
+    scale[scale == 0] = 1.
+    q = np.rint(weight / scale[:, np.newaxis]).astype(dtype)
+    return q, scale.astype(np.float32)
+
+
+class QuantizedSynapse(Synapse):
+    """
+    Замороженный синапс для прогонов без обучения. Веса хранятся в int8
+    или int16 с масштабом на каждую строку (см. quantize_weight), что
+    в 4-8 раз меньше float64. Передача считается блоками строк: блок
+    целых весов приводится к float32 в заранее выделенный буфер,
+    умножается на вход, а деквантование сводится к умножению результата
+    на масштабы строк.
+    """
+    def __init__(self, name: str, preNeuron, postNeuron,
+                 weight: np.ndarray = None, params = None):
+        """
+        weight: веса в плавающей точке (post.N, pre.N), квантуются при создании
+        params (dict):
+            'Bits' (int): 8 или 16, по умолчанию 8
+            'BlockRows' (int): количество строк в блоке передачи, по умолчанию 256
+        """
+        params = {} if params is None else params
+        self.bits = params.get('Bits', 8)
+        self.block_rows = params.get('BlockRows', 256)
+        super().__init__(name, preNeuron, postNeuron, weight, params)
+        self._quantize()
+
+    @classmethod
+    def from_synapse(cls, synapse: Synapse, name: str = None, bits: int = 8,
+                     block_rows: int = 256):
+        """Квантованная копия обученного синапса (любого типа с to_dense)."""
+        synapse.flush_weight()
+        return cls(synapse.name if name is None else name, synapse.pre, synapse.post,
+                   weight=np.array(synapse.to_dense(), dtype=np.float64),
+                   params={'Bits': bits, 'BlockRows': block_rows})
+
+    def _quantize(self):
+        self.weight, self.scale = quantize_weight(self.weight, self.bits)
+        self.block_buffer = np.empty((min(self.block_rows, self.post.N), self.pre.N),
+                                     dtype=np.float32)
+        self.weight_shm = None
+
+    def reset_weight(self, new_weight: np.ndarray = None):
+        super().reset_weight(new_weight)
+        self._quantize()
+
+    def _propagate(self, pre_current: np.ndarray) -> np.ndarray:
+        x = np.asarray(pre_current, dtype=np.float32)
+        out = np.empty(self.post.N)
+        buffer = self.block_buffer
+        for r0 in range(0, self.post.N, self.block_rows):
+            r1 = min(r0 + self.block_rows, self.post.N)
+            block = buffer[:r1 - r0]
+            np.copyto(block, self.weight[r0:r1], casting='unsafe')
+            out[r0:r1] = np.dot(block, x) * self.scale[r0:r1]
+        return out
+
+    def get_weight(self) -> np.ndarray:
+        """Деквантованные веса (копия в float64)."""
+        return self.to_dense()
+
+    def to_dense(self) -> np.ndarray:
+        return self.weight * self.scale[:, np.newaxis].astype(np.float64)
+
+    def accuracy_report(self, weight: np.ndarray, inputs: np.ndarray = None) -> dict:
+        """
+        Точность квантования относительно весов weight в плавающей точке.
+
+        inputs: входы pre формы (k, pre.N) для оценки ошибки передачи,
+                по умолчанию 16 случайных векторов из [0, 1)
+
+        Возвращает словарь:
+            max_abs_error, rms_error - ошибки весов
+            max_rel_error - максимальная ошибка весов относительно max |w| строки
+            propagate_rel_error - ||W_q x - W x|| / ||W x||, худший по входам
+            memory_float, memory_quantized - объем весов в байтах
+        """
+        weight = np.asarray(weight, dtype=np.float64)
+        if weight.shape != self.weight_shape:
+            raise ValueError(f"Форма weight ({weight.shape}) должна совпадать с формой весов ({self.weight_shape})")
+        error = self.to_dense() - weight
+        row_max = np.max(np.abs(weight), axis=1)
+        row_max[row_max == 0] = 1.
+        if inputs is None:
+            inputs = np.random.default_rng(0).random((16, self.pre.N))
+        inputs = np.atleast_2d(inputs)
+        exact = inputs @ weight.T
+        approx = np.array([self._propagate(x) for x in inputs])
+        norm = np.linalg.norm(exact, axis=1)
+        norm[norm == 0] = 1.
+        return {'max_abs_error': float(np.max(np.abs(error))),
+                'rms_error': float(np.sqrt(np.mean(error**2))),
+                'max_rel_error': float(np.max(np.abs(error) / row_max[:, np.newaxis])),
+                'propagate_rel_error': float(np.max(np.linalg.norm(approx - exact, axis=1) / norm)),
+                'memory_float': weight.nbytes,
+                'memory_quantized': self.weight.nbytes + self.scale.nbytes}
+
+
+def _as_tuple(value, ndim: int) -> tuple:
+    if hasattr(value, '__len__'):
+        if len(value) != ndim:
+            raise ValueError(f"Параметр {value} должен иметь {ndim} значений")
+        return tuple(int(v) for v in value)
+    return (int(value),) * ndim
+
+
+class ConvSynapse(Synapse):
+    """
+    Сверточный синапс: одно ядро весов, общее для всех позиций.
+    Слои рассматриваются как 1-D или 2-D решетки, выход post в позиции o
+    равен Sum_j kernel[j] * pre[o * stride + j - padding] (взаимная
+    корреляция, как в сверточных сетях, вне решетки pre - нули).
+    Хранится только ядро: память O(k) вместо O(N^2), передача O(N * k).
+    """
+    def __init__(self, name: str, preNeuron, postNeuron,
+                 weight: np.ndarray = None, params = None):
+        """
+        weight: ядро свертки формы KernelShape
+        params (dict):
+            'InShape' (tuple): форма решетки pre, по умолчанию (pre.N,)
+            'KernelShape' (tuple): форма ядра, если weight не задан
+            'Stride' (int или tuple): шаг свертки, по умолчанию 1
+            'Padding' (int или tuple): дополнение нулями с каждой стороны, по умолчанию 0
+            'Method' (str): 'direct' - прямая свертка, 'fft' - через БПФ
+        """
+        params = {} if params is None else params
+        self.in_shape = tuple(params.get('InShape', (preNeuron.N,)))
+        if np.prod(self.in_shape) != preNeuron.N:
+            raise ValueError(f"Форма InShape {self.in_shape} не соответствует количеству нейронов pre ({preNeuron.N})")
+        ndim = len(self.in_shape)
+        if weight is not None:
+            kernel_shape = weight.shape
+        elif 'KernelShape' in params:
+            kernel_shape = params['KernelShape']
+        else:
+            raise ValueError("Для ConvSynapse нужно задать weight или KernelShape")
+        self.kernel_shape = _as_tuple(kernel_shape, ndim)
+        self.stride = _as_tuple(params.get('Stride', 1), ndim)
+        self.padding = _as_tuple(params.get('Padding', 0), ndim)
+        self.method = params.get('Method', 'direct')
+        if self.method not in ('direct', 'fft'):
+            raise ValueError(f"Неизвестный метод свертки {self.method}")
+
+        self.out_shape = tuple((n + 2 * p - k) // s + 1 for n, k, s, p in
+                               zip(self.in_shape, self.kernel_shape, self.stride, self.padding))
+        if min(self.out_shape) < 1 or np.prod(self.out_shape) != postNeuron.N:
+            raise ValueError(f"Выход свертки формы {self.out_shape} не соответствует количеству нейронов post ({postNeuron.N})")
+
+        super().__init__(name, preNeuron, postNeuron, weight, params)
+
+    def _get_weight_shape(self) -> tuple:
+        return self.kernel_shape
+
+    def _pad(self, x: np.ndarray) -> np.ndarray:
+        """Решетка pre формы (..., *in_shape) с дополнением нулями."""
+        x = x.reshape(x.shape[:-1] + self.in_shape)
+        if any(self.padding):
+            pad = [(0, 0)] * (x.ndim - len(self.in_shape)) + [(p, p) for p in self.padding]
+            x = np.pad(x, pad)
+        return x
+
+    def _windows(self, x: np.ndarray) -> np.ndarray:
+        """Виды окон ядра (..., *out_shape, *kernel_shape) без копирования."""
+        ndim = len(self.in_shape)
+        axes = tuple(range(x.ndim - ndim, x.ndim))
+        windows = np.lib.stride_tricks.sliding_window_view(x, self.kernel_shape, axis=axes)
+        index = (Ellipsis,) + tuple(slice(None, None, s) for s in self.stride) + (slice(None),) * ndim
+        return windows[index]
+
+    def _correlate(self, x: np.ndarray) -> np.ndarray:
+        """Свертка пачки входов формы (..., pre.N), результат (..., post.N)."""
+        ndim = len(self.in_shape)
+        lead = x.shape[:-1]
+        xp = self._pad(x)
+        if self.method == 'direct':
+            out = np.tensordot(self._windows(xp), self.weight, axes=ndim)
+        else:
+            # Корреляция = свертка с перевернутым ядром, берется "valid" часть
+            axes = tuple(range(xp.ndim - ndim, xp.ndim))
+            size = tuple(n + k - 1 for n, k in zip(xp.shape[-ndim:], self.kernel_shape))
+            kernel = self.weight[(slice(None, None, -1),) * ndim]
+            full = np.fft.irfftn(np.fft.rfftn(xp, size, axes=axes) *
+                                 np.fft.rfftn(kernel, size, axes=tuple(range(ndim))),
+                                 size, axes=axes)
+            index = (Ellipsis,) + tuple(slice(k - 1, k - 1 + (o - 1) * s + 1, s) for k, o, s in
+                                        zip(self.kernel_shape, self.out_shape, self.stride))
+            out = full[index]
+        return out.reshape(lead + (self.post.N,))
+
+    def _propagate(self, pre_current: np.ndarray) -> np.ndarray:
+        return self._correlate(np.asarray(pre_current, dtype=np.float64))
+
+    def to_dense(self) -> np.ndarray:
+        """Эквивалентная полная матрица весов (post.N, pre.N)."""
+        return self._correlate(np.eye(self.pre.N)).T
+
+
+class ConvSynapseSTDP(ConvSynapse):
+    """
+    Сверточный синапс с обучением STDP общего ядра. За один шаг части
+    LTP и LTD изменения ядра - средние по позициям выхода таких же частей
+    правила SynapseSTDP для весов полной матрицы (to_dense); позиции, где
+    элемент ядра попадает на дополнение нулями, дают нулевой вклад.
+    Ядро накапливает эти средние, поэтому за много шагов оно следует
+    за полной матрицей SynapseSTDP лишь приближенно. В отличие от
+    SynapseSTDP, след post затухает с постоянной Tpost.
+    """
+    def __init__(self, name: str, preNeuron, postNeuron,
+                 weight: np.ndarray = None, params = None):
+        super().__init__(name, preNeuron, postNeuron, weight, params)
+
+        self.check_params(['Aplus', 'Aminus', 'Tpre', 'Tpost'])
+        self.a_plus = self.params['Aplus']
+        self.a_minus = self.params['Aminus']
+        self.tay_pre = self.params['Tpre']
+        self.tay_post = self.params['Tpost']
+
+        self.trace_pre = np.zeros(self.pre.N)
+        self.trace_post = np.zeros(self.post.N)
+
+    def update_weight(self, dt: float):
+        """
+        Обновление ядра:
+        dk_j/dt = Aplus * <trace_pre(o*s+j) * dd(t-t_post(o))>_o * (1-k_j) -
+                  - Aminus * <trace_post(o) * dd(t-t_pre(o*s+j))>_o * k_j
+        <>_o - среднее по позициям выхода.
+        """
+        trace_pre = self.trace_pre
+        trace_post = self.trace_post
+        spike_pre = self.pre.get_spike()
+        spike_post = self.post.get_spike()
+
+        trace_pre *= (1 - dt / self.tay_pre)
+        trace_post *= (1 - dt / self.tay_post)
+
+        trace_pre += spike_pre
+        trace_post += spike_post
+
+        if not (np.any(spike_post) or np.any(spike_pre)):
+            return
+
+        ndim = len(self.in_shape)
+        n_pos = self.post.N
+        ltp = np.tensordot(spike_post.reshape(self.out_shape).astype(np.float64),
+                           self._windows(self._pad(trace_pre)), axes=ndim) / n_pos
+        ltd = np.tensordot(trace_post.reshape(self.out_shape),
+                           self._windows(self._pad(spike_pre.astype(np.float64))), axes=ndim) / n_pos
+
+        weight = self._writable_weight()
+        weight += self.a_plus * dt * ltp * (1 - weight)
+        weight -= self.a_minus * dt * ltd * weight
         
         
 # if __name__ == '__main__':
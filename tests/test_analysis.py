@@ -0,0 +1,81 @@
+import unittest
+import numpy as np
+from src.neuron import Neuron
+from src.monitor import MonitorSpike, MonitorSpikePacked
+from src.analysis import (spike_counts, binned_rates, interspike_intervals, fano_factor,
+                      correlograms, population_synchrony, spike_events)
+
+
+class TestAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        self.neuron = Neuron('layer', 6, params)
+        rng = np.random.default_rng(0)
+        self.spikes = rng.random((1000, 6)) < 0.1
+        self.monitor = MonitorSpike('S', self.neuron)
+        self.packed = MonitorSpikePacked('P', self.neuron)
+        for S in self.spikes:
+            self.neuron.S = S
+            self.monitor.collect()
+            self.packed.collect()
+
+    def test_counts_and_rates(self):
+        for source in (self.monitor, self.packed):
+            np.testing.assert_array_equal(spike_counts(source, 'layer', chunk_steps=77),
+                                          self.spikes.sum(axis=0))
+            rates = binned_rates(source, 'layer', dt=0.5, bin_steps=30, chunk_steps=100)
+            expected = self.spikes[:990].reshape(33, 30, 6).sum(axis=1) / 15.
+            np.testing.assert_allclose(rates, expected)
+
+        # Пустые данные дают нули, а не None
+        empty = MonitorSpikePacked('E', self.neuron)
+        for source in (empty, MonitorSpike('E', self.neuron)):
+            np.testing.assert_array_equal(spike_counts(source, 'layer'), np.zeros(6, dtype=int))
+        np.testing.assert_array_equal(spike_counts(np.zeros((0, 6), dtype=bool)), np.zeros(6))
+        self.assertEqual(spike_counts([]).shape, (0,))
+
+    def test_isi(self):
+        isi, neuron = interspike_intervals(self.packed, 'layer', dt=2.)
+        for n in range(6):
+            expected = np.diff(np.flatnonzero(self.spikes[:, n])) * 2.
+            np.testing.assert_array_equal(np.sort(isi[neuron == n]), np.sort(expected))
+
+    def test_fano_factor(self):
+        counts = self.spikes.reshape(10, 100, 6).sum(axis=1)
+        np.testing.assert_allclose(fano_factor(self.spikes, bin_steps=100),
+                                   counts.var(axis=0) / counts.mean(axis=0))
+
+    def test_correlograms(self):
+        lags, C = correlograms(self.packed, 'layer', max_lag=5)
+        x = self.spikes.astype(int)
+        for k, lag in enumerate(lags):
+            for i, j in [(0, 1), (2, 2), (5, 3)]:
+                if lag >= 0:
+                    expected = np.sum(x[:len(x) - lag, i] * x[lag:, j])
+                else:
+                    expected = np.sum(x[-lag:, i] * x[:len(x) + lag, j])
+                self.assertEqual(C[k, i, j], expected)
+        _, C_pairs = correlograms(self.packed, 'layer', max_lag=5, pairs=[(0, 1), (5, 3)])
+        np.testing.assert_array_equal(C_pairs[:, 1], C[:, 5, 3])
+        # Обработка по одной строке и одной паре дает тот же результат
+        _, C_chunked = correlograms(self.packed, 'layer', max_lag=5, chunk_bytes=1)
+        np.testing.assert_array_equal(C_chunked, C)
+        _, C_pairs_chunked = correlograms(self.packed, 'layer', max_lag=5,
+                                          pairs=[(0, 1), (5, 3)], chunk_bytes=1)
+        np.testing.assert_array_equal(C_pairs_chunked, C_pairs)
+
+    def test_population_synchrony(self):
+        synchronous = np.repeat(self.spikes[:, :1], 6, axis=1)
+        self.assertAlmostEqual(population_synchrony(synchronous), 1.)
+        self.assertLess(population_synchrony(self.packed, 'layer', chunk_steps=128), 0.6)
+
+    def test_events(self):
+        steps, indices = spike_events(self.monitor, 'layer', chunk_steps=64)
+        expected = np.nonzero(self.spikes)
+        np.testing.assert_array_equal(steps, expected[0])
+        np.testing.assert_array_equal(indices, expected[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.cache import InputCache, cache_key
+
+
+class TestInputCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_get_or_create(self):
+        cache = InputCache(self.tmp.name)
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return np.arange(10.)
+
+        params = {'kind': 'test', 'seed': 1, 'rates': np.array([1., 2.])}
+        first = cache.get_or_create(params, factory)
+        second = cache.get_or_create(dict(params), factory)
+        self.assertEqual(len(calls), 1)
+        self.assertIsInstance(second, np.memmap)
+        np.testing.assert_array_equal(first, second)
+
+        cache.get_or_create(dict(params, seed=2), factory)
+        self.assertEqual(len(calls), 2)
+        self.assertNotEqual(cache_key(params), cache_key(dict(params, rates=np.array([1., 3.]))))
+
+    def test_lru_eviction(self):
+        entry = np.zeros(1000)
+        cache = InputCache(self.tmp.name, max_bytes=int(2.5 * entry.nbytes))
+        for seed in range(2):
+            cache.get_or_create({'seed': seed}, lambda: entry)
+            # Разное время изменения файлов
+            path = cache._path(cache_key({'seed': seed}))
+            os.utime(path, ns=(seed * 10**9, seed * 10**9))
+        # Обращение делает запись 0 самой свежей
+        self.assertIsNotNone(cache.get(cache_key({'seed': 0})))
+        cache.get_or_create({'seed': 2}, lambda: entry)
+        self.assertIsNone(cache.get(cache_key({'seed': 1})))
+        self.assertIsNotNone(cache.get(cache_key({'seed': 0})))
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from src import data_io
+from src.data_io import (convert_text_to_npy, load_text_cached, text_cache_paths,
+                         EMGSignalStateImporterFromFile)
+from src.pipeline import emg_envelope_pipeline
+from src.cache import InputCache
+
+
+class TestTextCache(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = os.path.join(tmp.name, 'emg.txt')
+        rng = np.random.default_rng(0)
+        self.data = rng.normal(size=(1037, 3))
+        np.savetxt(self.source, self.data)
+
+    def test_chunked_conversion(self):
+        # Кусков больше одного, последний неполный
+        path = convert_text_to_npy(self.source, chunk_rows=100)
+        np.testing.assert_array_equal(np.load(path), np.loadtxt(self.source))
+        self.assertFalse(os.path.exists(path + '.raw'))
+
+        with open(self.source, 'a') as f:
+            f.write('1.0 2.0\n')
+        with self.assertRaises(ValueError):
+            convert_text_to_npy(self.source, chunk_rows=100)
+        open(self.source, 'w').close()
+        with self.assertRaises(ValueError):
+            convert_text_to_npy(self.source)
+
+    def test_cache_reuse_and_invalidation(self):
+        expected = np.loadtxt(self.source)
+        np.testing.assert_array_equal(load_text_cached(self.source, chunk_rows=100), expected)
+        with mock.patch.object(data_io, 'convert_text_to_npy',
+                               wraps=data_io.convert_text_to_npy) as convert:
+            load_text_cached(self.source)
+            convert.assert_not_called()
+
+            # Другое время изменения при том же размере
+            stat = os.stat(self.source)
+            os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            load_text_cached(self.source)
+            self.assertEqual(convert.call_count, 1)
+
+            # Другой размер
+            with open(self.source, 'a') as f:
+                f.write('7.0 8.0 9.0\n')
+            data = load_text_cached(self.source)
+            self.assertEqual(convert.call_count, 2)
+        self.assertEqual(data.shape, (1038, 3))
+        np.testing.assert_array_equal(data[-1], [7., 8., 9.])
+        self.assertTrue(all(os.path.exists(p) for p in text_cache_paths(self.source)))
+
+    def test_slice_from_memmap(self):
+        part = load_text_cached(self.source, 10, 500, 7, chunk_rows=128)
+        self.assertIsInstance(part, np.memmap)
+        np.testing.assert_array_equal(part, np.loadtxt(self.source)[10:500:7])
+        np.testing.assert_array_equal(load_text_cached(self.source, stop=5),
+                                      np.loadtxt(self.source)[:5])
+
+
+class TestEMGImporter(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.source = os.path.join(tmp.name, 'emg.txt')
+        rng = np.random.default_rng(1)
+        n = 2001
+        time = np.arange(n) * 1e-3
+        state = (np.arange(n) // 500) % 2
+        np.savetxt(self.source, np.column_stack((time, rng.normal(size=n), state)))
+        self.params = {'signal_scaler': 1., 'time_scaler': 1., 'lowcut': 20., 'highcut': 200.,
+                       'start': None, 'stop': None, 'step': None}
+
+    def importer(self):
+        importer = EMGSignalStateImporterFromFile(self.source, self.params)
+        importer.import_data()
+        return importer
+
+    def test_streaming_shapes(self):
+        full = self.importer()
+        full.preprocess()
+        streamed = self.importer()
+        streamed.preprocess_streaming(block_size=300)
+        for key in ('time', 'signal', 'state'):
+            self.assertEqual(getattr(streamed, key).shape, getattr(full, key).shape)
+
+        # Прореживание сохраняет согласованность времени, сигнала и состояния
+        decimated = self.importer()
+        decimated.preprocess_streaming(emg_envelope_pipeline(20., 200., 1000., decimation=4),
+                                       block_size=300)
+        self.assertEqual(len(decimated.signal), len(full.time[::4]))
+        np.testing.assert_array_equal(decimated.time, full.time[::4])
+        np.testing.assert_array_equal(decimated.state, full.state[::4])
+        self.assertAlmostEqual(decimated.dt, 4 * full.dt)
+
+    def test_cached_preprocess_is_writable(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.params['input_cache'] = InputCache(tmp)
+            first = self.importer()
+            first.preprocess()
+            second = self.importer()
+            second.preprocess()
+        np.testing.assert_array_equal(second.signal, first.signal)
+        second.signal *= 2.
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+from src.encoders import (poisson_intervals_matrix, dense_to_events, events_to_dense,
+                      PoissonEncoder, DeltaEncoder, LatencyEncoder, PopulationEncoder)
+
+
+class TestEncoders(unittest.TestCase):
+
+    def test_poisson_intervals_matrix(self):
+        lambdas = np.array([0., 5., 50.])
+        out = poisson_intervals_matrix(20000, lambdas, seed=0)
+        self.assertEqual(out.shape, (20000, 3))
+        self.assertTrue(np.all(out[0] == 0))
+        # Без пропусков при lambda = 0
+        self.assertTrue(np.all(out[1:, 0] == 1))
+        for n, lb in enumerate(lambdas[1:], start=1):
+            gaps = np.diff(np.flatnonzero(out[:, n]))
+            self.assertTrue(np.all(gaps >= 1))
+            self.assertAlmostEqual(gaps.mean(), lb + 1, delta=0.1 * (lb + 1))
+
+    def test_events_roundtrip(self):
+        dense = PoissonEncoder(1., seed=1).encode(np.full((100, 7), 0.2))
+        times, indices = dense_to_events(dense)
+        np.testing.assert_array_equal(events_to_dense(times, indices, 100, 7), dense)
+        self.assertAlmostEqual(dense.mean(), 0.2, delta=0.05)
+
+    def test_delta_encoder_streaming(self):
+        signal = np.sin(np.linspace(0, 10, 500))[:, np.newaxis] * [1., 2.]
+        whole = DeltaEncoder(0.1).encode(signal)
+        encoder = DeltaEncoder(0.1)
+        streamed = np.vstack([encoder.encode(signal[:123]), encoder.encode(signal[123:])])
+        np.testing.assert_array_equal(streamed, whole)
+        # Медленный сигнал: ON - OFF восстанавливает уровень квантования
+        level = np.cumsum(whole[:, :2].astype(int) - whole[:, 2:], axis=0)
+        expected = np.floor(signal / 0.1) - np.floor(signal[0] / 0.1)
+        np.testing.assert_array_equal(level, expected)
+
+    def test_latency_encoder(self):
+        out = LatencyEncoder(10).encode(np.array([[1., 0.5, 0.]]))
+        self.assertEqual(out.shape, (10, 3))
+        np.testing.assert_array_equal(np.argmax(out, axis=0)[:2], [0, 4])
+        self.assertFalse(np.any(out[:, 2]))
+
+    def test_population_encoder(self):
+        out = PopulationEncoder(np.linspace(0, 1, 5), 0.1).encode(np.array([0., 1.]))
+        self.assertEqual(out.shape, (2, 5))
+        np.testing.assert_array_equal(np.argmax(out, axis=1), [0, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
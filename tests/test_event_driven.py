@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from src.neuron import LIFNeuron
+from src.synapse import Synapse, SynapseSTDP
+from src.network import Network
+from src.monitor import MonitorSpike
+from src.event_driven import EventDrivenRunner
+
+
+def build_network(seed):
+    rng = np.random.default_rng(seed)
+    params_in = {
+        'Ustart': 0., 'Istart': 0., 'Sstart': False,
+        'Utay': 10., 'Uth': 1., 'Urest': 0.,
+        'Itay': 5., 'Imax': 1.
+    }
+    params_out = {
+        'Ustart': 0., 'Istart': 0., 'Sstart': False,
+        'Utay': np.linspace(20., 40., 4), 'Uth': 1., 'Urest': 0.,
+        'Itay': 50., 'Imax': 1.
+    }
+    net = Network()
+    layer_in = LIFNeuron('input', 6, params_in)
+    layer_out = LIFNeuron('output', 4, params_out)
+    net.add_neurons([layer_in, layer_out])
+    net.add_synapse(Synapse('in_out', layer_in, layer_out,
+                            weight=rng.uniform(0., 0.4, (4, 6))))
+    return net
+
+
+class TestEventDriven(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.t_steps = 2000
+        # Редкие входные спайки
+        self.inputs = {'input': 1.5 * (rng.random((self.t_steps, 6)) < 0.01)}
+
+    def test_equivalent_to_clocked(self):
+        dt = 1.
+        net_clocked = build_network(1)
+        monitor = MonitorSpike('S', list(net_clocked.neurons.values()))
+        net_clocked.add_monitor(monitor)
+        net_clocked.run(dt, self.inputs)
+
+        net_event = build_network(1)
+        runner = EventDrivenRunner(net_event)
+        spikes = runner.run(dt, self.inputs)
+
+        for name in net_clocked.neurons:
+            expected = [(t, i) for t, ind in enumerate(monitor.get_data(name)) for i in ind]
+            self.assertTrue(len(expected) > 0)
+            self.assertEqual([tuple(row) for row in spikes[name]], expected)
+            np.testing.assert_allclose(net_event.neurons[name].get_potential(),
+                                       net_clocked.neurons[name].get_potential(),
+                                       rtol=1e-9, atol=1e-12)
+            np.testing.assert_allclose(net_event.neurons[name].get_current(),
+                                       net_clocked.neurons[name].get_current(),
+                                       rtol=1e-9, atol=1e-12)
+        # Большая часть шагов пропущена
+        self.assertGreater(runner.skipped_steps, runner.clocked_steps)
+
+    def test_plastic_synapse_rejected(self):
+        net = build_network(2)
+        params_syn = {'Aplus': 0.01, 'Aminus': 0.01, 'Tpre': 20, 'Tpost': 20}
+        net.add_synapse(SynapseSTDP('plastic', net.neurons['input'], net.neurons['output'],
+                                    params=params_syn))
+        with self.assertRaises(ValueError):
+            EventDrivenRunner(net)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODE = """
+import sys
+import src.network, src.parallel, src.data_io, src.data_io_new, src.analysis
+print(','.join(m for m in ('matplotlib', 'scipy') if m in sys.modules))
+"""
+
+
+class TestImports(unittest.TestCase):
+
+    def test_core_import_is_headless(self):
+        # Ядро не должно загружать графический стек и scipy при импорте
+        out = subprocess.run([sys.executable, '-c', CODE], capture_output=True,
+                             text=True, check=True, cwd=ROOT).stdout.strip()
+        self.assertEqual(out, '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import tempfile
+import unittest
+import warnings
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+import numpy as np
+from src.neuron import Neuron
+from src.synapse import Synapse
+from src.monitor import (MonitorSpike, MonitorSpikePacked, MonitorRate, MonitorPotential,
+                         MonitorWeigts, load_packed_spikes, unpack_spikes,
+                         _minmax_decimate, _decimate_image, _pixel_width)
+
+
+class TestMonitorSpikePacked(unittest.TestCase):
+
+    def setUp(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        self.neuron = Neuron('layer', 13, params)
+        rng = np.random.default_rng(0)
+        self.spikes = rng.random((100, 13)) < 0.2
+
+    def run_monitors(self, *monitors):
+        for S in self.spikes:
+            self.neuron.S = S
+            for monitor in monitors:
+                monitor.collect()
+
+    def test_same_data_as_list_monitor(self):
+        monitor = MonitorSpike('S', self.neuron)
+        packed = MonitorSpikePacked('P', self.neuron, capacity=8)
+        self.assertEqual(packed.get_data('layer'), monitor.get_data('layer'))
+        self.run_monitors(monitor, packed)
+        self.assertEqual(len(packed.get_data('layer')), len(monitor.get_data('layer')))
+
+        np.testing.assert_array_equal(packed.get_window('layer'), self.spikes)
+        np.testing.assert_array_equal(packed.get_window('layer', 10, 20), self.spikes[10:20])
+        for expected, actual in zip(monitor.get_data('layer'), packed.get_data('layer')):
+            self.assertEqual(expected, list(actual))
+        self.assertEqual(packed.get_packed('layer').shape, (100, 2))
+
+    def test_ring_buffer(self):
+        packed = MonitorSpikePacked('P', self.neuron, max_points=30)
+        self.run_monitors(packed)
+        np.testing.assert_array_equal(packed.get_window('layer'), self.spikes[-30:])
+
+    def test_save_load(self):
+        packed = MonitorSpikePacked('P', self.neuron)
+        self.run_monitors(packed)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'spikes.npz')
+            packed.save(path)
+            data, sizes = load_packed_spikes(path)
+        self.assertEqual(sizes, {'layer': 13})
+        np.testing.assert_array_equal(unpack_spikes(data['layer'], 13), self.spikes)
+
+
+class TestMonitorRate(unittest.TestCase):
+
+    def test_window_and_exp_rates(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        neuron = Neuron('layer', 5, params)
+        spikes = np.random.default_rng(1).random((200, 5)) < 0.3
+        window = MonitorRate('W', neuron, dt=0.5, window=20)
+        exp = MonitorRate('E', neuron, dt=0.5, mode='exp', tay=10.)
+        rate = window.get_rate('layer')
+        expected_exp = np.zeros(5)
+        for t, S in enumerate(spikes):
+            neuron.S = S
+            window.collect()
+            exp.collect()
+            expected_exp = expected_exp * (1 - 0.5 / 10.) + S / 10.
+            n = min(t + 1, 20)
+            # Вид get_rate обновляется без повторного запроса
+            np.testing.assert_allclose(rate, spikes[t + 1 - n:t + 1].sum(axis=0) / (n * 0.5))
+        np.testing.assert_allclose(exp.get_rate('layer'), expected_exp)
+        self.assertFalse(rate.flags.writeable)
+        self.assertEqual(window.projected_memory(10 ** 6), window.memory_usage())
+
+
+class TestMonitorPlots(unittest.TestCase):
+
+    def setUp(self):
+        # plt.show с бэкендом Agg только предупреждает
+        warnings.simplefilter('ignore', UserWarning)
+        self.addCleanup(warnings.resetwarnings)
+        self.addCleanup(plt.close, 'all')
+
+    def test_minmax_decimate(self):
+        rng = np.random.default_rng(2)
+        data = rng.normal(size=(100000, 3))
+        data[51234, 1] = 50.
+        data[7, 2] = -50.
+        times = np.arange(len(data)) * 0.1
+        t_out, out = _minmax_decimate(times, data, 500)
+        self.assertLessEqual(len(out), 2 * 500)
+        self.assertEqual(len(t_out), len(out))
+        # Экстремумы не теряются
+        np.testing.assert_array_equal(out.max(axis=0), data.max(axis=0))
+        np.testing.assert_array_equal(out.min(axis=0), data.min(axis=0))
+        # Короткие ряды не меняются
+        t_short, short = _minmax_decimate(times[:100], data[:100], 500)
+        np.testing.assert_array_equal(short, data[:100])
+
+        image = _decimate_image(data, 300)
+        self.assertLessEqual(len(image), 300)
+        np.testing.assert_allclose(image.mean(axis=0), data.mean(axis=0), atol=0.01)
+
+    def test_pixel_width_of_axes(self):
+        fig = plt.figure(figsize=(8, 4), dpi=100)
+        self.assertLess(_pixel_width(), 800)
+        self.assertEqual(_pixel_width(), int(fig.gca().get_window_extent().width))
+
+    def test_line_plot_single_collection(self):
+        neuron = Neuron('layer', 20, {'Ustart': 0., 'Istart': 0., 'Sstart': False})
+        monitor = MonitorPotential('U', neuron)
+        rng = np.random.default_rng(3)
+        for _ in range(20000):
+            neuron.U = rng.random(20)
+            monitor.collect()
+        plt.figure()
+        monitor.plot_line('layer', 1.)
+        ax = plt.gca()
+        self.assertEqual(len(ax.collections), 1)
+        collection = ax.collections[0]
+        self.assertIsInstance(collection, LineCollection)
+        segments = collection.get_segments()
+        self.assertEqual(len(segments), 20)
+        self.assertLessEqual(len(segments[0]), 2 * _pixel_width())
+        self.assertEqual(len(ax.lines), 0)
+        self.assertIsNone(ax.get_legend())
+
+    def test_spike_raster_and_weight_evolution(self):
+        neuron = Neuron('layer', 50, {'Ustart': 0., 'Istart': 0., 'Sstart': False})
+        monitor = MonitorSpike('S', neuron)
+        rng = np.random.default_rng(4)
+        for _ in range(5000):
+            neuron.S = rng.random(50) < 0.3
+            monitor.collect()
+        # Много спайков: изображение не шире осей
+        monitor.plot_scatter('layer', 1.)
+        image = plt.gca().images[0].get_array()
+        self.assertLessEqual(image.shape[1], _pixel_width())
+        self.assertEqual(image.sum(), sum(len(s) for s in monitor.get_data('layer')))
+
+        post = Neuron('post', 4, {'Ustart': 0., 'Istart': 0., 'Sstart': False})
+        synapse = Synapse('w', neuron, post, weight=np.zeros((4, 50)))
+        weights = MonitorWeigts('W', synapse)
+        for t in range(3000):
+            synapse.weight = np.full((4, 50), float(t))
+            weights.collect()
+        plt.figure()
+        # Ширина осей до colorbar, которая их сужает
+        width = _pixel_width()
+        weights.plot_evolution('w', 1.)
+        image = plt.gca().images[0].get_array()
+        self.assertEqual(image.shape[0], 4 * 50)
+        self.assertLessEqual(image.shape[1], width)
+
+
+if __name__ == '__main__':
+    unittest.main()
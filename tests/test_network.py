@@ -1,8 +1,23 @@
+import pickle
+from multiprocessing import shared_memory
 import unittest
+import multiprocessing as mp
 import numpy as np
-from neuron import LIFNeuron
-from synapse import Synapse
-from network import Network
+from src.neuron import LIFNeuron
+from src.synapse import Synapse, SynapseSTDP
+from src.network import Network
+from src.monitor import MonitorPotential
+from src.shared import StateReader
+from src.parallel import PartitionedNetwork
+from src.event_driven import EventDrivenRunner
+
+
+def _state_reader(layout, results):
+    reader = StateReader(layout)
+    snapshot = reader.snapshot(timeout=10)
+    results.put((snapshot['version'], snapshot['neurons']['layer2']['U'],
+                 snapshot['synapses']['syn2']))
+    reader.close()
 
 
 class TestNetwork(unittest.TestCase):
@@ -22,6 +37,7 @@ class TestNetwork(unittest.TestCase):
             'Imax': 1.
         }
 
+        self.params = params
         self.neuron1 = LIFNeuron("layer1", 3, params)
         self.neuron2 = LIFNeuron("layer2", 2, params)
 
@@ -68,5 +84,319 @@ class TestNetwork(unittest.TestCase):
         self.assertEqual(self.neuron1.get_current().shape[0], 3)
         self.assertEqual(self.neuron2.get_current().shape[0], 2)
 
+    def test_memory_report_and_budget(self):
+        monitor = MonitorPotential('U', [self.neuron1, self.neuron2])
+        self.net.add_monitor(monitor)
+        report = self.net.memory_report(1000)
+        self.assertEqual(report['synapses']['syn1'], self.syn.weight.nbytes)
+        self.assertGreater(report['neurons']['layer1'], 0)
+        self.assertEqual(report['monitors']['U'], 0)
+        self.assertGreater(report['monitors_projected']['U'], 1000 * 5 * 8)
+
+        inputs = {"layer1": np.zeros((1000, 3))}
+        budget = report['projected_total'] // 2
+        with self.assertRaises(MemoryError):
+            self.net.run(0.1, inputs, memory_budget=budget)
+
+        self.net.run(0.1, inputs, memory_budget=budget, on_budget='decimate')
+        self.assertLess(len(monitor.get_data('layer1')), 1000)
+        self.assertLessEqual(self.net.memory_report()['total'], budget)
+        # Прореживание действует только на время прогона
+        self.assertEqual(monitor.save_step, 1)
+
+        # Ошибка в on_budget видна и без превышения памяти
+        with self.assertRaises(ValueError):
+            self.net.run(0.1, inputs, on_budget='decimat')
+
+    def test_reset_clears_delays(self):
+        layer3 = LIFNeuron("layer3", 2, self.params)
+        self.net.add_neuron(layer3)
+        self.net.add_synapse(Synapse("delayed", self.neuron1, layer3,
+                                     weight=np.full((2, 3), 0.5),
+                                     params={'Delay': np.array([[2, 4, 6], [1, 3, 5]])}))
+        self.net.remove_synapses(["syn1"])
+        self.net.add_synapse(Synapse("syn1", self.neuron1, self.neuron2,
+                                     weight=self.syn.weight, params={'Delay': 4}))
+        self.net.run(1., {"layer1": np.tile([1.5, 1.5, 1.5], (3, 1))})
+        self.net.reset_neurons()
+
+        # Спайки до сброса не доходят до слоев после него
+        self.net.run(1., {"layer1": np.zeros((10, 3))})
+        np.testing.assert_array_equal(self.neuron2.get_potential(), 0.)
+        np.testing.assert_array_equal(layer3.get_potential(), 0.)
+
+    def test_memory_report_fused(self):
+        net = Network()
+        net.add_neurons([LIFNeuron(f"layer{i}", 1000, self.params) for i in range(10)])
+        before = net.memory_report()
+        net.fuse_neurons()
+        after = net.memory_report()
+        # Каждый слой учитывает только свой участок массивов популяции
+        self.assertEqual(after['neurons'], before['neurons'])
+        self.assertEqual(after['populations'], [10 * 1000 * 8])
+        self.assertEqual(after['total'], before['total'] + after['populations'][0])
+
+    def test_fork_copy_on_write(self):
+        params_syn = {'Aplus': 0.1, 'Aminus': 0.1, 'Tpre': 20, 'Tpost': 20}
+        plastic = SynapseSTDP("syn2", self.neuron1, self.neuron2,
+                              weight=np.full((2, 3), 0.5), params=params_syn)
+        self.net.add_synapse(plastic)
+        self.net.step(1., {"layer1": np.array([1.5, 0., 0.])})
+
+        fork = self.net.fork()
+        self.assertIs(fork.synapses['syn1'].weight, self.syn.weight)
+        self.assertIs(fork.synapses['syn2'].pre, fork.neurons['layer1'])
+        self.assertFalse(np.shares_memory(fork.neurons['layer1'].U, self.neuron1.U))
+        self.assertFalse(np.shares_memory(fork.synapses['syn2'].trace_pre, plastic.trace_pre))
+
+        # Обучение в копии не меняет веса исходной сети
+        weight_before = plastic.weight.copy()
+        fork.run(1., {"layer1": np.tile([1.5, 1.5, 0.], (5, 1)),
+                      "layer2": np.tile([1.5, 1.5], (5, 1))})
+        np.testing.assert_array_equal(plastic.weight, weight_before)
+        self.assertFalse(np.array_equal(fork.synapses['syn2'].weight, weight_before))
+        self.assertIs(fork.synapses['syn1'].weight, self.syn.weight)
+
+    def test_fork_shared_pickle(self):
+        weight = np.random.rand(200, 300)
+        pre = LIFNeuron("big_pre", 300, self.params)
+        post = LIFNeuron("big_post", 200, self.params)
+        self.net.add_neurons([pre, post])
+        self.net.add_synapse(Synapse("big", pre, post, weight=weight))
+        try:
+            fork = self.net.fork(shared=True)
+            data = pickle.dumps(fork.synapses['big'])
+            self.assertLess(len(data), weight.nbytes // 10)
+            restored = pickle.loads(data)
+            np.testing.assert_array_equal(restored.weight, weight)
+            self.assertFalse(restored.weight.flags.writeable)
+            del restored
+        finally:
+            self.net.release_shared()
+        np.testing.assert_array_equal(self.net.synapses['big'].weight, weight)
+
+    def test_fork_outlives_release(self):
+        weight = np.random.rand(20, 30)
+        pre = LIFNeuron("big_pre", 30, self.params)
+        post = LIFNeuron("big_post", 20, self.params)
+        self.net.add_neurons([pre, post])
+        self.net.add_synapse(Synapse("big", pre, post, weight=weight))
+        fork = self.net.fork(shared=True)
+        name = fork.synapses['big'].weight_shm.name
+        # Сегмент остается, пока им пользуются копии сети
+        self.net.release_shared()
+        restored = pickle.loads(pickle.dumps(fork.synapses['big']))
+        np.testing.assert_array_equal(restored.weight, weight)
+        del restored
+        fork_of_fork = fork.fork()
+        fork.release_shared()
+        restored = pickle.loads(pickle.dumps(fork_of_fork.synapses['big']))
+        np.testing.assert_array_equal(restored.weight, weight)
+        del restored
+        fork_of_fork.release_shared()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+    def test_fuse_neurons(self):
+        params = dict(self.params, Utay=np.linspace(5., 20., 4), Uth=0.8)
+        rng = np.random.default_rng(0)
+        inputs = {"layer1": rng.random((50, 3)),
+                  "layer3": rng.random((50, 4))}
+
+        results = []
+        for fuse in (False, True):
+            net = Network()
+            layers = [LIFNeuron("layer1", 3, self.params),
+                      LIFNeuron("layer2", 2, self.params),
+                      LIFNeuron("layer3", 4, params)]
+            net.add_neurons(layers)
+            net.add_synapse(Synapse("syn1", layers[0], layers[1], weight=self.syn.weight))
+            net.add_synapse(Synapse("syn2", layers[2], layers[1], weight=np.full((2, 4), 0.2)))
+            if fuse:
+                net.fuse_neurons()
+                self.assertEqual(len(net.populations), 1)
+            potentials = []
+            for t in range(50):
+                net.step(0.5, {name: inp[t] for name, inp in inputs.items()})
+                potentials.append(np.concatenate([n.get_potential().copy() for n in layers]))
+            results.append(np.array(potentials))
+
+        np.testing.assert_array_equal(results[0], results[1])
+
+        # Слои - виды на общие массивы, сброс выполняется на месте
+        population = net.populations[0]
+        self.assertTrue(np.shares_memory(layers[2].get_potential(), population.U))
+        self.assertEqual(layers[2].get_current().shape, (4,))
+        layers[2].reset()
+        np.testing.assert_array_equal(population.U[population.slices["layer3"]], 0.)
+
+    def test_multirate_intervals(self):
+        net = Network()
+        slow = LIFNeuron("slow", 2, dict(self.params, Utay=100., Uth=10.))
+        net.add_neuron(slow)
+        net.set_interval("slow", 3)
+        for t in range(3):
+            net.step(1., {"slow": np.array([0.1, 0.2])})
+            if t < 2:
+                np.testing.assert_array_equal(slow.get_potential(), 0.)
+        # Вход за интервал подается целиком на шаге 3 * dt
+        np.testing.assert_allclose(slow.get_potential(), [0.3, 0.6])
+
+        # Объединение группирует слои по интервалам и дает тот же результат
+        rng = np.random.default_rng(5)
+        inputs = {"layer1": rng.random((60, 3)) * 0.5}
+        results = []
+        for fuse in (False, True):
+            net = Network()
+            layers = [LIFNeuron("layer1", 3, self.params),
+                      LIFNeuron("layer2", 2, dict(self.params, Utay=100.)),
+                      LIFNeuron("layer3", 2, dict(self.params, Utay=100.))]
+            net.add_neurons(layers)
+            net.add_synapse(Synapse("syn1", layers[0], layers[1], weight=self.syn.weight))
+            net.add_synapse(Synapse("syn2", layers[1], layers[2], weight=np.eye(2)))
+            net.set_intervals({"layer2": 4, "layer3": 4})
+            if fuse:
+                net.fuse_neurons()
+                self.assertEqual([p.interval for p in net.populations], [4])
+            spikes = []
+            for t in range(60):
+                net.step(0.5, {name: inp[t] for name, inp in inputs.items()})
+                spikes.append(np.concatenate([n.get_spike().copy() for n in layers]))
+            results.append(np.array(spikes))
+        np.testing.assert_array_equal(results[0], results[1])
+        # Медленные слои дают спайки только на тактах своего шага
+        slow_spikes = np.flatnonzero(results[0][:, 3:].any(axis=1))
+        self.assertGreater(len(slow_spikes), 0)
+        np.testing.assert_array_equal(slow_spikes % 4, 3)
+
+        # Шаг слоя interval * dt не меньше Utay: множитель затухания отрицателен
+        net = Network()
+        net.add_neuron(LIFNeuron("coarse", 2, self.params))
+        net.set_interval("coarse", 25)
+        with self.assertRaises(ValueError):
+            net.step(1., {"coarse": np.full(2, 0.01)})
+        net.step(0.1, {"coarse": np.full(2, 0.01)})
+
+    def test_synapse_interval_validation(self):
+        self.net.set_intervals({"layer1": 4, "layer2": 6})
+        # Обучение раз в 4 такта пропустило бы спайки слоя layer2
+        with self.assertRaises(ValueError):
+            self.net.set_synapse_interval("syn1", 4)
+        self.net.set_synapse_interval("syn1", 2)
+        self.assertEqual(self.net.synapse_intervals, {"syn1": 2})
+        # Интервал слоя тоже не может нарушить кратность
+        with self.assertRaises(ValueError):
+            self.net.set_interval("layer2", 3)
+        self.net.set_interval("layer2", 2)
+
+    def test_incremental_propagate(self):
+        rng = np.random.default_rng(7)
+        weight = rng.normal(0, 0.1, (20, 40))
+        inputs = {"pre": (rng.random((300, 40)) < 0.02) * 2.}
+        results = []
+        for incremental in (False, True):
+            net = Network()
+            pre = LIFNeuron("pre", 40, self.params)
+            post = LIFNeuron("post", 20, dict(self.params, Uth=100.))
+            net.add_neurons([pre, post])
+            syn = Synapse("syn", pre, post, weight=weight,
+                          params={'Incremental': incremental, 'RecomputeEvery': 100})
+            net.add_synapse(syn)
+            potentials = []
+            for t in range(300):
+                net.step(1., {name: inp[t] for name, inp in inputs.items()})
+                potentials.append(post.get_potential().copy())
+            results.append(np.array(potentials))
+        self.assertGreater(syn.incremental_count, 0)
+        np.testing.assert_allclose(results[1], results[0], rtol=1e-9, atol=1e-12)
+
+        with self.assertRaises(ValueError):
+            SynapseSTDP("plastic", pre, post, weight=weight,
+                        params={'Aplus': 0.1, 'Aminus': 0.1, 'Tpre': 20, 'Tpost': 20,
+                                'Incremental': True})
+        with self.assertRaises(ValueError):
+            Synapse("mixed", LIFNeuron("mixed", 2, dict(self.params, Itay=[10., 20.])), post,
+                    weight=np.ones((20, 2)), params={'Incremental': True})
+
+    def test_share_state(self):
+        params_syn = {'Aplus': 0.1, 'Aminus': 0.1, 'Tpre': 20, 'Tpost': 20}
+        nets = []
+        for shared in (False, True):
+            net = Network()
+            pre = LIFNeuron("layer1", 3, self.params)
+            post = LIFNeuron("layer2", 2, self.params)
+            net.add_neurons([pre, post])
+            net.add_synapse(SynapseSTDP("syn2", pre, post, weight=np.full((2, 3), 0.5),
+                                        params=params_syn))
+            nets.append(net)
+        layout = nets[1].share_state()
+        reader = StateReader(layout)
+        U = reader.neuron('layer2', 'U')
+        weight = reader.weight('syn2')
+        try:
+            inputs = {"layer1": np.tile([1.5, 1.5, 0.], (5, 1)),
+                      "layer2": np.tile([1.5, 0.], (5, 1))}
+            for net in nets:
+                net.run(1., inputs)
+            # Вид читателя видит изменения сети без копирования
+            np.testing.assert_array_equal(U, nets[0].neurons['layer2'].U)
+            np.testing.assert_array_equal(weight, nets[0].synapses['syn2'].weight)
+            self.assertFalse(np.array_equal(weight, np.full((2, 3), 0.5)))
+            self.assertFalse(U.flags.writeable)
+
+            snapshot = reader.snapshot()
+            self.assertEqual(snapshot['version'], 10)
+            np.testing.assert_array_equal(snapshot['neurons']['layer1']['S'],
+                                          nets[0].neurons['layer1'].S)
+            with self.assertRaises(ValueError):
+                nets[1].fuse_neurons()
+            # Копия сети перевела бы веса из сегмента в обычную память
+            with self.assertRaises(ValueError):
+                nets[1].fork()
+            with self.assertRaises(ValueError):
+                PartitionedNetwork(nets[1], [['layer1'], ['layer2']])
+
+            # Снимок из другого процесса во время прогона
+            results = mp.Queue()
+            process = mp.Process(target=_state_reader, args=(layout, results))
+            process.start()
+            nets[1].run(1., inputs)
+            version, U_child, weight_child = results.get(timeout=10)
+            process.join(10)
+            self.assertEqual(version % 2, 0)
+            self.assertEqual(U_child.shape, (2,))
+            self.assertEqual(weight_child.shape, (2, 3))
+        finally:
+            del U, weight
+            reader.close()
+            nets[1].release_state()
+        self.assertIsNone(nets[1].state_shm)
+        nets[1].fork()
+        nets[0].run(1., inputs)
+        np.testing.assert_array_equal(nets[1].neurons['layer2'].U, nets[0].neurons['layer2'].U)
+
+    def test_share_state_other_writers(self):
+        layout = self.net.share_state()
+        reader = StateReader(layout)
+        try:
+            self.net.step(1., {"layer1": np.array([1.5, 0., 0.])})
+            self.assertEqual(reader.version, 2)
+            # Сброс отдельных слоев тоже пишет на месте и меняет версию
+            self.net.reset_neurons(["layer1"])
+            self.assertEqual(reader.version, 4)
+            np.testing.assert_array_equal(reader.neuron("layer1", "U"), 0.)
+
+            runner = EventDrivenRunner(self.net)
+            runner.run(1., {"layer1": np.vstack([[[1.5, 1.5, 0.]], np.zeros((50, 3))])})
+            self.assertGreater(runner.skipped_steps, 0)
+            self.assertEqual(reader.version % 2, 0)
+            # Пропуск тихих шагов тоже отмечается версией
+            self.assertGreater(reader.version, 4 + 2 * runner.clocked_steps)
+            snapshot = reader.snapshot()
+            np.testing.assert_array_equal(snapshot['neurons']['layer2']['U'], self.neuron2.U)
+        finally:
+            reader.close()
+            self.net.release_state()
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
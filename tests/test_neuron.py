@@ -1,9 +1,5 @@
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-
 import unittest
-from neuron import Neuron, LIFNeuron, AdaptiveLIFNeuron
+from src.neuron import Neuron, LIFNeuron, AdaptiveLIFNeuron
 import numpy as np
 
 
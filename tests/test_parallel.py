@@ -0,0 +1,168 @@
+import copy
+import threading
+import unittest
+import numpy as np
+from src.neuron import LIFNeuron
+from src.synapse import Synapse, SynapseSTDP
+from src.network import Network
+from src.monitor import MonitorSpike, MonitorWeigts, MonitorSpikePacked, MonitorRate
+from src.parallel import PartitionedNetwork
+
+
+class TestPartitionedNetwork(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        params = {
+            'Ustart': 0., 'Istart': 0., 'Sstart': False,
+            'Utay': 10., 'Uth': 1., 'Urest': 0.,
+            'Itay': 10., 'Imax': 1.
+        }
+        params_syn = {'Aplus': 0.01, 'Aminus': 0.01, 'Tpre': 20, 'Tpost': 20}
+        self.net = Network()
+        layer1 = LIFNeuron('layer1', 5, params)
+        layer2 = LIFNeuron('layer2', 4, params)
+        layer3 = LIFNeuron('layer3', 3, params)
+        self.net.add_neurons([layer1, layer2, layer3])
+        self.net.add_synapses([
+            Synapse('s12', layer1, layer2, weight=rng.uniform(0, 0.5, (4, 5))),
+            SynapseSTDP('s23', layer2, layer3, weight=rng.uniform(0, 0.5, (3, 4)),
+                        params=params_syn),
+            Synapse('s31', layer3, layer1, weight=rng.uniform(0, 0.2, (5, 3))),
+        ])
+        self.net.add_monitors([MonitorSpike('S3', layer3),
+                               MonitorWeigts('W23', self.net.synapses['s23'])])
+        self.inputs = {'layer1': 0.3 * rng.random((200, 5))}
+
+    def test_equivalent_to_serial(self):
+        net_serial = copy.deepcopy(self.net)
+        net_serial.run(1., self.inputs)
+
+        with PartitionedNetwork(self.net, [['layer1'], ['layer2', 'layer3']]) as runner:
+            runner.run(1., self.inputs)
+
+        for name, neuron in net_serial.neurons.items():
+            np.testing.assert_array_equal(self.net.neurons[name].get_potential(),
+                                          neuron.get_potential())
+            np.testing.assert_array_equal(self.net.neurons[name].get_current(),
+                                          neuron.get_current())
+        np.testing.assert_array_equal(self.net.synapses['s23'].get_weight(),
+                                      net_serial.synapses['s23'].get_weight())
+        self.assertEqual(self.net.monitors['S3'].get_data('layer3'),
+                         net_serial.monitors['S3'].get_data('layer3'))
+        self.assertEqual(len(self.net.monitors['W23'].get_data('s23')), 200)
+
+    def test_packed_monitor(self):
+        self.net.add_monitor(MonitorSpikePacked('P3', self.net.neurons['layer3']))
+        with PartitionedNetwork(self.net, [['layer1'], ['layer2', 'layer3']]) as runner:
+            runner.run(1., self.inputs)
+
+        spikes = self.net.monitors['S3'].get_data('layer3')
+        self.assertEqual(len(spikes), 200)
+        packed = self.net.monitors['P3'].get_data('layer3')
+        self.assertEqual(len(packed), 200)
+        for expected, got in zip(spikes, packed):
+            np.testing.assert_array_equal(got, expected)
+
+    def test_rate_monitor(self):
+        rate = MonitorRate('R3', self.net.neurons['layer3'], dt=1., window=20)
+        self.net.add_monitor(rate)
+        rate_view = rate.get_rate('layer3')
+        net_serial = copy.deepcopy(self.net)
+        net_serial.run(1., self.inputs)
+
+        with PartitionedNetwork(self.net, [['layer1'], ['layer2', 'layer3']]) as runner:
+            runner.run(1., self.inputs)
+
+        np.testing.assert_array_equal(rate.get_rate('layer3'),
+                                      net_serial.monitors['R3'].get_rate('layer3'))
+        self.assertGreater(rate.get_rate('layer3').sum(), 0)
+        # Частоты переносятся на место, полученный ранее вид тоже обновлен
+        np.testing.assert_array_equal(rate_view, rate.get_rate('layer3'))
+
+    def test_threaded_plasticity_after_serial_run(self):
+        # Пул потоков создается в родителе до запуска процессов
+        self.net.synapses['s23'].threads = 2
+        self.net.synapses['s23'].block_rows = 1
+        net_serial = copy.deepcopy(self.net)
+        net_serial.run(1., self.inputs)
+        self.net.run(1., {'layer1': self.inputs['layer1'][:1]})
+
+        def partitioned():
+            with PartitionedNetwork(self.net, [['layer1'], ['layer2', 'layer3']]) as runner:
+                runner.run(1., {'layer1': self.inputs['layer1'][1:]})
+
+        thread = threading.Thread(target=partitioned, daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+        self.assertFalse(thread.is_alive(), "Распределенный прогон завис")
+        np.testing.assert_array_equal(self.net.synapses['s23'].get_weight(),
+                                      net_serial.synapses['s23'].get_weight())
+
+    def test_fused_network_continues_after_run(self):
+        self.net.remove_monitors()
+        net_serial = copy.deepcopy(self.net)
+        for net in (self.net, net_serial):
+            net.fuse_neurons()
+        net_serial.run(1., self.inputs)
+
+        with PartitionedNetwork(self.net, [['layer1'], ['layer2', 'layer3']]) as runner:
+            runner.run(1., self.inputs)
+
+        # Слои остаются видами на массивы популяции
+        population = self.net.populations[0]
+        for name, sl in population.slices.items():
+            np.testing.assert_array_equal(population.U[sl], self.net.neurons[name].U)
+        step_input = {'layer1': np.full(5, 0.5)}
+        for net in (self.net, net_serial):
+            net.step(1., step_input)
+        for name, neuron in net_serial.neurons.items():
+            np.testing.assert_array_equal(self.net.neurons[name].get_potential(),
+                                          neuron.get_potential())
+
+    def test_incremental_synapse_across_partitions(self):
+        rng = np.random.default_rng(1)
+        params = {
+            'Ustart': 0., 'Istart': 0., 'Sstart': False,
+            'Utay': 10., 'Uth': 1., 'Urest': 0.,
+            'Itay': 10., 'Imax': 1.
+        }
+        net = Network()
+        pre = LIFNeuron('pre', 40, params)
+        post = LIFNeuron('post', 10, dict(params, Uth=100.))
+        net.add_neurons([pre, post])
+        net.add_synapse(Synapse('inc', pre, post, weight=rng.normal(0, 0.1, (10, 40)),
+                                params={'Incremental': True}))
+        inputs = {'pre': (rng.random((100, 40)) < 0.02) * 2.}
+        net_serial = copy.deepcopy(net)
+        net_serial.run(1., inputs)
+
+        with PartitionedNetwork(net, [['pre'], ['post']]) as runner:
+            runner.run(1., inputs)
+
+        self.assertGreater(net.synapses['inc'].incremental_count, 0)
+        np.testing.assert_allclose(net.neurons['post'].get_potential(),
+                                   net_serial.neurons['post'].get_potential(),
+                                   rtol=1e-9, atol=1e-12)
+
+    def test_invalid_partitions(self):
+        with self.assertRaises(ValueError):
+            PartitionedNetwork(self.net, [['layer1'], ['layer2']])
+        with self.assertRaises(ValueError):
+            PartitionedNetwork(self.net, [['layer1', 'layer2'], ['layer2', 'layer3']])
+
+    def test_multirate_rejected(self):
+        self.net.set_interval('layer2', 3)
+        with self.assertRaises(ValueError):
+            PartitionedNetwork(self.net, [['layer1'], ['layer2', 'layer3']])
+        self.net.set_interval('layer2', 1)
+        runner = PartitionedNetwork(self.net, [['layer1'], ['layer2', 'layer3']])
+        self.net.set_intervals({'layer2': 2, 'layer3': 2})
+        self.net.set_synapse_interval('s23', 2)
+        with self.assertRaises(ValueError):
+            runner.run(1., self.inputs)
+        runner.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
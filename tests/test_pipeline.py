@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from src.pipeline import emg_envelope_pipeline, DecimateStage, Pipeline
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.fs = 1000.
+        self.signal = rng.normal(0, 1, 5000)
+
+    def test_block_size_invariance(self):
+        pipeline = emg_envelope_pipeline(20., 200., self.fs, envelope_cutoff=5.,
+                                         decimation=4, gain=2.)
+        whole = pipeline.run(self.signal, block_size=len(self.signal))
+
+        # Живой поток блоками разного размера
+        pipeline.reset()
+        bounds = [0, 7, 100, 101, 1500, 3333, 5000]
+        streamed = np.concatenate([pipeline.process(self.signal[a:b])
+                                   for a, b in zip(bounds[:-1], bounds[1:])])
+
+        self.assertEqual(len(whole), len(self.signal) // 4)
+        np.testing.assert_allclose(streamed, whole, rtol=1e-10, atol=1e-12)
+        self.assertTrue(np.all(whole >= -1e-3 * np.max(whole)))
+
+    def test_decimate_phase(self):
+        pipeline = Pipeline([DecimateStage(3)])
+        data = np.arange(20)
+        out = np.concatenate([pipeline.process(data[:4]), pipeline.process(data[4:11]),
+                              pipeline.process(data[11:])])
+        np.testing.assert_array_equal(out, data[::3])
+
+    def test_multichannel(self):
+        pipeline = emg_envelope_pipeline(20., 200., self.fs, envelope_cutoff=5.)
+        data = np.column_stack((self.signal, -self.signal))
+        out = pipeline.run(data, block_size=333)
+        np.testing.assert_allclose(out[:, 0], out[:, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import asyncio
+import copy
+import time
+import unittest
+import numpy as np
+from src.neuron import LIFNeuron
+from src.synapse import Synapse
+from src.network import Network
+from src.realtime import RealtimeRunner, QueueSource, QueueSink
+
+
+class TestRealtimeRunner(unittest.TestCase):
+
+    def setUp(self):
+        params = {
+            'Ustart': 0., 'Istart': 0., 'Sstart': False,
+            'Utay': 10., 'Uth': 1., 'Urest': 0.,
+            'Itay': 10., 'Imax': 1.
+        }
+        self.net = Network()
+        layer_in = LIFNeuron('in', 4, params)
+        layer_out = LIFNeuron('out', 2, params)
+        self.net.add_neurons([layer_in, layer_out])
+        self.net.add_synapse(Synapse('s', layer_in, layer_out,
+                                     weight=np.full((2, 4), 0.5)))
+        self.input = np.array([0.3, 0.5, 0.7, 0.9])
+
+    async def constant_source(self):
+        return self.input
+
+    def test_pacing_and_sink(self):
+        net_serial = copy.deepcopy(self.net)
+        sink = QueueSink()
+        runner = RealtimeRunner(self.net, 1., period=0.005,
+                                sources={'in': self.constant_source}, sinks=[sink])
+        start = time.monotonic()
+        stats = asyncio.run(runner.run(20))
+        elapsed = time.monotonic() - start
+
+        # Шаги идут по часам: 20 шагов занимают не меньше 19 периодов
+        self.assertGreaterEqual(elapsed, 19 * 0.005)
+        self.assertEqual(stats.steps, 20)
+        self.assertEqual(runner.step_count, 20)
+        summary = stats.summary()
+        self.assertEqual(summary['steps'], 20)
+        self.assertGreaterEqual(summary['max_latency'], summary['mean_latency'])
+
+        received = [sink.queue.get_nowait() for _ in range(sink.queue.qsize())]
+        self.assertEqual([step for step, _ in received], list(range(20)))
+        for step, outputs in received:
+            net_serial.step(1., {'in': self.input})
+            for name, neuron in net_serial.neurons.items():
+                np.testing.assert_array_equal(outputs[name], np.flatnonzero(neuron.get_spike()))
+
+    def test_catch_up_and_deadline_misses(self):
+        async def slow_source():
+            # Первый шаг дольше шести периодов
+            if runner.step_count == 0:
+                time.sleep(0.03)
+            return self.input
+
+        runner = RealtimeRunner(self.net, 1., period=0.005, sources={'in': slow_source},
+                                max_batch=3)
+        stats = asyncio.run(runner.run(12))
+        self.assertEqual(stats.steps, 12)
+        self.assertGreaterEqual(stats.missed, 1)
+        self.assertGreaterEqual(stats.max_latency, 0.03)
+        # Отставание догоняется пачками не больше max_batch шагов
+        self.assertLess(stats.batches, 12)
+        self.assertGreaterEqual(stats.batches, 12 // 3)
+
+    def test_stop_and_current_output(self):
+        async def sink(step, outputs):
+            self.assertEqual(outputs['out'].shape, (2,))
+            if step == 4:
+                runner.stop()
+
+        runner = RealtimeRunner(self.net, 1., period=0.001, sinks=[sink],
+                                output_layers=['out'], output='current', max_batch=1)
+        asyncio.run(runner.run())
+        self.assertEqual(runner.step_count, 5)
+        with self.assertRaises(ValueError):
+            RealtimeRunner(self.net, 1., output='voltage')
+
+    def test_queue_source_and_sink(self):
+        async def scenario():
+            source = QueueSource(4)
+            np.testing.assert_array_equal(await source(), np.zeros(4))
+            for value in range(3):
+                source.put(np.full(4, float(value)))
+            # Берется последнее значение, более старые учитываются как отброшенные
+            np.testing.assert_array_equal(await source(), np.full(4, 2.))
+            self.assertEqual(source.dropped, 2)
+
+            sink = QueueSink(maxsize=2)
+            for step in range(5):
+                await sink(step, {})
+            self.assertEqual(sink.dropped, 3)
+            self.assertEqual([sink.queue.get_nowait()[0] for _ in range(2)], [3, 4])
+
+        asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import multiprocessing as mp
+import numpy as np
+from src.neuron import LIFNeuron
+from src.network import Network
+from src.sink import (OutputSink, PipeTransport, UnixSocketTransport, SharedMemoryRing,
+                      SharedMemoryTransport, StreamTransport, decode_frame, read_frames)
+
+LAYERS = ['in', 'out']
+KINDS = ['spikes', 'current']
+
+
+def _socket_reader(path, ready, results):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    ready.set()
+    conn, _ = server.accept()
+    with conn, conn.makefile('rb') as stream:
+        for frame in read_frames(stream):
+            results.put(_decoded(frame))
+    results.put(None)
+    server.close()
+
+
+def _ring_reader(name, num_frames, results):
+    ring = SharedMemoryRing.attach(name)
+    received = 0
+    while received < num_frames:
+        frame = ring.read()
+        if frame is not None:
+            results.put(_decoded(frame))
+            received += 1
+    ring.close()
+
+
+def _decoded(frame):
+    first_step, steps = decode_frame(frame, LAYERS, KINDS)
+    return first_step, [{name: data.tolist() for name, data in step.items()} for step in steps]
+
+
+class TestOutputSink(unittest.TestCase):
+
+    def setUp(self):
+        params = {
+            'Ustart': 0., 'Istart': 0., 'Sstart': False,
+            'Utay': 10., 'Uth': 1., 'Urest': 0.,
+            'Itay': 10., 'Imax': 1.
+        }
+        self.net = Network()
+        self.layers = [LIFNeuron('in', 6, params), LIFNeuron('out', 3, params)]
+        self.net.add_neurons(self.layers)
+        self.inputs = {'in': 0.6 * np.random.default_rng(0).random((20, 6))}
+
+    def run_with_sink(self, transport, block_steps):
+        sink = OutputSink('sink', self.layers, transport, kinds=KINDS, block_steps=block_steps)
+        self.net.add_monitor(sink)
+        expected = []
+        for t in range(20):
+            self.net.step(1., {'in': self.inputs['in'][t]})
+            expected.append({'in': np.flatnonzero(self.layers[0].get_spike()).tolist(),
+                             'out': self.layers[1].get_current().astype(np.float32).tolist()})
+        sink.close()
+        return expected
+
+    def check_frames(self, decoded, expected):
+        steps = []
+        for first_step, frame_steps in decoded:
+            self.assertEqual(first_step, len(steps))
+            steps.extend(frame_steps)
+        self.assertEqual(steps, expected)
+
+    def test_pipe(self):
+        r, w = os.pipe()
+        expected = self.run_with_sink(PipeTransport(w), block_steps=3)
+        with os.fdopen(r, 'rb') as stream:
+            decoded = [_decoded(frame) for frame in read_frames(stream)]
+        self.assertEqual(len(decoded), 7)
+        self.check_frames(decoded, expected)
+
+    def test_run_flushes_tail(self):
+        r, w = os.pipe()
+        sink = OutputSink('sink', self.layers, PipeTransport(w, policy='block'),
+                          kinds=KINDS, block_steps=3)
+        self.net.add_monitor(sink)
+        self.net.run(1., self.inputs)
+        # Неполный последний блок отправлен в конце run, без close
+        os.close(w)
+        with os.fdopen(r, 'rb') as stream:
+            decoded = [_decoded(frame) for frame in read_frames(stream)]
+        self.assertEqual(len(decoded), 7)
+        first_step, steps = decoded[-1]
+        self.assertEqual((first_step, len(steps)), (18, 2))
+
+    def test_pipe_drop_policy(self):
+        r, w = os.pipe()
+        transport = PipeTransport(w, policy='drop')
+        frame = b'x' * 4096
+        # Читатель не читает: запись не блокируется, лишние кадры отбрасываются
+        results = [transport.send(frame) for _ in range(1000)]
+        self.assertTrue(results[0])
+        self.assertGreater(transport.dropped, 0)
+        self.assertEqual(transport.sent + transport.dropped, 1000)
+        frames = []
+        with os.fdopen(r, 'rb') as stream:
+            # Поток остается целым: частично записанный кадр дописывается
+            reader = threading.Thread(target=lambda: frames.extend(read_frames(stream)))
+            reader.start()
+            transport.close()
+            reader.join(10)
+        self.assertEqual(len(frames), transport.sent)
+        self.assertTrue(all(f == frame for f in frames))
+        # Базовый транспорт без записи в поток не создается
+        with self.assertRaises(TypeError):
+            StreamTransport()
+
+    def test_unix_socket_reader_process(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'sink.sock')
+            ready = mp.Event()
+            results = mp.Queue()
+            reader = mp.Process(target=_socket_reader, args=(path, ready, results))
+            reader.start()
+            self.assertTrue(ready.wait(10))
+            expected = self.run_with_sink(UnixSocketTransport(path, policy='block'), block_steps=1)
+            decoded = []
+            while True:
+                item = results.get(timeout=10)
+                if item is None:
+                    break
+                decoded.append(item)
+            reader.join(10)
+        self.assertEqual(len(decoded), 20)
+        self.check_frames(decoded, expected)
+
+    def test_shared_memory_ring_reader_process(self):
+        ring = SharedMemoryRing(capacity=256)
+        try:
+            results = mp.Queue()
+            reader = mp.Process(target=_ring_reader, args=(ring.name, 10, results))
+            reader.start()
+            # Кольцо меньше всех данных: писатель ждет читателя
+            expected = self.run_with_sink(SharedMemoryTransport(ring, policy='block'), block_steps=2)
+            decoded = [results.get(timeout=10) for _ in range(10)]
+            reader.join(10)
+            self.check_frames(decoded, expected)
+        finally:
+            ring.close()
+            ring.unlink()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
 import numpy as np
-from synapse import Synapse, SynapseSTDP, SynapseLTPf
-from neuron import Neuron
+from src.synapse import (Synapse, SynapseSTDP, SynapseLTPf, ConvSynapse, ConvSynapseSTDP,
+                     OneToOneSynapse, OneToOneSynapseSTDP, OneToOneSynapseLTPf,
+                     BlockDiagonalSynapse, BlockDiagonalSynapseSTDP, BlockDiagonalSynapseLTPf,
+                     QuantizedSynapse)
+from src.neuron import Neuron, LIFNeuron
 
 class TestSynapse(unittest.TestCase):
 
@@ -88,6 +91,262 @@ class TestSynapse(unittest.TestCase):
                           weight=w, params=params_syn_LTPf)
         syn.update_weight(1)
         print(syn.weight)
+
+    def test_batched_update_weight(self):
+        rng = np.random.default_rng(0)
+        spikes_pre = rng.random((203, self.pre.N)) < 0.1
+        spikes_post = rng.random((203, self.post.N)) < 0.1
+        # Спайки в остатке пакета, чтобы flush_weight менял веса
+        spikes_pre[-2] = spikes_post[-2] = True
+        params = {'Aplus': 0.01, 'Aminus': 0.01, 'Aforgetting': 0.005,
+                  'Tpre': 20, 'Tpost': 20}
+        for cls in (SynapseSTDP, SynapseLTPf):
+            w = np.full((self.post.N, self.pre.N), 0.5)
+            syn = cls("serial", self.pre, self.post, weight=w.copy(), params=params)
+            syn_batch = cls("batch", self.pre, self.post, weight=w.copy(),
+                            params=dict(params, Kbatch=8))
+            for t in range(len(spikes_pre)):
+                self.pre.S = spikes_pre[t]
+                self.post.S = spikes_post[t]
+                syn.update_weight(1)
+                syn_batch.update_weight(1)
+            # 203 шага - не кратно 8, остаток из 3 шагов применяется в flush_weight
+            self.assertEqual(syn_batch.batch_count, 3)
+            weight_before = syn_batch.weight.copy()
+            syn_batch.flush_weight()
+            self.assertEqual(syn_batch.batch_count, 0)
+            self.assertFalse(np.array_equal(syn_batch.weight, weight_before))
+            np.testing.assert_array_equal(syn_batch.trace_pre, syn.trace_pre)
+            self.assertFalse(np.all(syn.weight == w))
+            # Ошибка второго порядка: C ~ 8 * 0.1 * 0.01 * 2 * 2 на пакет, 26 пакетов
+            np.testing.assert_allclose(syn_batch.weight, syn.weight, atol=1e-2)
+
+    def test_conv_synapse(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        rng = np.random.default_rng(1)
+
+        # 1-D: 10 входов, ядро 3, шаг 2, дополнение 1 -> 5 выходов
+        pre = Neuron('pre1d', 10, params)
+        post = Neuron('post1d', 5, params)
+        kernel = rng.random(3)
+        x = rng.random(10)
+        expected = np.array([np.dot(kernel, np.pad(x, 1)[2 * o:2 * o + 3]) for o in range(5)])
+        for method in ('direct', 'fft'):
+            syn = ConvSynapse("conv1d", pre, post, weight=kernel,
+                              params={'Stride': 2, 'Padding': 1, 'Method': method})
+            np.testing.assert_allclose(syn.propagate(x), expected)
+            np.testing.assert_allclose(syn.to_dense() @ x, expected)
+
+        # 2-D: решетка 6x5, ядро 3x2 -> выход 4x4
+        pre = Neuron('pre2d', 30, params)
+        post = Neuron('post2d', 16, params)
+        kernel = rng.random((3, 2))
+        x = rng.random(30)
+        direct = ConvSynapse("conv2d", pre, post, weight=kernel, params={'InShape': (6, 5)})
+        fft = ConvSynapse("conv2d_fft", pre, post, weight=kernel,
+                          params={'InShape': (6, 5), 'Method': 'fft'})
+        np.testing.assert_allclose(fft.propagate(x), direct.propagate(x))
+        self.assertEqual(direct.to_dense().shape, (16, 30))
+        self.assertEqual(direct.memory_usage(), kernel.nbytes)
+
+        with self.assertRaises(ValueError):
+            ConvSynapse("bad", pre, post, weight=np.ones((2, 2)), params={'InShape': (6, 5)})
+
+    def test_conv_STDP_update_weight(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        pre = Neuron('pre', 6, params)
+        post = Neuron('post', 4, params)
+        params_syn = {'Aplus': 0.1, 'Aminus': 0.1, 'Tpre': 20, 'Tpost': 20}
+        syn = ConvSynapseSTDP("conv_stdp", pre, post, weight=np.full(3, 0.5), params=params_syn)
+        dense = SynapseSTDP("dense", pre, post, weight=syn.to_dense(), params=params_syn)
+
+        pre.S = np.array([1, 0, 1, 0, 0, 1], dtype=bool)
+        post.S = np.zeros(4, dtype=bool)
+        syn.update_weight(1)
+        dense.update_weight(1)
+        pre.S = np.zeros(6, dtype=bool)
+        post.S = np.array([0, 1, 1, 0], dtype=bool)
+        syn.update_weight(1)
+        dense.update_weight(1)
+
+        # На шаге только LTP: изменение ядра - среднее изменений весов
+        # полной матрицы по позициям
+        delta = np.array([np.mean([dense.weight[o, o + j] - 0.5 for o in range(4)])
+                          for j in range(3)])
+        self.assertFalse(np.allclose(syn.weight, 0.5))
+        np.testing.assert_allclose(syn.weight - 0.5, delta, rtol=1e-12)
+
+    def test_structured_synapses(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        pre = Neuron('pre', 6, params)
+        post = Neuron('post', 6, params)
+        post4 = Neuron('post4', 4, params)
+        rng = np.random.default_rng(2)
+        x = rng.random(6)
+
+        diag = OneToOneSynapse("diag", pre, post, weight=rng.random(6))
+        np.testing.assert_allclose(diag.propagate(x), diag.to_dense() @ x)
+        with self.assertRaises(ValueError):
+            OneToOneSynapse("bad", pre, post4)
+
+        block = BlockDiagonalSynapse("block", pre, post4, weight=rng.random((2, 2, 3)))
+        np.testing.assert_allclose(block.propagate(x), block.to_dense() @ x)
+        self.assertEqual(BlockDiagonalSynapse("block2", pre, post4, params={'Blocks': 2}).weight.shape,
+                         (2, 2, 3))
+        with self.assertRaises(ValueError):
+            BlockDiagonalSynapse("bad", pre, post4, params={'Blocks': 4})
+
+    def test_structured_plastic_synapses(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        pre = Neuron('pre', 6, params)
+        post = Neuron('post', 4, params)
+        post6 = Neuron('post6', 6, params)
+        rng = np.random.default_rng(3)
+        spikes_pre = rng.random((100, 6)) < 0.2
+        spikes_post = rng.random((100, 6)) < 0.2
+        params_syn = {'Aplus': 0.01, 'Aminus': 0.01, 'Aforgetting': 0.005,
+                      'Tpre': 20, 'Tpost': 20}
+
+        cases = [(OneToOneSynapseSTDP, SynapseSTDP, post6, np.full(6, 0.5)),
+                 (OneToOneSynapseLTPf, SynapseLTPf, post6, np.full(6, 0.5)),
+                 (BlockDiagonalSynapseSTDP, SynapseSTDP, post, np.full((2, 2, 3), 0.5)),
+                 (BlockDiagonalSynapseLTPf, SynapseLTPf, post, np.full((2, 2, 3), 0.5))]
+        for cls, dense_cls, post_layer, w in cases:
+            for k_batch in (1, 4):
+                p = dict(params_syn, Kbatch=k_batch)
+                syn = cls("structured", pre, post_layer, weight=w.copy(), params=p)
+                dense = dense_cls("dense", pre, post_layer, weight=syn.to_dense(), params=p)
+                mask = syn.to_dense() != 0
+                for t in range(100):
+                    pre.S = spikes_pre[t]
+                    post_layer.S = spikes_post[t, :post_layer.N]
+                    syn.update_weight(1)
+                    dense.update_weight(1)
+                syn.flush_weight()
+                dense.flush_weight()
+                # Веса внутри структуры меняются так же, как в полной матрице
+                self.assertFalse(np.all(syn.weight == w))
+                np.testing.assert_allclose(syn.to_dense()[mask], dense.weight[mask])
+
+    def test_quantized_synapse(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        pre = Neuron('pre', 50, params)
+        post = Neuron('post', 30, params)
+        rng = np.random.default_rng(4)
+        w = rng.normal(0, 1, (30, 50))
+        w[3] = 0.
+        trained = Synapse("trained", pre, post, weight=w)
+
+        for bits, dtype, tol in ((8, np.int8, 1e-2), (16, np.int16, 1e-4)):
+            syn = QuantizedSynapse.from_synapse(trained, bits=bits, block_rows=8)
+            self.assertEqual(syn.weight.dtype, dtype)
+            x = rng.random(50)
+            np.testing.assert_allclose(syn.propagate(x), w @ x, rtol=tol, atol=tol * 10)
+            report = syn.accuracy_report(w)
+            # Ошибка округления не больше половины шага квантования
+            self.assertLessEqual(report['max_rel_error'], 0.5 / np.iinfo(dtype).max + 1e-7)
+            self.assertLess(report['propagate_rel_error'], tol)
+            self.assertEqual(report['memory_quantized'],
+                             report['memory_float'] * bits // 64 + syn.scale.nbytes)
+        np.testing.assert_array_equal(syn.get_weight()[3], 0.)
+
+    def test_delay(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        pre = Neuron('pre', 5, params)
+        post = Neuron('post', 4, params)
+        rng = np.random.default_rng(6)
+        w = rng.random((4, 5))
+        inputs = rng.random((30, 5)) * (rng.random((30, 5)) < 0.3)
+
+        # Общая задержка: выход равен выходу без задержки 3 шага назад
+        syn = Synapse("delay3", pre, post, weight=w, params={'Delay': 3})
+        diag = OneToOneSynapse("diag_delay", pre, Neuron('post5', 5, params),
+                               weight=np.arange(5.), params={'Delay': 2})
+        for t in range(30):
+            expected = w @ inputs[t - 3] if t >= 3 else np.zeros(4)
+            np.testing.assert_allclose(syn.propagate(inputs[t]), expected)
+            expected = np.arange(5.) * inputs[t - 2] if t >= 2 else np.zeros(5)
+            np.testing.assert_allclose(diag.propagate(inputs[t]), expected)
+
+        # Задержки отдельных связей
+        delay = rng.integers(0, 5, (4, 5))
+        syn = Synapse("delays", pre, post, weight=w, params={'Delay': delay})
+        for t in range(30):
+            expected = np.zeros(4)
+            for i in range(4):
+                for j in range(5):
+                    if t >= delay[i, j]:
+                        expected[i] += w[i, j] * inputs[t - delay[i, j], j]
+            np.testing.assert_allclose(syn.propagate(inputs[t]), expected)
+
+        with self.assertRaises(ValueError):
+            Synapse("bad", pre, post, weight=w, params={'Delay': 1.5})
+        with self.assertRaises(ValueError):
+            BlockDiagonalSynapse("bad", pre, Neuron('post5', 5, params),
+                                 weight=np.ones((5, 1, 1)), params={'Delay': np.ones((5, 5), dtype=int)})
+
+    def test_delay_changed_columns(self):
+        # Токи LIF затухают и не обнуляются: разносятся только изменившиеся столбцы
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False,
+                  'Utay': 10., 'Uth': 1., 'Urest': 0., 'Itay': 10., 'Imax': 1.}
+        pre = LIFNeuron('pre', 50, params)
+        post = Neuron('post', 30, {'Ustart': 0., 'Istart': 0., 'Sstart': False})
+        rng = np.random.default_rng(9)
+        w = rng.random((30, 50))
+        delay = rng.integers(0, 6, (30, 50))
+        syn = Synapse("delays", pre, post, weight=w, params={'Delay': delay})
+        inputs = (rng.random((300, 50)) < 0.02) * 2.
+        currents = []
+        for t in range(300):
+            pre.step(1., inputs[t])
+            currents.append(pre.get_current().copy())
+            out = syn.propagate(pre.get_current())
+            expected = np.zeros(30)
+            for i in range(30):
+                for j in range(50):
+                    if t >= delay[i, j]:
+                        expected[i] += w[i, j] * currents[t - delay[i, j]][j]
+            np.testing.assert_allclose(out, expected, rtol=1e-9, atol=1e-12)
+        # Разнесено примерно столько столбцов, сколько было спайков
+        self.assertLessEqual(syn.delay_scheduled, 2 * np.count_nonzero(inputs) + 50)
+        self.assertGreater(syn.delay_count, 0)
+
+    def test_threaded_update_weight(self):
+        params = {'Ustart': 0., 'Istart': 0., 'Sstart': False}
+        pre = Neuron('pre', 40, params)
+        post = Neuron('post', 50, params)
+        rng = np.random.default_rng(8)
+        spikes_pre = rng.random((50, 40)) < 0.2
+        spikes_post = rng.random((50, 50)) < 0.2
+        params_syn = {'Aplus': 0.01, 'Aminus': 0.01, 'Aforgetting': 0.005,
+                      'Tpre': 20, 'Tpost': 20}
+        w = rng.random((50, 40))
+        for cls in (SynapseSTDP, SynapseLTPf):
+            serial = cls("serial", pre, post, weight=w.copy(), params=params_syn)
+            threaded = cls("threaded", pre, post, weight=w.copy(),
+                           params=dict(params_syn, Threads=4, BlockRows=7))
+            for t in range(50):
+                pre.S = spikes_pre[t]
+                post.S = spikes_post[t]
+                serial.update_weight(0.5)
+                threaded.update_weight(0.5)
+            # Результат совпадает побитово
+            np.testing.assert_array_equal(threaded.weight, serial.weight)
+            self.assertFalse(np.all(serial.weight == w))
+
+            # Пакетное обновление тоже идет блоками строк
+            serial = cls("serial", pre, post, weight=w.copy(), params=dict(params_syn, Kbatch=8))
+            threaded = cls("threaded", pre, post, weight=w.copy(),
+                           params=dict(params_syn, Kbatch=8, Threads=4, BlockRows=7))
+            for t in range(50):
+                pre.S = spikes_pre[t]
+                post.S = spikes_post[t]
+                serial.update_weight(0.5)
+                threaded.update_weight(0.5)
+            serial.flush_weight()
+            threaded.flush_weight()
+            np.testing.assert_allclose(threaded.weight, serial.weight, rtol=1e-12)
+            self.assertFalse(np.all(serial.weight == w))
         
 
 if __name__ == '__main__':